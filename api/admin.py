@@ -5,6 +5,7 @@ from django import forms
 
 from django_svelte_jsoneditor.widgets import SvelteJSONEditorWidget
 
+from .keywords import keyword_prefix_ids
 from .models import (
     UserProfile, Article, Book, Tool,
     CourseRecorded, CourseOnsite,
@@ -253,6 +254,21 @@ class CourseOnsiteForm(forms.ModelForm):
             cleaned["outline"] = _parse_outline(cleaned["outline_text"])
         return cleaned
 
+# ============================
+# بحث الكلمات المفتاحية عبر الفهرس
+# ============================
+class KeywordSearchMixin:
+    """
+    يضيف للبحث في لوحة الإدارة مطابقة الكلمات المفتاحية من فهرس KeywordTag
+    (بادئة مُطبَّعة) بدلًا من icontains على نص JSON كامل.
+    """
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            ids = keyword_prefix_ids(self.model, search_term, using=queryset.db)
+            results = results | queryset.filter(pk__in=ids)
+        return results, may_have_duplicates
+
 # ============================
 # User/Profile
 # ============================
@@ -266,10 +282,10 @@ class UserProfileAdmin(admin.ModelAdmin):
 # Articles
 # ============================
 @admin.register(Article)
-class ArticleAdmin(admin.ModelAdmin):
+class ArticleAdmin(KeywordSearchMixin, admin.ModelAdmin):
     list_display = ("title", "is_published", "published_at", "created_at")
     list_filter  = ("is_published",)
-    search_fields = ("title", "excerpt", "content", "keywords")
+    search_fields = ("title", "excerpt", "content")  # + keywords عبر KeywordSearchMixin
     prepopulated_fields = {"slug": ("title",)}
     date_hierarchy = "published_at"
     readonly_fields = ("created_at", "updated_at")
@@ -278,11 +294,11 @@ class ArticleAdmin(admin.ModelAdmin):
 # Courses
 # ============================
 @admin.register(CourseRecorded)
-class CourseRecordedAdmin(admin.ModelAdmin):
+class CourseRecordedAdmin(KeywordSearchMixin, admin.ModelAdmin):
     form = CourseRecordedForm
     list_display = ("title", "is_published", "is_featured", "created_at")
     list_filter  = ("is_published", "is_featured")
-    search_fields = ("title", "summary", "long_description", "keywords")
+    search_fields = ("title", "summary", "long_description")  # + keywords عبر KeywordSearchMixin
     prepopulated_fields = {"slug": ("title",)}
     readonly_fields = ("created_at", "updated_at")
 
@@ -302,11 +318,11 @@ class CourseRecordedAdmin(admin.ModelAdmin):
     )
 
 @admin.register(CourseOnsite)
-class CourseOnsiteAdmin(admin.ModelAdmin):
+class CourseOnsiteAdmin(KeywordSearchMixin, admin.ModelAdmin):
     form = CourseOnsiteForm
     list_display = ("title", "is_published", "is_featured", "created_at")
     list_filter  = ("is_published", "is_featured")
-    search_fields = ("title", "summary", "long_description", "keywords")
+    search_fields = ("title", "summary", "long_description")  # + keywords عبر KeywordSearchMixin
     prepopulated_fields = {"slug": ("title",)}
     readonly_fields = ("created_at", "updated_at")
 
@@ -328,17 +344,17 @@ class CourseOnsiteAdmin(admin.ModelAdmin):
 # Books & Tools
 # ============================
 @admin.register(Book)
-class BookAdmin(admin.ModelAdmin):
+class BookAdmin(KeywordSearchMixin, admin.ModelAdmin):
     list_display = ("title", "author_name", "is_published", "is_featured", "created_at")
     list_filter  = ("is_published", "is_featured")
-    search_fields = ("title", "author_name", "description", "keywords")
+    search_fields = ("title", "author_name", "description")  # + keywords عبر KeywordSearchMixin
     readonly_fields = ("created_at", "updated_at")
 
 @admin.register(Tool)
-class ToolAdmin(admin.ModelAdmin):
+class ToolAdmin(KeywordSearchMixin, admin.ModelAdmin):
     list_display = ("name", "is_published", "is_featured", "created_at", "link_preview")
     list_filter  = ("is_published", "is_featured")
-    search_fields = ("name", "description", "keywords")
+    search_fields = ("name", "description")  # + keywords عبر KeywordSearchMixin
     readonly_fields = ("created_at", "updated_at")
 
     def link_preview(self, obj):
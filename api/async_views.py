@@ -0,0 +1,127 @@
+# api/async_views.py
+"""
+نسخ غير متزامنة (ASGI) من views القوائم والتفاصيل في الكتالوج.
+
+- لا تكرّر المنطق: كل view غير متزامن يغلّف الـ view المتزامن نفسه (get_queryset، الفلاتر،
+  خطة الحقول، الكاش، ETag) ويستبدل فقط نقاط الإدخال/الإخراج بالـ ORM غير المتزامن
+  (acount / afirst / aget / التكرار async)، فالمخرجات ومفاتيح الكاش واحدة في المسارين.
+- JSON فقط (بدون الواجهة المتصفَّحة)، والمصادقة غير مطلوبة (الكتالوج عام).
+- يُختار لكل URL عبر settings.ASYNC_VIEWS (أسماء المسارات، أو "*" للكل) — انظر catalog_path.
+- أول طلب لكل alias يسخّن كاشات متزامنة (توفر FTS و ContentType) بقفزة خيط واحدة؛ بعدها لا
+  استعلام متزامن داخل حلقة الأحداث (fts_available يعيد False إن لم يوجد الفهرس عند التسخين).
+"""
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.http import Http404
+from django.urls import path
+from django.views import View
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.generics import RetrieveAPIView
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .fastserializers import get_field_plan, ordering_fields
+from .instrumentation import timed
+from .keywords import KEYWORD_MODELS
+from .payloads import MaterializedDetailMixin
+from .routers import read_alias
+from .search import fts_available
+
+_warm_aliases = set()
+
+
+def _warm(alias):
+    fts_available(alias)
+    for name in KEYWORD_MODELS:
+        ContentType.objects.db_manager(alias).get_for_model(apps.get_model("api", name))
+
+
+async def awarm(alias):
+    if alias not in _warm_aliases:
+        await sync_to_async(_warm)(alias)
+        _warm_aliases.add(alias)
+
+
+class AsyncCatalogView(View):
+    view_class = None  # الـ view المتزامن (DRF) الذي نستعير منطقه
+
+    def setup_view(self, request, args, kwargs):
+        view = self.view_class()
+        view.args, view.kwargs = args, kwargs
+        view.format_kwarg = None
+        view.headers = {}
+        renderer = next(
+            (cls() for cls in view.renderer_classes if issubclass(cls, JSONRenderer)), JSONRenderer()
+        )
+        view.request = Request(request, parsers=[], authenticators=())
+        view.request.accepted_renderer = renderer
+        view.request.accepted_media_type = renderer.media_type
+        return view
+
+    async def get(self, request, *args, **kwargs):
+        view = self.setup_view(request, args, kwargs)
+        await awarm(read_alias())
+        try:
+            response = await view.acached_response(view.request, partial(self.handle, view))
+        except Http404 as exc:
+            response = self.error_response(NotFound(*exc.args))
+        except APIException as exc:
+            response = self.error_response(exc)
+        return self.finalize(view, response)
+
+    async def handle(self, view, request):
+        raise NotImplementedError
+
+    def error_response(self, exc):
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+        return Response(data, status=exc.status_code)
+
+    def finalize(self, view, response):
+        response.accepted_renderer = view.request.accepted_renderer
+        response.accepted_media_type = view.request.accepted_media_type
+        response.renderer_context = view.get_renderer_context()
+        with timed("render"):
+            return response.render()
+
+
+class AsyncListView(AsyncCatalogView):
+    async def handle(self, view, request):
+        queryset = view.filter_queryset(view.get_queryset())
+        plan = get_field_plan(view.get_serializer_class())
+        if plan is not None:
+            rows, serialize = plan.values(queryset, extra=ordering_fields(view)), plan.serialize
+        else:
+            rows, serialize = queryset, lambda objs: view.get_serializer(objs, many=True).data
+
+        page = await view.paginator.apaginate_queryset(rows, request, view=view)
+        if page is None:
+            return Response(serialize([row async for row in rows]))
+        return view.paginator.get_paginated_response(serialize(page))
+
+
+class AsyncDetailView(AsyncCatalogView):
+    async def handle(self, view, request):
+        row = await view.aget_detail_row()
+        if row is None:
+            model = view.get_queryset().model
+            raise Http404(f"No {model._meta.object_name} matches the given query.")
+        if isinstance(view, MaterializedDetailMixin):
+            payload = view.stored_payload(row)
+            if payload is not None:
+                return Response(payload)
+        obj = await view.filter_queryset(view.get_queryset()).aget(pk=row[0])
+        return Response(view.get_serializer(obj).data)
+
+
+def catalog_path(route, view_class, name):
+    """path() بالنسخة غير المتزامنة إن كان `name` في settings.ASYNC_VIEWS، وإلا الـ view العادي."""
+    selected = getattr(settings, "ASYNC_VIEWS", ())
+    if "*" in selected or name in selected:
+        async_class = AsyncDetailView if issubclass(view_class, RetrieveAPIView) else AsyncListView
+        return path(route, async_class.as_view(view_class=view_class), name=name)
+    return path(route, view_class.as_view(), name=name)
@@ -0,0 +1,205 @@
+# api/authentication.py
+"""
+مصادقة JWT بدون استعلام لطلبات القراءة.
+
+- التوكن يُتحقق منه كالمعتاد (التوقيع، الانتهاء، النوع)، ثم نثق بـ user_id الموجود فيه.
+- GET/HEAD/OPTIONS: request.user كائن كسول (LazyUser) يعرف pk ويجيب is_authenticated بدون
+  قاعدة البيانات؛ لا يُحمَّل صف المستخدم إلا إذا قرأ الـ view حقلًا آخر منه.
+- التحميل يمر عبر كاش محدود بمهلة (TTL) داخل العملية، وكل عنصر مربوط بجيل "ختم" المستخدم في
+  الكاش المشترك (api/cache.py). حفظ المستخدم (ومنه تغيير كلمة المرور والتعطيل) ينشر ختمًا بجيل
+  جديد بعد الـ commit، وحذفه يمسح الختم (signals.py)، فتسقط نسخ كل العمّال عند الإصابة التالية.
+- طلب القراءة يفحص is_active وبصمة كلمة المرور من الختم (قراءة كاش واحدة بدون القاعدة)؛ إن غاب
+  الختم يُحمَّل المستخدم الآن (استعلام واحد) ويُنشر ختمه.
+- الكتابة (POST/PATCH/...): المستخدم الحقيقي كما في JWTAuthentication (مع الكاش).
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .cache import delete_user_stamp, get_user_stamp, set_user_stamp
+
+
+# ============================
+# كاش المستخدمين داخل العملية
+# ============================
+class UserCache:
+    """LRU محدود الحجم مع مهلة لكل عنصر، وجيل الختم الذي حُمِّل عليه (آمن بين الخيوط)."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, generation):
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is None:
+                return None
+            expires, user, cached_generation = entry
+            if expires < time.monotonic() or cached_generation != generation:
+                del self._data[user_id]
+                return None
+            self._data.move_to_end(user_id)
+        # نسخة لكل طلب: تعديل view لكائنه لا يلوّث الكاش
+        return copy.copy(user)
+
+    def set(self, user_id, user, generation):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[user_id] = (time.monotonic() + self.ttl, copy.copy(user), generation)
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def evict(self, user_id):
+        with self._lock:
+            self._data.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+user_cache = UserCache(
+    maxsize=getattr(settings, "AUTH_USER_CACHE_SIZE", 1024),
+    ttl=getattr(settings, "AUTH_USER_CACHE_TTL", 60),
+)
+
+
+def _user_state(user):
+    return user.is_active, get_md5_hash_password(user.password)
+
+
+def evict_user(user_id):
+    """يُسقط المستخدم من هذه العملية ويمسح ختمه، فيُعاد تحميله من القاعدة في كل العمّال."""
+    user_cache.evict(user_id)
+    delete_user_stamp(user_id)
+
+
+def publish_user(user):
+    """ختم بجيل جديد من حالة user المحفوظة (بعد الـ commit): تسقط نسخ الجيل السابق في كل العمّال."""
+    user_cache.evict(user.pk)
+    set_user_stamp(user.pk, *_user_state(user))
+
+
+def remember_user(user):
+    """بعد قراءة user من القاعدة (الدخول): ينشر ختمه إن غاب ويضعه في كاش العملية."""
+    stamp = set_user_stamp(user.pk, *_user_state(user), replace=False)
+    if stamp is not None:
+        user_cache.set(user.pk, user, stamp[0])
+
+
+# ============================
+# المستخدم الكسول
+# ============================
+class LazyUser:
+    """
+    بديل request.user لطلبات القراءة: pk/id من التوكن، والباقي يُحمَّل عند أول وصول.
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, authentication, validated_token, user_id):
+        self.__dict__.update(_auth=authentication, _token=validated_token, _user=None, pk=user_id, id=user_id)
+
+    def _resolve(self):
+        if self._user is None:
+            self.__dict__["_user"] = self._auth.load_user(self._token, self.pk)
+        return self._user
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._resolve(), name, value)
+
+    def __eq__(self, other):
+        return getattr(other, "pk", None) == self.pk and getattr(other, "is_authenticated", False)
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __str__(self):
+        return str(self._resolve())
+
+    def __repr__(self):
+        return f"<LazyUser pk={self.pk}>"
+
+
+# ============================
+# المصادقة
+# ============================
+class StatelessJWTAuthentication(JWTAuthentication):
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+
+        if request.method not in SAFE_METHODS:
+            return self.get_user(validated_token), validated_token
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        # الختم المشترك يكفي لفحص is_active وكلمة المرور؛ بدونه نحمّل المستخدم الآن
+        stamp = get_user_stamp(user_id)
+        if stamp is None:
+            return self.load_user(validated_token, user_id), validated_token
+        self.check_stamp(stamp, validated_token)
+        return LazyUser(self, validated_token, user_id), validated_token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        return self.load_user(validated_token, user_id)
+
+    def load_user(self, validated_token, user_id):
+        stamp = get_user_stamp(user_id)  # قبل الاستعلام: حفظٌ بعده ينشر جيلًا آخر فتسقط هذه النسخة
+        user = user_cache.get(user_id, stamp[0]) if stamp is not None else None
+        if user is None:
+            try:
+                user = get_user_model().objects.get(**{api_settings.USER_ID_FIELD: user_id})
+            except get_user_model().DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            if stamp is None:
+                stamp = set_user_stamp(user_id, *_user_state(user), replace=False)
+            if stamp is not None:
+                user_cache.set(user_id, user, stamp[0])
+        self.check_user(user, validated_token)
+        return user
+
+    def check_user(self, user, validated_token):
+        """نفس فحوص JWTAuthentication.get_user بعد جلب المستخدم."""
+        self.check_state(*_user_state(user), validated_token)
+
+    def check_stamp(self, stamp, validated_token):
+        _, is_active, password_hash = stamp
+        self.check_state(is_active, password_hash, validated_token)
+
+    def check_state(self, is_active, password_hash, validated_token):
+        if not is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_hash:
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
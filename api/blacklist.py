@@ -0,0 +1,181 @@
+# api/blacklist.py
+"""
+فلتر Bloom داخل العملية أمام جدول token_blacklist.
+
+- كل تحديث (refresh) يفحص هل التوكن في القائمة السوداء؛ الغالبية الساحقة ليست فيها.
+  الفلتر يجيب "ليس فيها بالتأكيد" بدون استعلام، و"ربما" فقط يذهب لقاعدة البيانات.
+- بلا نتائج سلبية كاذبة بين العمّال: كل إضافة للقائمة (أي عامل، أي مسار) ترفع جيل BlacklistedToken
+  في الكاش المشترك بعد الـ commit (signals.py). كل فحص يقرأ الجيل (قراءة كاش واحدة)، وإن تغيّر
+  منذ آخر تحديث يُحدَّث الفلتر تزايديًا قبل الإجابة: id > آخر id رأيناه، ومعها نافذة
+  blacklisted_at تبدأ قبل آخر قراءة بـ TOKEN_BLACKLIST_FILTER_OVERLAP ثانية — صفوف بـ id أصغر
+  تظهر متأخرة (commit بغير ترتيب id في قاعدة خارجية، أو إعادة SQLite استعمال rowid بعد الحذف)
+  فلا تفوت الفلتر حتى إعادة البناء. النافذة أطول من أي معاملة تكتب في القائمة.
+  TOKEN_BLACKLIST_FILTER_REFRESH ثوانٍ: تحديث دوري احتياطي (لو طُرد الجيل من الكاش).
+- إعادة البناء الكاملة (كل TOKEN_BLACKLIST_FILTER_REBUILD، أو عند تجاوز السعة، أو أول مرة) تدريجية:
+  كل فحص يتقدّم دفعة واحدة (TOKEN_BLACKLIST_FILTER_BUILD_CHUNK صف، keyset على id) والفلتر القديم
+  يجيب حتى تكتمل — فلا يتوقف طلب واحد لتحميل القائمة كلها. قبل أول فلتر تجيب قاعدة البيانات.
+"""
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from datetime import timedelta
+
+from django.db.models import Max, Q
+from django.utils import timezone
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .cache import get_generations
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(int(capacity), 1)
+        self.size = max(int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hashes = max(int(round(self.size / self.capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        # double hashing: h1 + i*h2 من blake2b واحد
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, value):
+        for pos in self._positions(value):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
+
+
+class BlacklistFilter:
+    min_capacity = 10_000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset_state()
+
+    def reset_state(self):
+        self._bloom = None          # الفلتر الذي يجيب
+        self._watermark = 0         # آخر id في الفلتر
+        self._scanned_at = None     # وقت آخر قراءة (بداية نافذة blacklisted_at التالية)
+        self._generation = None     # جيل القائمة في الكاش عند آخر تحديث
+        self._built_at = self._refreshed_at = 0.0
+        self._build = None          # إعادة بناء جارية: {"bloom", "cursor", "target", "now"}
+
+    def _setting(self, name, default):
+        return getattr(settings, name, default)
+
+    # ---------- إعادة البناء التدريجية ----------
+    def _start_build(self, capacity=None):
+        if capacity is None:
+            previous = self._bloom.count if self._bloom is not None else 0
+            capacity = max(self.min_capacity, previous * 2)
+        self._build = {
+            "bloom": BloomFilter(capacity, self._setting("TOKEN_BLACKLIST_FILTER_ERROR_RATE", 0.001)),
+            "cursor": 0,
+            # ما بعد target يلتقطه التحديث التزايدي بعد التبديل
+            "target": BlacklistedToken.objects.aggregate(last=Max("pk"))["last"] or 0,
+            "now": timezone.now(),
+        }
+
+    def _build_step(self):
+        build = self._build
+        chunk = self._setting("TOKEN_BLACKLIST_FILTER_BUILD_CHUNK", 2000)
+        rows = list(
+            BlacklistedToken.objects.filter(
+                pk__gt=build["cursor"], pk__lte=build["target"], token__expires_at__gt=build["now"],
+            ).order_by("pk").values_list("pk", "token__jti")[:chunk]
+        )
+        bloom = build["bloom"]
+        for _, jti in rows:
+            bloom.add(jti)
+        if bloom.count > bloom.capacity:  # التقدير صغير: من جديد بسعة أكبر
+            self._start_build(bloom.capacity * 4)
+            return
+        if len(rows) == chunk:
+            build["cursor"] = rows[-1][0]
+            return
+        self._bloom, self._watermark, self._scanned_at = bloom, build["target"], build["now"]
+        self._built_at, self._build = time.monotonic(), None
+        self._generation = None  # حدّث فورًا بما أُضيف أثناء البناء
+
+    def _needs_rebuild(self, now):
+        return (
+            self._bloom is None
+            or self._bloom.count > self._bloom.capacity
+            or now - self._built_at > self._setting("TOKEN_BLACKLIST_FILTER_REBUILD", 3600)
+        )
+
+    # ---------- التحديث التزايدي ----------
+    def _refresh(self):
+        since = self._scanned_at - timedelta(seconds=self._setting("TOKEN_BLACKLIST_FILTER_OVERLAP", 10))
+        scanned_at = timezone.now()  # قبل الاستعلام
+        rows = list(
+            BlacklistedToken.objects.filter(Q(pk__gt=self._watermark) | Q(blacklisted_at__gte=since))
+            .order_by().values_list("pk", "token__jti")  # بلا ترتيب: SQLite يستخدم الفهرسين (MULTI-INDEX OR)
+        )
+        for pk, jti in rows:
+            for bloom in (self._bloom, self._build and self._build["bloom"]):
+                if bloom and jti not in bloom:  # النافذة تعيد صفوفًا معروفة: لا تضخّم count
+                    bloom.add(jti)
+            self._watermark = max(self._watermark, pk)
+        self._scanned_at = scanned_at
+        self._refreshed_at = time.monotonic()
+
+    def might_contain(self, jti):
+        generation = get_generations([BlacklistedToken])[0]  # قبل الاستعلام: ما يُضاف بعده يغيّر الجيل
+        with self._lock:
+            now = time.monotonic()
+            if self._build is None and self._needs_rebuild(now):
+                self._start_build()
+            if self._build is not None:
+                self._build_step()
+            if self._bloom is None:
+                return True  # لا فلتر مكتمل بعد: قاعدة البيانات تجيب
+            if generation != self._generation or now - self._refreshed_at >= self._setting(
+                "TOKEN_BLACKLIST_FILTER_REFRESH", 5
+            ):
+                self._refresh()
+                self._generation = generation
+            return jti in self._bloom
+
+    def add(self, jti):
+        with self._lock:
+            for bloom in (self._bloom, self._build and self._build["bloom"]):
+                if bloom:
+                    bloom.add(jti)
+
+    def reset(self):
+        with self._lock:
+            self.reset_state()
+
+
+blacklist_filter = BlacklistFilter()
+
+
+class FilteredRefreshToken(RefreshToken):
+    """RefreshToken يسأل الفلتر قبل جدول القائمة السوداء."""
+
+    def check_blacklist(self):
+        if not blacklist_filter.might_contain(self.payload[api_settings.JTI_CLAIM]):
+            return
+        super().check_blacklist()
+
+    def blacklist(self):
+        result = super().blacklist()
+        blacklist_filter.add(self.payload[api_settings.JTI_CLAIM])
+        return result
+
+
+class FilteredTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = FilteredRefreshToken
@@ -0,0 +1,238 @@
+# api/cache.py
+"""
+كاش استجابات القراءة للكتالوج مع إبطال بالأجيال (generations).
+
+- لكل موديل عدّاد جيل في الكاش المشترك؛ إشارات post_save/post_delete ترفعه (signals.py).
+- مفتاح الاستجابة = اسم الـ view + أجيال الموديلات التي يعتمد عليها + المسار والـ query params
+  بعد التطبيع. أي تعديل يغيّر الجيل فيصبح المفتاح القديم غير مستخدم (ينتهي بالمهلة).
+- الجيل قيمة جديدة غير مستعملة عند كل رفع (الوقت بالنانوثانية + عشوائي) تُكتب بـ set، لا incr:
+  incr في FileBasedCache قراءة ثم كتابة غير ذرّية بين العمّال فقد يضيع رفع؛ أما set بقيمة فريدة
+  فيغيّر الجيل دائمًا، ولو طُرد من الكاش لا يعود لقيمة قديمة.
+- الرفع بعد الـ commit (transaction.on_commit في signals.py): لو رُفع داخل المعاملة لقرأ طلبٌ
+  الصفوف القديمة (لقطة WAL) وخزّنها تحت الجيل الجديد حتى انتهاء المهلة.
+"""
+import hashlib
+import json
+import secrets
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from .instrumentation import timed
+from .metrics import record_cache
+
+RESPONSE_CACHE_PREFIX = "api:resp"
+GENERATION_PREFIX = "api:gen"
+ME_PREFIX = "api:me"
+USER_STAMP_PREFIX = "api:authuser"
+
+
+def _cache():
+    return caches[getattr(settings, "API_CACHE_ALIAS", "default")]
+
+
+def _timeout():
+    return getattr(settings, "API_CACHE_TIMEOUT", 60 * 60)
+
+
+def _generation_key(model):
+    return f"{GENERATION_PREFIX}:{model._meta.label_lower}"
+
+
+def _new_generation():
+    return f"{time.time_ns()}-{secrets.token_hex(4)}"
+
+
+# ============================
+# الأجيال
+# ============================
+def get_generations(models):
+    """أجيال الموديلات بالترتيب (قراءة واحدة من الكاش، وتهيئة الناقص)."""
+    cache = _cache()
+    keys = [_generation_key(m) for m in models]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, _new_generation(), timeout=None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+async def aget_generations(models):
+    """get_generations للـ views غير المتزامنة."""
+    cache = _cache()
+    keys = [_generation_key(m) for m in models]
+    found = await cache.aget_many(keys)
+    for key in keys:
+        if key not in found:
+            await cache.aadd(key, _new_generation(), timeout=None)
+            found[key] = await cache.aget(key)
+    return [found[key] for key in keys]
+
+
+def bump_generation(model):
+    _cache().set(_generation_key(model), _new_generation(), timeout=None)
+
+
+# ============================
+# كاش الاستجابات
+# ============================
+def _response_key(view, request, generations):
+    params = sorted(
+        (k, sorted(request.query_params.getlist(k))) for k in request.query_params
+    )
+    raw = json.dumps(
+        [request.build_absolute_uri(request.path), params, request.accepted_renderer.format],
+        ensure_ascii=False,
+    )
+    digest = hashlib.sha1(raw.encode()).hexdigest()
+    gens = ".".join(str(g) for g in generations)
+    return f"{RESPONSE_CACHE_PREFIX}:{type(view).__name__}:{gens}:{digest}"
+
+
+def response_cache_key(view, request, models):
+    return _response_key(view, request, get_generations(models))
+
+
+async def aresponse_cache_key(view, request, models):
+    return _response_key(view, request, await aget_generations(models))
+
+
+class CachedResponseMixin:
+    """
+    يخزّن response.data لطلبات GET الناجحة ويعيدها بدون قاعدة بيانات ولا serializer.
+    `cache_models`: الموديلات التي يُبطل تعديلها الكاش (الافتراضي: موديل الـ serializer).
+
+    GET الشرطي: إن عرّف الـ view دالة get_validators() (انظر conditional.py) تُخزَّن
+    المحقِّقات مع البيانات، فيُجاب If-None-Match من الكاش بـ 304 بدون أي استعلام؛
+    وعند غياب الكاش تُحسب المحقِّقات أولًا ويُرجَع 304 قبل أي serializer.
+    """
+    cache_models = None
+
+    def get_cache_models(self):
+        if self.cache_models is not None:
+            return self.cache_models
+        return (self.get_serializer_class().Meta.model,)
+
+    def get_validators(self):
+        return None
+
+    async def aget_validators(self):
+        return None
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        use_cache = getattr(settings, "API_CACHE_ENABLED", True)
+        if use_cache:
+            cache = _cache()
+            key = response_cache_key(self, request, self.get_cache_models())
+            entry = cache.get(key)
+            record_cache("response", entry is not None)
+            if entry is not None:
+                data, validators = entry
+                if validators is not None:
+                    if validators.not_modified(request):
+                        return validators.not_modified_response()
+                    return validators.apply(Response(data))
+                return Response(data)
+
+        validators = self.get_validators()
+        if validators is not None and validators.not_modified(request):
+            return validators.not_modified_response()
+
+        with timed("serialize"):
+            response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            if use_cache:
+                cache.set(key, (response.data, validators), timeout=_timeout())
+            if validators is not None:
+                validators.apply(response)
+        return response
+
+    async def acached_response(self, request, handler, *args, **kwargs):
+        """cached_response للـ views غير المتزامنة (async_views.py): handler دالة async."""
+        use_cache = getattr(settings, "API_CACHE_ENABLED", True)
+        if use_cache:
+            cache = _cache()
+            key = await aresponse_cache_key(self, request, self.get_cache_models())
+            entry = await cache.aget(key)
+            record_cache("response", entry is not None)
+            if entry is not None:
+                data, validators = entry
+                if validators is not None:
+                    if validators.not_modified(request):
+                        return validators.not_modified_response()
+                    return validators.apply(Response(data))
+                return Response(data)
+
+        validators = await self.aget_validators()
+        if validators is not None and validators.not_modified(request):
+            return validators.not_modified_response()
+
+        with timed("serialize"):
+            response = await handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            if use_cache:
+                await cache.aset(key, (response.data, validators), timeout=_timeout())
+            if validators is not None:
+                validators.apply(response)
+        return response
+
+    def get(self, request, *args, **kwargs):
+        return self.cached_response(request, super().get, *args, **kwargs)
+
+
+# ============================
+# كاش /api/me/ (لكل مستخدم)
+# ============================
+def me_cache_key(user_id):
+    return f"{ME_PREFIX}:{user_id}"
+
+
+def get_cached_me(user_id, build):
+    """حمولة me من الكاش، أو build() وتخزينها حتى يُبطلها حفظ المستخدم/البروفايل."""
+    if not getattr(settings, "API_CACHE_ENABLED", True):
+        return build()
+    cache = _cache()
+    key = me_cache_key(user_id)
+    data = cache.get(key)
+    record_cache("me", data is not None)
+    if data is None:
+        data = build()
+        cache.set(key, data, timeout=_timeout())
+    return data
+
+
+def invalidate_me(user_id):
+    _cache().delete(me_cache_key(user_id))
+
+
+# ============================
+# ختم المستخدم لكاش المصادقة (api/authentication.py)
+# ============================
+# (جيل، is_active، بصمة كلمة المرور) مشترك بين العمّال: كاش المستخدمين داخل كل عملية يقارن
+# جيله به عند كل إصابة، وطلبات القراءة تفحص is_active/كلمة المرور منه بدون قاعدة البيانات.
+def _user_stamp_key(user_id):
+    return f"{USER_STAMP_PREFIX}:{user_id}"
+
+
+def get_user_stamp(user_id):
+    return _cache().get(_user_stamp_key(user_id))
+
+
+def set_user_stamp(user_id, is_active, password_hash, replace=True):
+    """
+    ينشر ختمًا بجيل جديد. replace=False (بعد قراءة من القاعدة) لا يكتب فوق ختم موجود، فلا يغطي
+    قارئٌ بلقطة قديمة على ما نشره الحفظ بعد الـ commit؛ ويعيد None إن وُجد ختم.
+    """
+    stamp = (_new_generation(), is_active, password_hash)
+    if replace:
+        _cache().set(_user_stamp_key(user_id), stamp, timeout=None)
+    elif not _cache().add(_user_stamp_key(user_id), stamp, timeout=None):
+        return None
+    return stamp
+
+
+def delete_user_stamp(user_id):
+    _cache().delete(_user_stamp_key(user_id))
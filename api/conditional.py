@@ -0,0 +1,119 @@
+# api/conditional.py
+"""
+ETag / Last-Modified للكتالوج (GET الشرطي).
+
+- التفاصيل: من updated_at للعنصر (استعلام عمود واحد قبل أي serializer).
+- القوائم: ETag من max(updated_at) + عدد صفوف الـ queryset بعد الفلترة + الـ query params؛
+  العدد يلتقط الحذف وإلغاء النشر اللذين لا يغيّران max(updated_at).
+- If-None-Match له الأولوية على If-Modified-Since (RFC 9110).
+"""
+import hashlib
+import json
+
+from django.db.models import Count, Max
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+class Validators:
+    def __init__(self, etag=None, last_modified=None):
+        self.etag = quote_etag(etag) if etag else None
+        self.last_modified = int(last_modified.timestamp()) if last_modified else None
+
+    def not_modified(self, request):
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+        if if_none_match and self.etag:
+            etags = parse_etags(if_none_match)
+            return "*" in etags or self.etag in etags or self.etag.removeprefix("W/") in etags
+        if_modified_since = parse_http_date_safe(request.META.get("HTTP_IF_MODIFIED_SINCE", ""))
+        if if_modified_since is not None and self.last_modified is not None:
+            return self.last_modified <= if_modified_since
+        return False
+
+    def apply(self, response):
+        if self.etag:
+            response["ETag"] = self.etag
+        if self.last_modified is not None:
+            response["Last-Modified"] = http_date(self.last_modified)
+        # يبقى قابلًا للتخزين لكن يُعاد التحقق منه في كل مرة (304 رخيص)
+        patch_cache_control(response, no_cache=True)
+        return response
+
+    def not_modified_response(self):
+        return self.apply(Response(status=status.HTTP_304_NOT_MODIFIED))
+
+
+def _digest(*parts):
+    raw = json.dumps(parts, default=str, ensure_ascii=False)
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _params(request):
+    return sorted((k, sorted(request.query_params.getlist(k))) for k in request.query_params)
+
+
+class ListValidatorsMixin:
+    """ETag للقائمة من max(updated_at) وعدد الصفوف (استعلام تجميع واحد)."""
+
+    def validators_queryset(self):
+        cursor_param = getattr(self.paginator, "cursor_query_param", None)
+        if cursor_param and cursor_param in self.request.query_params:
+            return None  # وضع المؤشر يتجنب COUNT عمدًا
+        return self.filter_queryset(self.get_queryset()).order_by()
+
+    def list_validators(self, agg):
+        etag = _digest(
+            type(self).__name__, _params(self.request), self.request.accepted_renderer.format,
+            agg["last"], agg["n"],
+        )
+        return Validators(etag=etag)
+
+    def get_validators(self):
+        qs = self.validators_queryset()
+        if qs is None:
+            return None
+        return self.list_validators(qs.aggregate(last=Max("updated_at"), n=Count("pk")))
+
+    async def aget_validators(self):
+        qs = self.validators_queryset()
+        if qs is None:
+            return None
+        return self.list_validators(await qs.aaggregate(last=Max("updated_at"), n=Count("pk")))
+
+
+class DetailValidatorsMixin:
+    """ETag و Last-Modified للعنصر من updated_at (بدون تحميل الصف كاملًا)."""
+
+    def detail_row_queryset(self):
+        """values_list تبدأ بـ (pk, updated_at, ...) للعنصر المطلوب؛ يمكن للـ mixins توسيعها."""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        lookup = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        return self.get_queryset().filter(**lookup).order_by().values_list("pk", "updated_at")
+
+    def lookup_detail_row(self):
+        return self.detail_row_queryset().first()
+
+    def get_detail_row(self):
+        if not hasattr(self, "_detail_row"):
+            self._detail_row = self.lookup_detail_row()
+        return self._detail_row
+
+    async def aget_detail_row(self):
+        if not hasattr(self, "_detail_row"):
+            self._detail_row = await self.detail_row_queryset().afirst()
+        return self._detail_row
+
+    def detail_validators(self, row):
+        if row is None:
+            return None  # سيُرجع الـ view 404 كالمعتاد
+        pk, updated_at = row[:2]
+        etag = _digest(type(self).__name__, pk, self.request.accepted_renderer.format, updated_at)
+        return Validators(etag=etag, last_modified=updated_at)
+
+    def get_validators(self):
+        return self.detail_validators(self.get_detail_row())
+
+    async def aget_validators(self):
+        return self.detail_validators(await self.aget_detail_row())
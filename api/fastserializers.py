@@ -0,0 +1,150 @@
+# api/fastserializers.py
+"""
+مسار سريع لـ serializers القوائم (للقراءة فقط).
+
+بدل بناء كائن موديل ثم تمرير كل حقل عبر to_representation في DRF:
+- نجلب الصفوف بـ values() (قواميس، بدون بناء كائنات).
+- نبني كل قاموس من "خطة حقول" محسوبة مرة واحدة لكل serializer: الحقول التي لا يغيّرها
+  DRF (نصوص، أرقام، منطقية، JSON) تُنسخ كما هي، والباقي (التواريخ مثلًا) يمر عبر
+  to_representation للحقل نفسه، فالمخرجات مطابقة لـ serializer الأصلي.
+- أي serializer فيه حقل غير بسيط (SerializerMethodField، source مركّب، علاقات...) لا خطة له،
+  ويعود الـ view للمسار العادي.
+
+إسقاط الأعمدة: حتى في المسار العادي لا نحمّل إلا أعمدة حقول الـ serializer (+ الترتيب) عبر
+.only()، فلا تُسحب النصوص الثقيلة (content / long_description / outline...) في القوائم.
+"""
+from rest_framework import serializers
+from rest_framework.response import Response
+
+# حقول يعيد to_representation فيها القيمة كما هي لقيم قاعدة البيانات
+_PASSTHROUGH_FIELDS = (
+    serializers.CharField,      # يشمل SlugField / URLField / EmailField
+    serializers.BooleanField,
+    serializers.IntegerField,
+    serializers.FloatField,
+)
+
+
+class FieldPlan:
+    def __init__(self, serializer_class, names, converters):
+        self.serializer_class = serializer_class
+        self.names = names
+        self.converters = converters
+
+    def values(self, queryset, extra=()):
+        """queryset.values() بالحقول المطلوبة + أي حقول إضافية (ترتيب المؤشر، search_rank...)."""
+        fields = list(dict.fromkeys([*self.names, *extra]))
+        fields += [name for name in queryset.query.extra_select if name not in fields]
+        return queryset.values(*fields)
+
+    def serialize(self, rows):
+        items = [(name, convert) for name, convert in zip(self.names, self.converters)]
+        out = []
+        for row in rows:
+            item = {}
+            for name, convert in items:
+                value = row[name]
+                item[name] = value if convert is None or value is None else convert(value)
+            out.append(item)
+        return out
+
+
+_plans = {}
+
+
+def get_field_plan(serializer_class):
+    """خطة الحقول لـ ModelSerializer للقراءة فقط، أو None إن لم يكن مؤهلًا."""
+    if serializer_class not in _plans:
+        _plans[serializer_class] = _compile(serializer_class)
+    return _plans[serializer_class]
+
+
+def _compile(serializer_class):
+    meta = getattr(serializer_class, "Meta", None)
+    if meta is None or not issubclass(serializer_class, serializers.ModelSerializer):
+        return None
+    model_fields = {f.name for f in meta.model._meta.concrete_fields}
+    fields = serializer_class().fields
+    names, converters = [], []
+    for name, field in fields.items():
+        if field.write_only:
+            continue
+        if field.source != name or name not in model_fields:
+            return None
+        if isinstance(field, serializers.JSONField):
+            converters.append(field.to_representation if field.binary else None)
+        elif isinstance(field, _PASSTHROUGH_FIELDS):
+            converters.append(None)
+        elif isinstance(field, (serializers.RelatedField, serializers.ManyRelatedField, serializers.BaseSerializer)):
+            return None
+        else:
+            converters.append(field.to_representation)
+        names.append(name)
+    return FieldPlan(serializer_class, names, converters)
+
+
+# ============================
+# إسقاط الأعمدة (.only)
+# ============================
+_projections = {}
+
+
+def projected_fields(serializer_class):
+    """
+    أعمدة الموديل التي يقرأها الـ serializer، أو None إن تعذّر معرفتها
+    (SerializerMethodField أو source="*" قد يقرآن أي شيء من الكائن).
+    """
+    if serializer_class in _projections:
+        return _projections[serializer_class]
+    names = None
+    meta = getattr(serializer_class, "Meta", None)
+    if meta is not None and issubclass(serializer_class, serializers.ModelSerializer):
+        concrete = {f.name for f in meta.model._meta.concrete_fields}
+        names = []
+        for field in serializer_class().fields.values():
+            if field.write_only:
+                continue
+            root = field.source.split(".")[0]
+            if isinstance(field, serializers.SerializerMethodField) or root not in concrete:
+                names = None
+                break
+            names.append(root)
+    _projections[serializer_class] = tuple(dict.fromkeys(names)) if names is not None else None
+    return _projections[serializer_class]
+
+
+def project_queryset(queryset, serializer_class, extra=()):
+    """queryset.only() بأعمدة الـ serializer + extra (حقول الترتيب مثلًا)."""
+    names = projected_fields(serializer_class)
+    if names is None:
+        return queryset
+    return queryset.only(*dict.fromkeys([*names, *extra]))
+
+
+def ordering_fields(view):
+    ordering = getattr(view, "cursor_ordering", None) or getattr(view.paginator, "default_cursor_ordering", ())
+    return [name.lstrip("-") for name in ordering]
+
+
+class FastListMixin:
+    """
+    لـ ListAPIView: يستخدم FieldPlan إن توفّرت خطة لـ serializer الـ view،
+    ويطبّق إسقاط الأعمدة على الـ queryset في كل الأحوال.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return project_queryset(queryset, self.get_serializer_class(), extra=ordering_fields(self))
+
+    def list(self, request, *args, **kwargs):
+        plan = get_field_plan(self.get_serializer_class())
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = plan.values(queryset, extra=ordering_fields(self))
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(plan.serialize(page))
+        return Response(plan.serialize(rows))
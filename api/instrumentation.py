@@ -0,0 +1,177 @@
+# api/instrumentation.py
+"""
+قياس كل طلب: اسم المسار، الزمن الكلي، عدد وزمن استعلامات SQL، زمن الـ serializer، زمن الـ renderer.
+
+- يُرسَل كترويسة Server-Timing (تظهر في أدوات المتصفح) وسطر سجل JSON على logger "api.requests".
+- نفس القياسات تغذّي مقاييس Prometheus (metrics.py) إن كان METRICS_ENABLED.
+- كلاهما معطّل: الـ middleware يرفع MiddlewareNotUsed فيخرج من السلسلة تمامًا
+  ولا يُثبَّت أي execute_wrapper — كلفة صفر.
+- SQL: execute_wrapper يُضاف لكل اتصال عند إنشائه (connection_created) ويسجّل في قياسات الطلب
+  الحالي عبر contextvar؛ فيشمل استعلامات الـ views غير المتزامنة الجارية في خيط sync_to_async.
+- serialize: عمل الـ view حول الـ handler (CachedResponseMixin) مطروحًا منه زمن SQL داخله.
+- render: من process_template_response حتى نهاية response.render().
+"""
+import contextlib
+import contextvars
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from .metrics import metrics_enabled, observe_request
+
+logger = logging.getLogger("api.requests")
+
+_current = contextvars.ContextVar("api_request_timings", default=None)
+
+
+class RequestTimings:
+    __slots__ = ("request", "started", "sql_count", "sql", "spans")
+
+    def __init__(self, request):
+        self.request = request
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql = 0.0
+        self.spans = {}
+
+    def add(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def as_dict(self):
+        """الأزمنة بالمللي ثانية."""
+        data = {
+            "total_ms": (time.perf_counter() - self.started) * 1000,
+            "sql_count": self.sql_count,
+            "sql_ms": self.sql * 1000,
+        }
+        for name in ("serialize", "render"):
+            data[f"{name}_ms"] = self.spans.get(name, 0.0) * 1000
+        return {k: round(v, 3) if isinstance(v, float) else v for k, v in data.items()}
+
+
+def route_name(request):
+    match = request.resolver_match
+    return match.view_name if match else "-"
+
+
+def current_view():
+    """اسم مسار الطلب الجاري (للسجلات خارج الـ middleware)، أو "-" خارج الطلبات."""
+    timings = _current.get()
+    return route_name(timings.request) if timings is not None else "-"
+
+
+@contextlib.contextmanager
+def timed(name):
+    """يضيف زمن الكتلة (بدون استعلامات SQL داخلها) إلى span باسم `name` للطلب الحالي."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started, sql_before = time.perf_counter(), timings.sql
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started - (timings.sql - sql_before))
+
+
+# ============================
+# SQL
+# ============================
+def _sql_wrapper(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.sql_count += 1
+        timings.sql += time.perf_counter() - started
+
+
+def install_sql_wrapper(connection, **kwargs):
+    if _sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_sql_wrapper)
+
+
+# ============================
+# Middleware
+# ============================
+def server_timing(data, route):
+    return ", ".join((
+        f'db;dur={data["sql_ms"]};desc="{data["sql_count"]} queries"',
+        f'serialize;dur={data["serialize_ms"]}',
+        f'render;dur={data["render_ms"]}',
+        f'total;dur={data["total_ms"]};desc="{route}"',
+    ))
+
+
+class RequestTimingMiddleware:
+    """ضعه أول MIDDLEWARE ليشمل الزمن الكلي كل الـ middleware الأخرى."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.log = getattr(settings, "REQUEST_TIMING_ENABLED", False)
+        self.metrics = metrics_enabled()
+        if not (self.log or self.metrics):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.send_header = self.log and getattr(settings, "REQUEST_TIMING_HEADER", True)
+        connection_created.connect(install_sql_wrapper, dispatch_uid="api_request_timing_sql")
+        for connection in connections.all(initialized_only=True):
+            install_sql_wrapper(connection)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings(request)
+        token = _current.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = RequestTimings(request)
+        token = _current.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings)
+
+    def process_template_response(self, request, response):
+        timings = _current.get()
+        if timings is not None and not response.is_rendered:
+            started = time.perf_counter()
+            response.add_post_render_callback(lambda r: timings.add("render", time.perf_counter() - started))
+        return response
+
+    def finish(self, request, response, timings):
+        route = route_name(request)
+        data = timings.as_dict()
+        if self.metrics:
+            observe_request(
+                route, request.method, response.status_code,
+                data["total_ms"] / 1000, timings.sql_count, timings.sql,
+            )
+        if not self.log:
+            return response
+        if self.send_header:
+            response["Server-Timing"] = server_timing(data, route)
+        fields = {
+            "route": route, "method": request.method, "path": request.path,
+            "status": response.status_code, **data,
+        }
+        logger.info(json.dumps(fields, ensure_ascii=False), extra={"request_timing": fields})
+        return response
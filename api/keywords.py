@@ -0,0 +1,133 @@
+# api/keywords.py
+"""
+فهرس الكلمات المفتاحية (KeywordTag) لحقول keywords في الكتالوج.
+
+- كل كلمة تُطبَّع بنفس تطبيع البحث (search.normalize_text) فتتطابق "الذكاء الاصطناعي"
+  و"ذكاء اصطناعي".
+- الفلترة: ?keyword=a&keyword=b أو ?keyword=a,b مع ?keyword_mode=all (افتراضي) | any.
+"""
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+
+from .search import normalize_text
+
+KEYWORD_MAX_LENGTH = 120
+KEYWORD_MODELS = ("CourseRecorded", "CourseOnsite", "Book", "Tool", "Article")
+
+
+def normalize_keyword(value):
+    return " ".join(normalize_text(str(value)).split())[:KEYWORD_MAX_LENGTH]
+
+
+def keywords_for(values):
+    """من قيمة حقل keywords (قائمة عادةً) إلى مجموعة كلمات مُطبَّعة."""
+    if isinstance(values, str):
+        values = [values]
+    if not isinstance(values, (list, tuple)):
+        return set()
+    return {kw for kw in map(normalize_keyword, values) if kw}
+
+
+def _tag_model():
+    return apps.get_model("api", "KeywordTag")
+
+
+# ============================
+# المزامنة
+# ============================
+def sync_keywords(instance, using="default"):
+    KeywordTag = _tag_model()
+    ct = ContentType.objects.db_manager(using).get_for_model(type(instance))
+    wanted = keywords_for(instance.keywords)
+    tags = KeywordTag.objects.using(using).filter(content_type=ct, object_id=instance.pk)
+    current = set(tags.values_list("keyword", flat=True))
+    if current - wanted:
+        tags.filter(keyword__in=current - wanted).delete()
+    if wanted - current:
+        KeywordTag.objects.using(using).bulk_create(
+            [KeywordTag(content_type=ct, object_id=instance.pk, keyword=kw) for kw in wanted - current],
+            ignore_conflicts=True,
+        )
+
+
+def sync_keywords_many(model, pks, using="default"):
+    """sync_keywords لدفعة من موديل واحد: حذف وسوم العناصر ثم إدراجها من جديد."""
+    if model.__name__ not in KEYWORD_MODELS:
+        return
+    KeywordTag = _tag_model()
+    ct = ContentType.objects.db_manager(using).get_for_model(model)
+    KeywordTag.objects.using(using).filter(content_type=ct, object_id__in=pks).delete()
+    rows = model.objects.using(using).filter(pk__in=pks).order_by().values_list("pk", "keywords")
+    KeywordTag.objects.using(using).bulk_create(
+        [KeywordTag(content_type=ct, object_id=pk, keyword=kw) for pk, values in rows for kw in keywords_for(values)],
+        ignore_conflicts=True,
+    )
+
+
+def clear_keywords(model, pk, using="default"):
+    ct = ContentType.objects.db_manager(using).get_for_model(model)
+    _tag_model().objects.using(using).filter(content_type=ct, object_id=pk).delete()
+
+
+def rebuild_keyword_index(using="default", batch_size=1000):
+    """يعيد بناء الفهرس بالكامل. يعيد {اسم الموديل: عدد الصفوف}."""
+    KeywordTag = _tag_model()
+    totals = {}
+    for name in KEYWORD_MODELS:
+        model = apps.get_model("api", name)
+        ct = ContentType.objects.db_manager(using).get_for_model(model)
+        KeywordTag.objects.using(using).filter(content_type=ct).delete()
+        batch, total = [], 0
+        rows = model.objects.using(using).order_by().values_list("pk", "keywords").iterator(chunk_size=batch_size)
+        for pk, values in rows:
+            batch.extend(KeywordTag(content_type=ct, object_id=pk, keyword=kw) for kw in keywords_for(values))
+            if len(batch) >= batch_size:
+                KeywordTag.objects.using(using).bulk_create(batch, ignore_conflicts=True)
+                total += len(batch)
+                batch = []
+        if batch:
+            KeywordTag.objects.using(using).bulk_create(batch, ignore_conflicts=True)
+            total += len(batch)
+        totals[name] = total
+    return totals
+
+
+# ============================
+# الاستعلام
+# ============================
+def parse_keyword_params(query_params):
+    """يعيد (قائمة الكلمات المُطبَّعة، match_all)."""
+    raw = []
+    for value in query_params.getlist("keyword"):
+        raw.extend(value.split(","))
+    keywords = list(dict.fromkeys(kw for kw in map(normalize_keyword, raw) if kw))
+    match_all = query_params.get("keyword_mode", "all").lower() not in ("any", "or")
+    return keywords, match_all
+
+
+def _tag_ids(model, using, **lookup):
+    ct = ContentType.objects.db_manager(using).get_for_model(model)
+    return _tag_model().objects.using(using).filter(content_type=ct, **lookup).values("object_id")
+
+
+def filter_by_keywords(qs, keywords, match_all=True):
+    if not keywords:
+        return qs
+    if not match_all:
+        return qs.filter(pk__in=_tag_ids(qs.model, qs.db, keyword__in=keywords))
+    for kw in keywords:
+        qs = qs.filter(pk__in=_tag_ids(qs.model, qs.db, keyword=kw))
+    return qs
+
+
+def apply_keyword_filter(qs, request):
+    keywords, match_all = parse_keyword_params(request.query_params)
+    return filter_by_keywords(qs, keywords, match_all)
+
+
+def keyword_prefix_ids(model, term, using="default"):
+    """معرّفات العناصر التي لها كلمة مفتاحية تبدأ بـ term (نطاق على الفهرس، بدون LIKE)."""
+    term = normalize_keyword(term)
+    if not term:
+        return _tag_model().objects.none().values("object_id")
+    return _tag_ids(model, using, keyword__gte=term, keyword__lt=term + "\U0010ffff")
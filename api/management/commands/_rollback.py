@@ -0,0 +1,20 @@
+# api/management/commands/_rollback.py
+# (البادئة "_" تمنع Django من اعتباره أمرًا)
+from contextlib import contextmanager
+
+from django.db import transaction
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back(using=None):
+    """معاملة يُتراجع عنها دائمًا في النهاية: لبيانات القياس المؤقتة في أوامر bench_*."""
+    try:
+        with transaction.atomic(using=using):
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
@@ -0,0 +1,35 @@
+# api/management/commands/backfill_profiles.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from api.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = "Create the missing UserProfile rows (accounts created before profiles were made at registration)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="Database alias (default: 'default').")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        using, batch_size = options["database"], options["batch_size"]
+        User = get_user_model()
+        missing = (
+            User.objects.using(using)
+            .filter(profile__isnull=True)
+            .order_by("pk")
+            .values_list("pk", "username")
+        )
+        batch, total = [], 0
+        for pk, username in missing.iterator(chunk_size=batch_size):
+            batch.append(UserProfile(user_id=pk, display_name=username))
+            if len(batch) >= batch_size:
+                UserProfile.objects.using(using).bulk_create(batch, ignore_conflicts=True)
+                total += len(batch)
+                batch = []
+        if batch:
+            UserProfile.objects.using(using).bulk_create(batch, ignore_conflicts=True)
+            total += len(batch)
+        self.stdout.write(self.style.SUCCESS(f"Profiles created: {total}"))
@@ -0,0 +1,281 @@
+# api/management/commands/bench_api.py
+import json
+import math
+import platform
+import statistics
+import subprocess
+import time
+import uuid
+from contextlib import ExitStack
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from api import urls as api_urls
+from api.models import Article, Book, CourseOnsite, CourseRecorded, Tool
+
+BENCH_EMAIL_DOMAIN = "bench-api.invalid"
+
+# (مسار القائمة، مسار التفاصيل، الموديل، حقل التفاصيل في URL)
+CATALOG_ROUTES = (
+    ("courses-recorded-list", "courses-recorded-detail", CourseRecorded, "slug"),
+    ("courses-onsite-list", "courses-onsite-detail", CourseOnsite, "slug"),
+    ("books-list", "books-detail", Book, "pk"),
+    ("tools-list", "tools-detail", Tool, "pk"),
+    ("article-list", "article-detail", Article, "slug"),
+)
+# مسارات تجزئة كلمة المرور: أبطأ بعدة رُتب، فعدد طلباتها منفصل (--auth-requests)
+HASHING_ROUTES = ("token_obtain_pair", "register")
+
+
+class Case:
+    """طلب واحد يُكرَّر: prepare() يعيد kwargs للـ Client، و after(response) لتسلسل الحالة."""
+
+    def __init__(self, name, route, method="get", path=None, data=None, headers=None,
+                 expect=200, prepare=None, after=None):
+        self.name, self.route, self.method = name, route, method
+        self.path = path or reverse(route)
+        self.data, self.headers, self.expect = data, headers or {}, expect
+        self.prepare, self.after = prepare, after
+
+    def request(self, client):
+        data = self.prepare() if self.prepare else self.data
+        kwargs = {"content_type": "application/json"} if self.method == "post" else {}
+        response = getattr(client, self.method)(self.path, data, headers=self.headers, **kwargs)
+        if response.status_code != self.expect:
+            raise CommandError(
+                f"{self.name}: {self.method.upper()} {self.path} returned {response.status_code} "
+                f"(expected {self.expect}): {response.content[:300]!r}"
+            )
+        if self.after:
+            self.after(response)
+        return response
+
+
+def percentile(sorted_values, p):
+    """أقرب رتبة (nearest-rank) — كافٍ للمقارنة بين الـ commits."""
+    rank = math.ceil(p / 100 * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every named route in api/urls.py in-process against the current (seeded) database: "
+        "throughput, p50/p95/p99 latency, SQL queries and bytes per response. Optionally writes JSON "
+        "results and fails when latency or query counts regress against a baseline JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Measured requests per case.")
+        parser.add_argument("--auth-requests", type=int, default=10,
+                            help="Measured requests for the password-hashing routes (token, register).")
+        parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests per case first.")
+        parser.add_argument("--query", default="القيادة", help="Search term for the ?q= cases.")
+        parser.add_argument("--only", action="append", default=[],
+                            help="Only cases whose name contains this text (repeatable).")
+        parser.add_argument("--no-cache", action="store_true",
+                            help="Disable the API response cache (API_CACHE_ENABLED=False) for the run.")
+        parser.add_argument("--keep-throttles", action="store_true",
+                            help="Keep the login/registration token buckets (by default they are disabled).")
+        parser.add_argument("--output", help="Write the results as JSON to this path.")
+        parser.add_argument("--baseline", help="Previous JSON results to compare against.")
+        parser.add_argument("--max-regression", type=float, default=0.25,
+                            help="Allowed p50/p95 slowdown vs --baseline as a fraction (default 0.25 = +25%%).")
+
+    def handle(self, *args, **options):
+        overrides = {}
+        if options["no_cache"]:
+            overrides["API_CACHE_ENABLED"] = False
+        if not options["keep_throttles"]:
+            overrides["HASHING_THROTTLE_RATES"] = {}
+
+        self.run_id = uuid.uuid4().hex[:8]
+        self.user, self.password = self.create_user()
+        try:
+            with override_settings(**overrides):
+                cases = self.build_cases(options["query"])
+                if options["only"]:
+                    cases = [c for c in cases if any(part in c.name for part in options["only"])]
+                results = {case.name: self.measure(case, options) for case in cases}
+        finally:
+            self.cleanup()
+
+        self.report(results)
+        payload = {"meta": self.meta(options), "results": results}
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                json.dump(payload, fh, ensure_ascii=False, indent=2)
+            self.stdout.write(f"\nResults written to {options['output']}")
+        if options["baseline"]:
+            self.compare(payload, options["baseline"], options["max_regression"])
+
+    # ============================
+    # التجهيز والتنظيف
+    # ============================
+    def create_user(self):
+        password = uuid.uuid4().hex
+        user = get_user_model().objects.create_user(
+            username=f"bench-api-{self.run_id}",
+            email=f"user-{self.run_id}@{BENCH_EMAIL_DOMAIN}",
+            password=password,
+        )
+        return user, password
+
+    def cleanup(self):
+        users = get_user_model().objects.filter(email__endswith=f"@{BENCH_EMAIL_DOMAIN}")
+        OutstandingToken.objects.filter(user__in=users).delete()
+        users.delete()
+
+    def build_cases(self, query):
+        cases, client = [], Client()
+        for list_route, detail_route, model, lookup in CATALOG_ROUTES:
+            cases += [
+                Case(list_route, list_route),
+                Case(f"{list_route}?q", list_route, data={"q": query}),
+                Case(f"{list_route}?featured", list_route, data={"featured": "1"}),
+            ]
+            value = model.objects.filter(is_published=True).order_by("-pk").values_list(lookup, flat=True).first()
+            if value is None:
+                raise CommandError(
+                    f"No published {model.__name__} rows. Seed the database first "
+                    "(generate_synthetic_content --scale N, or seed_articles / seed_demo_content)."
+                )
+            cases.append(Case(detail_route, detail_route, path=reverse(detail_route, kwargs={lookup: value})))
+        cases.append(Case("search?q", "search", data={"q": query}))
+        cases.append(Case("home", "home"))
+        cases.append(Case("metrics", "metrics"))
+
+        credentials = {"username": self.user.email, "password": self.password}
+        tokens = Case("token_obtain_pair", "token_obtain_pair", "post", data=credentials).request(client).json()
+        auth = {"Authorization": f"Bearer {tokens['access']}"}
+        cases.append(Case("me", "me", headers=auth))
+        cases.append(Case("token_obtain_pair", "token_obtain_pair", "post", data=credentials))
+
+        # التدوير مع القائمة السوداء: كل refresh يُستخدم مرة، فنمرّر الجديد للطلب التالي
+        state = {"refresh": tokens["refresh"]}
+        cases.append(Case(
+            "token_refresh", "token_refresh", "post",
+            prepare=lambda: {"refresh": state["refresh"]},
+            after=lambda response: state.update(refresh=response.json().get("refresh", state["refresh"])),
+        ))
+
+        counter = iter(range(10 ** 9))
+        cases.append(Case(
+            "register", "register", "post", expect=201,
+            prepare=lambda: {
+                "email": f"reg-{self.run_id}-{next(counter)}@{BENCH_EMAIL_DOMAIN}",
+                "password": "bench-api-password",
+            },
+        ))
+
+        named = {p.name for p in api_urls.urlpatterns if getattr(p, "name", None)}
+        missing = named - {case.route for case in cases}
+        if missing:
+            raise CommandError(f"No benchmark case for route(s): {', '.join(sorted(missing))}")
+        return cases
+
+    # ============================
+    # القياس
+    # ============================
+    def measure(self, case, options):
+        client = Client()
+        n = options["auth_requests"] if case.route in HASHING_ROUTES else options["requests"]
+        for _ in range(options["warmup"]):
+            case.request(client)
+
+        # عدّ الاستعلامات في طلب منفصل كي لا يدخل تسجيلها في التوقيت
+        with ExitStack() as stack:
+            captured = [stack.enter_context(CaptureQueriesContext(conn)) for conn in connections.all()]
+            response = case.request(client)
+        queries = sum(len(c.captured_queries) for c in captured)
+
+        timings = []
+        started = time.perf_counter()
+        for _ in range(n):
+            t0 = time.perf_counter()
+            case.request(client)
+            timings.append((time.perf_counter() - t0) * 1000)
+        elapsed = time.perf_counter() - started
+
+        timings.sort()
+        return {
+            "method": case.method.upper(),
+            "path": case.path,
+            "status": response.status_code,
+            "requests": n,
+            "rps": round(n / elapsed, 1),
+            "mean_ms": round(statistics.fmean(timings), 3),
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "p99_ms": round(percentile(timings, 99), 3),
+            "queries": queries,
+            "bytes": len(response.content),
+        }
+
+    # ============================
+    # التقرير والمقارنة
+    # ============================
+    def report(self, results):
+        header = f"{'case':<34}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'bytes':>9}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:<34}{r['rps']:>9.1f}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+                f"{r['queries']:>9}{r['bytes']:>9}"
+            )
+
+    def meta(self, options):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=settings.BASE_DIR,
+            ).stdout.strip() or None
+        except OSError:
+            commit = None
+        return {
+            "timestamp": timezone.now().isoformat(),
+            "commit": commit,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connections["default"].vendor,
+            "api_cache": not options["no_cache"] and getattr(settings, "API_CACHE_ENABLED", True),
+            "async_views": list(getattr(settings, "ASYNC_VIEWS", ())),
+            "rows": {model.__name__: model.objects.count() for _, _, model, _ in CATALOG_ROUTES},
+            "warmup": options["warmup"],
+        }
+
+    def compare(self, payload, baseline_path, max_regression):
+        with open(baseline_path, encoding="utf-8") as fh:
+            previous = json.load(fh)
+        results, baseline = payload["results"], previous["results"]
+
+        self.stdout.write(f"\nCompared with {baseline_path} (allowed slowdown {max_regression:.0%}):")
+        for key in ("api_cache", "async_views", "rows", "database"):
+            if previous["meta"].get(key) != payload["meta"][key]:
+                self.stdout.write(self.style.WARNING(
+                    f"  {key} differs from the baseline: {previous['meta'].get(key)} -> {payload['meta'][key]}"
+                ))
+        failures = []
+        for name, r in results.items():
+            old = baseline.get(name)
+            if old is None:
+                continue
+            for metric in ("p50_ms", "p95_ms"):
+                if old[metric] and r[metric] > old[metric] * (1 + max_regression):
+                    failures.append(f"{name}: {metric} {old[metric]:.2f} -> {r[metric]:.2f}")
+            if r["queries"] > old["queries"]:
+                failures.append(f"{name}: queries {old['queries']} -> {r['queries']}")
+
+        if failures:
+            for line in failures:
+                self.stdout.write(self.style.ERROR(f"  {line}"))
+            raise CommandError(f"{len(failures)} regression(s) against {baseline_path}.")
+        self.stdout.write(self.style.SUCCESS("  No regressions."))
@@ -0,0 +1,84 @@
+# api/management/commands/bench_identifier_lookup.py
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+
+from api.management.commands._rollback import rolled_back
+from api.serializers import users_by_email, users_by_identifier, users_by_username
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the case-insensitive login/registration lookups (iexact vs LOWER() indexes). "
+        "Synthetic users are created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100_000, help="Total users to benchmark against.")
+        parser.add_argument("--repeat", type=int, default=200, help="Lookups per measurement.")
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self.run(options["users"], options["repeat"])
+
+    def run(self, users, repeat):
+        User = get_user_model()
+        missing = users - User.objects.count()
+        if missing > 0:
+            self.stdout.write(f"Creating {missing} synthetic users...")
+            batch = []
+            for i in range(missing):
+                batch.append(User(username=f"Bench.User{i}", email=f"Bench.User{i}@Example.com", password="!"))
+                if len(batch) >= 5000:
+                    User.objects.bulk_create(batch)
+                    batch = []
+            User.objects.bulk_create(batch)
+
+        # عيّنة من الموجودين + معرّفات غير موجودة (أسوأ حالة للمسح الكامل)
+        sample = list(User.objects.order_by("?").values_list("email", "username")[:repeat // 2])
+        idents = [e.upper() for e, _ in sample] + [f"missing{i}@example.com" for i in range(repeat - len(sample))]
+        names = [u.upper() for _, u in sample] + [f"missing{i}" for i in range(repeat - len(sample))]
+
+        cases = [
+            ("login (email or username)",
+             lambda v: User.objects.filter(Q(email__iexact=v) | Q(username__iexact=v)).first(),
+             lambda v: users_by_identifier(User.objects.all(), v).first(), idents),
+            ("register: email exists",
+             lambda v: User.objects.filter(email__iexact=v).exists(),
+             lambda v: users_by_email(User.objects.all(), v).exists(), idents),
+            ("register: username exists",
+             lambda v: User.objects.filter(username__iexact=v).exists(),
+             lambda v: users_by_username(User.objects.all(), v).exists(), names),
+        ]
+        self.stdout.write(f"{User.objects.count()} users, {repeat} lookups per case")
+        self.stdout.write(f"{'lookup':<28}{'iexact ms':>12}{'LOWER() ms':>12}{'speedup':>10}")
+        for label, before, after, values in cases:
+            old = self.measure(before, values)
+            new = self.measure(after, values)
+            self.stdout.write(f"{label:<28}{old * 1000:>12.3f}{new * 1000:>12.3f}{old / new:>9.1f}x")
+
+        self.stdout.write("\nQuery plans:")
+        for label, qs in (
+            ("iexact", User.objects.filter(Q(email__iexact="x") | Q(username__iexact="x"))),
+            ("LOWER()", users_by_identifier(User.objects.all(), "x")),
+        ):
+            sql, params = qs.query.sql_with_params()
+            with connection.cursor() as cursor:
+                plan = self.explain(cursor, sql, params)
+            self.stdout.write(f"  {label}: {plan}")
+
+    def explain(self, cursor, sql, params):
+        if connection.vendor == "sqlite":
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            return " | ".join(row[-1] for row in cursor.fetchall())
+        cursor.execute(f"EXPLAIN {sql}", params)
+        return " | ".join(str(row[0]) for row in cursor.fetchall())
+
+    def measure(self, fn, values):
+        start = time.perf_counter()
+        for value in values:
+            fn(value)
+        return (time.perf_counter() - start) / len(values)
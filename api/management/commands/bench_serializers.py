@@ -0,0 +1,86 @@
+# api/management/commands/bench_serializers.py
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.fastserializers import get_field_plan
+from api.management.commands._rollback import rolled_back
+from api.models import Article, Book, Tool
+from api.serializers import (
+    ArticleListSerializer,
+    BookListSerializer,
+    CourseOnsiteListSerializer,
+    CourseRecordedListSerializer,
+    ToolListSerializer,
+)
+
+LIST_SERIALIZERS = (
+    CourseRecordedListSerializer,
+    CourseOnsiteListSerializer,
+    BookListSerializer,
+    ToolListSerializer,
+    ArticleListSerializer,
+)
+
+
+def _filler(model, i):
+    """صف تجريبي بحقول واقعية الحجم (يُحذف بالتراجع عن المعاملة)."""
+    text = "نص تجريبي للقياس " * 20
+    common = {"keywords": ["قياس", "benchmark", f"k{i % 7}"]}
+    if model is Article:
+        return Article(title=f"bench {i}", slug=f"bench-article-{i}", excerpt=text, content=text * 10,
+                       is_published=True, published_at=timezone.now(), **common)
+    if model is Tool:
+        return Tool(name=f"bench {i}", description=text, **common)
+    if model is Book:
+        return Book(title=f"bench {i}", author_name="bench", description=text, **common)
+    return model(title=f"bench {i}", slug=f"bench-{model.__name__.lower()}-{i}", summary=text,
+                 long_description=text * 10, outline=[{"title": "t", "bullets": ["a", "b"]}], **common)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the list serializers: DRF ModelSerializer vs the values()-based fast path. "
+        "Missing rows are created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50, help="Rows per page (default: 50 = max_page_size).")
+        parser.add_argument("--repeat", type=int, default=200, help="Pages serialized per measurement.")
+
+    def handle(self, *args, **options):
+        rows, repeat = options["rows"], options["repeat"]
+        with rolled_back():
+            self.run(rows, repeat)
+
+    def run(self, rows, repeat):
+        self.stdout.write(f"{'serializer':<32}{'drf ms/page':>14}{'fast ms/page':>14}{'speedup':>10}")
+        for serializer_class in LIST_SERIALIZERS:
+            model = serializer_class.Meta.model
+            missing = rows - model.objects.count()
+            if missing > 0:
+                model.objects.bulk_create([_filler(model, i) for i in range(missing)])
+            qs = model.objects.order_by("-pk")
+            plan = get_field_plan(serializer_class)
+            if plan is None:
+                raise CommandError(f"{serializer_class.__name__} has no fast-path plan.")
+
+            drf_out = serializer_class(list(qs[:rows]), many=True).data
+            fast_out = plan.serialize(plan.values(qs)[:rows])
+            if json.dumps(drf_out, default=str) != json.dumps(fast_out, default=str):
+                raise CommandError(f"{serializer_class.__name__}: fast path output differs from DRF.")
+
+            drf = self.measure(lambda: serializer_class(list(qs[:rows]), many=True).data, repeat)
+            fast = self.measure(lambda: plan.serialize(plan.values(qs)[:rows]), repeat)
+            self.stdout.write(
+                f"{serializer_class.__name__:<32}{drf * 1000:>14.3f}{fast * 1000:>14.3f}{drf / fast:>9.1f}x"
+            )
+
+    def measure(self, fn, repeat):
+        fn()  # تسخين
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - start) / repeat
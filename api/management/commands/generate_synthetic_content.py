@@ -0,0 +1,148 @@
+# api/management/commands/generate_synthetic_content.py
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+from api.models import Article, Book, CourseOnsite, CourseRecorded, Tool
+from api.seeding import refresh_derived, upsert
+
+AR_WORDS = (
+    "القيادة الاستراتيجية التحول الرقمي الابتكار الجودة الحوكمة الفريق المؤسسة التخطيط "
+    "التنفيذ المؤشرات الأداء التعلم التطوير المهارات الإدارة المشاريع العمليات التحسين "
+    "التواصل البيانات التحليل القرار التقنية الذكاء الاصطناعي المستفيد الخدمة التجربة "
+    "الرؤية الأهداف المخاطر الموارد الثقافة التغيير المرونة الاستدامة النمو السوق العميل"
+).split()
+EN_WORDS = (
+    "leadership strategy digital transformation innovation quality governance team planning "
+    "execution metrics performance learning development skills management projects operations "
+    "improvement communication data analysis decision technology python machine learning "
+    "design customer experience vision goals risk culture change agile growth market cloud"
+).split()
+KEYWORDS = (
+    "قيادة", "استراتيجية", "ابتكار", "جودة", "حوكمة", "تحول رقمي", "إدارة مشاريع", "بيانات",
+    "Python", "AI", "Agile", "Design", "Cloud", "Data", "Leadership", "Productivity",
+)
+LEVELS = ("مبتدئ", "متوسط", "متقدم")
+
+
+class Text:
+    """نصوص عشوائية سريعة من مجمّع جمل محسوب مسبقًا (لا توليد لكل كلمة لكل صف)."""
+
+    def __init__(self, rng, pool_size=2000):
+        self.rng = rng
+        self.sentences = [self._sentence() for _ in range(pool_size)]
+
+    def _sentence(self):
+        words = AR_WORDS if self.rng.random() < 0.7 else EN_WORDS
+        return " ".join(self.rng.choices(words, k=self.rng.randint(6, 14))) + "."
+
+    def sentence(self):
+        return self.rng.choice(self.sentences)
+
+    def title(self, i):
+        words = AR_WORDS if i % 3 else EN_WORDS
+        return " ".join(self.rng.choices(words, k=self.rng.randint(3, 6)))
+
+    def paragraph(self, n=4):
+        return " ".join(self.rng.choices(self.sentences, k=n))
+
+    def html(self, sections=4):
+        parts = []
+        for _ in range(sections):
+            parts.append(f"<h2>{self.sentence()}</h2>")
+            parts.append(f"<p>{self.paragraph(5)}</p>")
+            items = "".join(f"<li>{self.sentence()}</li>" for _ in range(3))
+            parts.append(f"<ul>{items}</ul>")
+        return "\n".join(parts)
+
+    def keywords(self):
+        return self.rng.sample(KEYWORDS, k=self.rng.randint(2, 4))
+
+    def outline(self):
+        return [
+            {"title": self.sentence(), "bullets": [self.sentence() for _ in range(self.rng.randint(3, 5))]}
+            for _ in range(self.rng.randint(3, 6))
+        ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate N synthetic articles, recorded courses, onsite courses, books and tools "
+        "(Arabic/English text, keywords, course outlines) for capacity testing. Idempotent: "
+        "rows are keyed by index, so re-running updates them instead of duplicating."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=int, required=True, help="Rows per content type.")
+        parser.add_argument("--start", type=int, default=0, help="First index (to append another range).")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed (same seed = same content).")
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            "--skip-derived", action="store_true",
+            help="Do not refresh the search/keyword indexes and payloads of the written rows.",
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        text = Text(rng)
+        indexes = range(options["start"], options["start"] + options["scale"])
+        now = timezone.now()
+        using, batch_size = options["database"], options["batch_size"]
+
+        builders = (
+            (Article, "slug", lambda i: Article(
+                title=text.title(i), slug=f"synthetic-article-{i}", excerpt=text.paragraph(2),
+                content=text.html(rng.randint(3, 6)), cover_url=f"https://picsum.photos/seed/a{i}/1200/630",
+                is_published=rng.random() < 0.9, published_at=now - timedelta(minutes=i),
+                keywords=text.keywords(),
+            )),
+            (CourseRecorded, "slug", lambda i: self.course(CourseRecorded, "recorded", i, text, rng)),
+            (CourseOnsite, "slug", lambda i: self.course(CourseOnsite, "onsite", i, text, rng)),
+            (Book, "url", lambda i: Book(
+                title=f"{text.title(i)} #{i}", author_name=text.title(i + 1), description=text.paragraph(3),
+                cover_url=f"https://picsum.photos/seed/b{i}/800/600", url=f"https://example.com/books/{i}",
+                is_featured=rng.random() < 0.05, keywords=text.keywords(),
+            )),
+            (Tool, "url", lambda i: Tool(
+                name=f"{text.title(i)} #{i}"[:160], description=text.paragraph(3),
+                image_url=f"https://picsum.photos/seed/t{i}/800/600", url=f"https://example.com/tools/{i}",
+                is_featured=rng.random() < 0.05, keywords=text.keywords(),
+            )),
+        )
+
+        derived_seconds = 0.0
+        for model, match_field, build in builders:
+            started = time.perf_counter()
+            created = updated = 0
+            for start in range(indexes.start, indexes.stop, batch_size):
+                objs = [build(i) for i in range(start, min(start + batch_size, indexes.stop))]
+                c, u = upsert(model, objs, match_field, using=using, batch_size=batch_size)
+                created, updated = created + c, updated + u
+                if not options["skip_derived"]:
+                    # هذه الدفعة فقط، لا كل جداول الفهرس
+                    derived_started = time.perf_counter()
+                    refresh_derived(model, [obj.pk for obj in objs], using=using)
+                    derived_seconds += time.perf_counter() - derived_started
+            self.stdout.write(
+                f"{model.__name__:<16} created: {created:>8}  updated: {updated:>8}  "
+                f"({time.perf_counter() - started:.1f}s)"
+            )
+
+        if not options["skip_derived"]:
+            self.stdout.write(f"Search/keyword indexes and payloads refreshed ({derived_seconds:.1f}s of the above)")
+        self.stdout.write(self.style.SUCCESS("Done."))
+
+    def course(self, model, kind, i, text, rng):
+        return model(
+            title=text.title(i), slug=f"synthetic-{kind}-{i}", summary=text.paragraph(2),
+            long_description=text.html(rng.randint(2, 4)), image_url=f"https://picsum.photos/seed/c{kind}{i}/1200/630",
+            objectives=[text.sentence() for _ in range(rng.randint(3, 6))],
+            target_audience=rng.sample(("طلاب", "محترفون", "مدراء", "رواد أعمال", "Engineers", "Analysts"), k=2),
+            outline=text.outline(), is_featured=rng.random() < 0.05, is_published=rng.random() < 0.95,
+            keywords=text.keywords() + [rng.choice(LEVELS)],
+        )
@@ -0,0 +1,49 @@
+# api/management/commands/prune_token_blacklist.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired outstanding refresh tokens and their blacklist entries in small batches "
+        "(each batch is its own short transaction, so writers are never blocked for long)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="Database alias (default: 'default').")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--sleep", type=float, default=0.0, help="Pause between batches (seconds).")
+        parser.add_argument("--dry-run", action="store_true", help="Only count what would be deleted.")
+
+    def handle(self, *args, **options):
+        using, batch_size = options["database"], options["batch_size"]
+        now = timezone.now()
+        expired = OutstandingToken.objects.using(using).filter(expires_at__lt=now)
+
+        if options["dry_run"]:
+            n = expired.count()
+            b = BlacklistedToken.objects.using(using).filter(token__expires_at__lt=now).count()
+            self.stdout.write(f"Would delete {n} outstanding and {b} blacklisted tokens.")
+            return
+
+        outstanding = blacklisted = 0
+        while True:
+            # أقدم التوكنات أولًا: المنتهية في بداية الجدول فلا يطول المسح
+            ids = list(expired.order_by("pk").values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                break
+            with transaction.atomic(using=using):
+                # الـ cascade يحذف صفوف القائمة السوداء لنفس التوكنات
+                _, counts = OutstandingToken.objects.using(using).filter(pk__in=ids).delete()
+            outstanding += counts.get(OutstandingToken._meta.label, 0)
+            blacklisted += counts.get(BlacklistedToken._meta.label, 0)
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Pruned {outstanding} outstanding and {blacklisted} blacklisted tokens."
+        ))
@@ -0,0 +1,20 @@
+# api/management/commands/rebuild_payloads.py
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from api.payloads import rebuild_payloads
+
+
+class Command(BaseCommand):
+    help = "Regenerate the stored JSON payloads served by the course and article detail endpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="Database alias (default: 'default').")
+        parser.add_argument("--batch-size", type=int, default=200)
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        with transaction.atomic(using=using):
+            totals = rebuild_payloads(using=using, batch_size=options["batch_size"])
+        summary = ", ".join(f"{name}: {n}" for name, n in totals.items())
+        self.stdout.write(self.style.SUCCESS(f"Payloads -> {summary}"))
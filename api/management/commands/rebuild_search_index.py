@@ -0,0 +1,28 @@
+# api/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from api.keywords import rebuild_keyword_index
+from api.search import fts_available, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index (FTS5) and the keyword index from the catalog tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="Database alias (default: 'default').")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        batch_size = options["batch_size"]
+        with transaction.atomic(using=using):
+            if fts_available(using):
+                totals = rebuild_search_index(using=using, batch_size=batch_size)
+                summary = ", ".join(f"{kind}: {n}" for kind, n in totals.items())
+                self.stdout.write(self.style.SUCCESS(f"Full-text -> {summary}"))
+            else:
+                self.stdout.write(self.style.WARNING("Full-text index table is missing (SQLite only); skipped."))
+            totals = rebuild_keyword_index(using=using, batch_size=batch_size)
+            summary = ", ".join(f"{name}: {n}" for name, n in totals.items())
+            self.stdout.write(self.style.SUCCESS(f"Keywords -> {summary}"))
@@ -2,8 +2,10 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from django.utils import timezone
+from django.utils.text import slugify
 from datetime import timedelta
 from api.models import Article
+from api.seeding import refresh_derived, upsert
 
 ARTICLES = [
     {
@@ -158,26 +160,24 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING("Deleting existing Article records..."))
             Article.objects.all().delete()
 
-        created, updated = 0, 0
         now = timezone.now()
-
-        for i, a in enumerate(ARTICLES):
-            # تواريخ متدرجة: اليوم، -2 يوم، -4 يوم... لتبدو واقعية
-            published_at = now - timedelta(days=i * 2)
-
-            obj, is_created = Article.objects.update_or_create(
+        articles = [
+            Article(
                 title=a["title"],
-                defaults={
-                    "excerpt": a.get("excerpt", ""),
-                    "content": a.get("content", ""),
-                    "cover_url": a.get("cover_url", ""),
-                    "is_published": True,
-                    "published_at": published_at,
-                    "keywords": a.get("keywords", []),
-                },
+                # bulk_create لا يستدعي save()، فالـ slug يُحسب هنا بنفس طريقة Article.save
+                slug=slugify(a["title"], allow_unicode=True),
+                excerpt=a.get("excerpt", ""),
+                content=a.get("content", ""),
+                cover_url=a.get("cover_url", ""),
+                is_published=True,
+                # تواريخ متدرجة: اليوم، -2 يوم، -4 يوم... لتبدو واقعية
+                published_at=now - timedelta(days=i * 2),
+                keywords=a.get("keywords", []),
             )
-            created += 1 if is_created else 0
-            updated += 0 if is_created else 1
+            for i, a in enumerate(ARTICLES)
+        ]
+        created, updated = upsert(Article, articles, "slug")
+        refresh_derived(Article, [a.pk for a in articles])
 
         self.stdout.write(
             self.style.SUCCESS(f"Articles -> created: {created}, updated: {updated}")
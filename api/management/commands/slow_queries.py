@@ -0,0 +1,131 @@
+# api/management/commands/slow_queries.py
+import glob
+import gzip
+import json
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.slowqueries import normalize_sql
+
+# سطور خطة SQLite التي تعني غالبًا فهرسًا ناقصًا
+_FULL_SCAN = "SCAN "
+_INDEXED = ("USING", "VIRTUAL TABLE INDEX")  # فهرس عادي/مغطٍّ أو فهرس FTS5
+_TEMP_SORT = "USE TEMP B-TREE"
+
+
+def plan_flags(plan):
+    """"scan" لمسح جدول كامل بلا فهرس، "sort" لفرز مؤقت (ORDER BY/GROUP BY بلا فهرس مناسب)."""
+    flags = []
+    for line in plan or ():
+        upper = line.upper()
+        if upper.startswith(_FULL_SCAN) and not any(m in upper for m in _INDEXED) and "scan" not in flags:
+            flags.append("scan")
+        if _TEMP_SORT in upper and "sort" not in flags:
+            flags.append("sort")
+    return flags
+
+
+class Command(BaseCommand):
+    help = (
+        "Summarize the slow-query log (SLOW_QUERY_LOG_FILE and its logrotate rotations, .gz included) by query fingerprint: "
+        "count, total/mean/max time, originating views and the captured EXPLAIN QUERY PLAN, "
+        "flagging full table scans and temp-B-tree sorts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="*", help="Log files (default: SLOW_QUERY_LOG_FILE and its .N/.N.gz rotations).")
+        parser.add_argument("--limit", type=int, default=20, help="Fingerprints to show (by total time).")
+        parser.add_argument("--view", help="Only queries issued by this URL name.")
+        parser.add_argument("--since", type=float, help="Only entries from the last N hours.")
+        parser.add_argument("--json", action="store_true", help="Print the summary as JSON.")
+
+    def handle(self, *args, **options):
+        paths = options["files"] or self.default_files()
+        if not paths:
+            raise CommandError(f"No slow-query log at {settings.SLOW_QUERY_LOG_FILE}.")
+        since = timezone.now() - timedelta(hours=options["since"]) if options["since"] else None
+
+        groups = defaultdict(lambda: {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "views": Counter()})
+        skipped = 0
+        for entry in self.read(paths):
+            if options["view"] and entry.get("view") != options["view"]:
+                continue
+            try:
+                if since and datetime.fromisoformat(entry["ts"]) < since:
+                    continue
+                group = groups[entry["fingerprint"]]
+                group["count"] += 1
+                group["total_ms"] += entry["duration_ms"]
+                group["max_ms"] = max(group["max_ms"], entry["duration_ms"])
+                group["views"][entry.get("view") or "-"] += 1
+                group["sql"] = normalize_sql(entry["sql"])
+                if entry.get("plan"):
+                    group["plan"] = entry["plan"]
+            except KeyError:
+                skipped += 1
+
+        summary = sorted(
+            (
+                {
+                    "fingerprint": key,
+                    "count": g["count"],
+                    "total_ms": round(g["total_ms"], 3),
+                    "mean_ms": round(g["total_ms"] / g["count"], 3),
+                    "max_ms": round(g["max_ms"], 3),
+                    "views": dict(g["views"].most_common()),
+                    "flags": plan_flags(g.get("plan")),
+                    "sql": g["sql"],
+                    "plan": g.get("plan"),
+                }
+                for key, g in groups.items()
+            ),
+            key=lambda row: row["total_ms"],
+            reverse=True,
+        )[:options["limit"]]
+
+        if options["json"]:
+            self.stdout.write(json.dumps(summary, ensure_ascii=False, indent=2))
+        else:
+            self.report(summary)
+        if skipped:
+            self.stderr.write(f"Skipped {skipped} malformed entries.")
+
+    def default_files(self):
+        path = settings.SLOW_QUERY_LOG_FILE
+        return sorted(glob.glob(f"{glob.escape(path)}.*"), reverse=True) + glob.glob(glob.escape(path))
+
+    def read(self, paths):
+        for path in paths:
+            opener = gzip.open if path.endswith(".gz") else open
+            with opener(path, "rt", encoding="utf-8") as fh:
+                for line in fh:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+    def report(self, summary):
+        if not summary:
+            self.stdout.write("No slow queries logged.")
+            return
+        self.stdout.write(f"{'fingerprint':<14}{'count':>7}{'total ms':>12}{'mean ms':>10}{'max ms':>10}  flags  views")
+        for row in summary:
+            views = ", ".join(f"{name} ({n})" for name, n in row["views"].items())
+            flags = ",".join(row["flags"]) or "-"
+            self.stdout.write(
+                f"{row['fingerprint']:<14}{row['count']:>7}{row['total_ms']:>12.1f}{row['mean_ms']:>10.1f}"
+                f"{row['max_ms']:>10.1f}  {flags:<6} {views}"
+            )
+        self.stdout.write("")
+        for row in summary:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{row['fingerprint']}  ({row['count']}x)"))
+            self.stdout.write(f"  {row['sql'][:500]}")
+            for line in row["plan"] or ["(no plan captured)"]:
+                self.stdout.write(f"    {line}")
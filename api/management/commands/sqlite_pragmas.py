@@ -0,0 +1,39 @@
+# api/management/commands/sqlite_pragmas.py
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api.sqlite import configured_pragmas, effective_pragmas
+
+# قيم PRAGMA التي تعيدها SQLite كأرقام
+_ENUMS = {
+    "synchronous": {0: "OFF", 1: "NORMAL", 2: "FULL", 3: "EXTRA"},
+    "temp_store": {0: "DEFAULT", 1: "FILE", 2: "MEMORY"},
+}
+
+
+class Command(BaseCommand):
+    help = "Report the effective SQLite pragmas of each database alias and flag differences from the settings."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", action="append", help="Alias to check (default: all SQLite aliases).")
+
+    def handle(self, *args, **options):
+        aliases = options["database"] or list(connections)
+        mismatches = 0
+        for alias in aliases:
+            connection = connections[alias]
+            if connection.vendor != "sqlite":
+                continue
+            wanted = configured_pragmas(connection)
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{alias}: {connection.settings_dict['NAME']}"))
+            for name, value in effective_pragmas(connection).items():
+                shown = _ENUMS.get(name, {}).get(value, value)
+                line = f"  {name:<20}{shown}"
+                if name in wanted and str(wanted[name]).lower() not in (str(value).lower(), str(shown).lower()):
+                    mismatches += 1
+                    line = self.style.WARNING(f"{line}  (configured: {wanted[name]})")
+                self.stdout.write(line)
+        if mismatches:
+            self.stdout.write(self.style.WARNING(f"{mismatches} pragma(s) differ from the configuration."))
+        else:
+            self.stdout.write(self.style.SUCCESS("All configured pragmas are in effect."))
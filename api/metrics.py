@@ -0,0 +1,319 @@
+# api/metrics.py
+"""
+مقاييس Prometheus مجمّعة عبر عمّال gunicorn: /api/metrics
+
+- كل عملية تجمع في الذاكرة (عدّادات + هستوغرامات) وتكتب لقطة كاملة في ملفها الخاص داخل
+  METRICS_DIR كل METRICS_FLUSH_INTERVAL ثانية على الأكثر (كتابة ذرّية: ملف مؤقت فريد ثم os.replace،
+  وفحص الموعد والكتابة تحت قفل واحد فلا يتسابق خيطان على الملف).
+- /api/metrics يقرأ ملفات كل العمليات ويجمعها (والعملية الحالية تكتب لقطتها أولًا).
+  لقطات العمليات المنتهية (pid لم يعد حيًّا) تُدمج في archive.json ثم تُحذف، فلا تنقص العدّادات
+  ولا تتراكم الملفات مع max_requests. لذلك METRICS_DIR لمضيف/حاوية واحدة.
+- الوصول: Authorization: Bearer METRICS_TOKEN؛ وبدونه فقط من METRICS_ALLOWED_IPS (loopback)
+  بطلب مباشر بلا X-Forwarded-For (لا عبر الـ proxy العام).
+- المقاييس:
+  * api_requests_total{route,method,status}
+  * api_request_duration_seconds{route} (هستوغرام)
+  * api_db_queries{route} (هستوغرام لعدد الاستعلامات) و api_db_duration_seconds_total{route}
+  * api_cache_requests_total{cache,result} و api_cache_hit_ratio{cache}
+- تُسجَّل من RequestTimingMiddleware (instrumentation.py) ومن cache.py؛ METRICS_ENABLED=False يوقفها.
+- تجربة محلية: curl -s http://127.0.0.1:8000/api/metrics
+"""
+import atexit
+import contextlib
+import glob
+import hmac
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_safe
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+# الاسم -> (النوع، الوصف، حدود الهستوغرام)
+METRICS = {
+    "api_requests_total": ("counter", "Requests by URL name, method and status.", None),
+    "api_request_duration_seconds": ("histogram", "Request latency by URL name.", LATENCY_BUCKETS),
+    "api_db_queries": ("histogram", "SQL queries per request by URL name.", QUERY_BUCKETS),
+    "api_db_duration_seconds_total": ("counter", "Time spent in SQL by URL name.", None),
+    "api_cache_requests_total": ("counter", "Cache lookups by cache and result (hit/miss).", None),
+}
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+ARCHIVE_NAME = "archive.json"
+
+try:
+    import fcntl
+except ImportError:  # Windows (تطوير محلي): بلا دمج لقطات العمليات المنتهية
+    fcntl = None
+
+
+def metrics_enabled():
+    return getattr(settings, "METRICS_ENABLED", True)
+
+
+# ============================
+# المخزن (لكل عملية)
+# ============================
+class MetricsStore:
+    def __init__(self, directory, flush_interval):
+        self.pid = os.getpid()
+        self.directory = directory
+        self.path = os.path.join(directory, f"{self.pid}-{uuid.uuid4().hex[:8]}.json")
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()        # البيانات
+        self.flush_lock = threading.Lock()  # الكتابة على القرص (موعدها وتنفيذها)
+        self.counters = defaultdict(float)  # (name, labels) -> value
+        self.histograms = {}                # (name, labels) -> [عدّ كل حد...، +Inf، sum]
+        self.flushed_at = 0.0
+        self.dirty = False
+
+    def inc(self, name, labels, value=1):
+        with self.lock:
+            self.counters[(name, labels)] += value
+            self.dirty = True
+        self.maybe_flush()
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        with self.lock:
+            counts = self.histograms.get((name, labels))
+            if counts is None:
+                counts = self.histograms[(name, labels)] = [0] * (len(buckets) + 1) + [0.0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[len(buckets)] += 1
+            counts[-1] += value
+            self.dirty = True
+
+    def snapshot(self, clean=False):
+        with self.lock:
+            if clean:
+                self.dirty = False
+            return {
+                "counters": [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                "histograms": [[name, list(labels), list(counts)] for (name, labels), counts in self.histograms.items()],
+            }
+
+    def due(self):
+        return self.dirty and time.monotonic() - self.flushed_at >= self.flush_interval
+
+    def maybe_flush(self):
+        if not self.due():  # بلا قفل: الحالة الشائعة
+            return
+        with self.flush_lock:
+            if self.due():  # خيط آخر ربما كتب للتو
+                self._write()
+
+    def close(self):
+        """عند خروج العملية: ما لم يُكتب بعد."""
+        if self.dirty:
+            self.flush()
+
+    def flush(self):
+        with self.flush_lock:
+            self._write()
+
+    def _write(self):
+        self.flushed_at = time.monotonic()
+        write_snapshot(self.path, self.snapshot(clean=True))
+
+
+def write_snapshot(path, data):
+    """كتابة ذرّية عبر ملف مؤقت باسم فريد في نفس المجلد (لا يلتقطه glob *.json)."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, ensure_ascii=False)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp)
+        raise
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """مخزن العملية الحالية (جديد بعد fork، فلا يتشارك عاملان ملفًا واحدًا)."""
+    global _store
+    directory = getattr(settings, "METRICS_DIR", "/tmp/epicblog_api_metrics")
+    if _store is None or _store.pid != os.getpid() or _store.directory != directory:
+        with _store_lock:
+            if _store is None or _store.pid != os.getpid() or _store.directory != directory:
+                _store = MetricsStore(directory, getattr(settings, "METRICS_FLUSH_INTERVAL", 1.0))
+                atexit.register(_store.close)
+    return _store
+
+
+# ============================
+# التسجيل
+# ============================
+def observe_request(route, method, status, seconds, sql_count, sql_seconds):
+    store = get_store()
+    store.observe("api_request_duration_seconds", (("route", route),), seconds)
+    store.observe("api_db_queries", (("route", route),), sql_count)
+    store.inc("api_db_duration_seconds_total", (("route", route),), sql_seconds)
+    store.inc("api_requests_total", (("route", route), ("method", method), ("status", str(status))))
+
+
+def record_cache(cache, hit):
+    if metrics_enabled():
+        get_store().inc("api_cache_requests_total", (("cache", cache), ("result", "hit" if hit else "miss")))
+
+
+# ============================
+# التجميع والعرض
+# ============================
+def _snapshot_pid(path):
+    try:
+        return int(os.path.basename(path).split("-", 1)[0])
+    except ValueError:
+        return None  # archive.json
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def retire_dead_snapshots(directory):
+    """يدمج لقطات العمليات المنتهية في archive.json ويحذفها. يعيد عدد اللقطات المدموجة."""
+    if fcntl is None or not os.path.isdir(directory):
+        return 0
+    with open(os.path.join(directory, ".retire.lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)  # قارئان متزامنان لا يدمجان اللقطة نفسها مرتين
+        dead = [
+            path for path in glob.glob(os.path.join(directory, "*.json"))
+            if (pid := _snapshot_pid(path)) is not None and not _pid_alive(pid)
+        ]
+        if not dead:
+            return 0
+        archive = os.path.join(directory, ARCHIVE_NAME)
+        counters, histograms, _ = _merge([archive, *dead])
+        write_snapshot(archive, {
+            "counters": [[name, list(labels), value] for (name, labels), value in counters.items()],
+            "histograms": [[name, list(labels), counts] for (name, labels), counts in histograms.items()],
+        })
+        for path in dead:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+        return len(dead)
+
+
+def collect(directory):
+    """يجمع لقطات كل العمليات: (counters, histograms, عدد العمليات)."""
+    return _merge(glob.glob(os.path.join(directory, "*.json")))
+
+
+def _merge(paths):
+    counters, histograms, processes = defaultdict(float), {}, 0
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        if _snapshot_pid(path) is not None:
+            processes += 1
+        for name, labels, value in data["counters"]:
+            counters[(name, tuple(map(tuple, labels)))] += value
+        for name, labels, counts in data["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            if key in histograms:
+                histograms[key] = [a + b for a, b in zip(histograms[key], counts)]
+            else:
+                histograms[key] = counts
+    return counters, histograms, processes
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def render_metrics(counters, histograms, processes):
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        if kind == "counter":
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+            continue
+        for (metric, labels), counts in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(counts[-1])}")
+            lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+
+    lines += ["# HELP api_cache_hit_ratio Cache hits / lookups.", "# TYPE api_cache_hit_ratio gauge"]
+    lookups = defaultdict(lambda: [0.0, 0.0])  # cache -> [miss, hit]
+    for (metric, labels), value in counters.items():
+        if metric == "api_cache_requests_total":
+            labels = dict(labels)
+            lookups[labels["cache"]][labels["result"] == "hit"] += value
+    for cache, (misses, hits) in sorted(lookups.items()):
+        lines.append(f"api_cache_hit_ratio{_labels((('cache', cache),))} {hits / (hits + misses):.6f}")
+
+    lines += [
+        "# HELP api_metrics_processes Worker processes with a metrics snapshot.",
+        "# TYPE api_metrics_processes gauge",
+        f"api_metrics_processes {processes}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def metrics_allowed(request):
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token:
+        # مقارنة بزمن ثابت (bytes: compare_digest يرفض نصوص str غير ASCII)
+        supplied = request.headers.get("Authorization", "").encode()
+        return hmac.compare_digest(supplied, f"Bearer {token}".encode())
+    proxied = "X-Forwarded-For" in request.headers or "Forwarded" in request.headers
+    allowed = getattr(settings, "METRICS_ALLOWED_IPS", ("127.0.0.1", "::1"))
+    return not proxied and request.META.get("REMOTE_ADDR") in allowed
+
+
+@require_safe
+def metrics_view(request):
+    """GET /api/metrics — نص Prometheus (انظر "الوصول" أعلاه)."""
+    if not metrics_allowed(request):
+        return HttpResponseForbidden("Forbidden", content_type=CONTENT_TYPE)
+    if metrics_enabled():
+        get_store().flush()
+    directory = getattr(settings, "METRICS_DIR", "/tmp/epicblog_api_metrics")
+    retire_dead_snapshots(directory)
+    return HttpResponse(render_metrics(*collect(directory)), content_type=CONTENT_TYPE)
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_remove_courseonsiterequest_course_and_more'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='book',
+            old_name='buy_url',
+            new_name='url',
+        ),
+        migrations.RenameField(
+            model_name='tool',
+            old_name='link_url',
+            new_name='url',
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='url',
+            field=models.URLField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='courseonsite',
+            name='url',
+            field=models.URLField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='courserecorded',
+            name='url',
+            field=models.URLField(blank=True),
+        ),
+    ]
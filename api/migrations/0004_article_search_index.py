@@ -0,0 +1,78 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:10
+
+import html
+import re
+import unicodedata
+
+from django.db import migrations
+from django.utils.html import strip_tags
+
+FTS_TABLE = "api_article_fts"
+
+# ============================
+# نسخة مجمّدة من تطبيع api/search.py وقت كتابة الترحيل — لا تستورد الكود الحي هنا،
+# فتغييره لاحقًا يغيّر ما ينتجه هذا الترحيل التاريخي بصمت.
+# ============================
+_ARABIC_MARKS_RE = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]")
+_ARABIC_CHAR_MAP = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ؤ": "و", "ئ": "ي",
+    "ى": "ي",
+    "ة": "ه",
+})
+_ARABIC_ARTICLE_RE = re.compile(r"\b(?:[وفبك]?ال|لل)(?=\w\w)")
+
+
+def normalize_text(text):
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", str(text))
+    text = _ARABIC_MARKS_RE.sub("", text).translate(_ARABIC_CHAR_MAP)
+    return _ARABIC_ARTICLE_RE.sub("", text).casefold()
+
+
+def html_to_text(value):
+    return html.unescape(strip_tags(value or ""))
+
+
+def article_index_row(pk, title, excerpt, content):
+    return (pk, normalize_text(title), normalize_text(excerpt), normalize_text(html_to_text(content)))
+
+
+def create_index(apps, schema_editor):
+    # FTS5 خاص بـ SQLite؛ على غيره يبقى البحث على icontains
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+        "USING fts5(title, excerpt, content, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    Article = apps.get_model("api", "Article")
+    db_alias = schema_editor.connection.alias
+    rows = [
+        article_index_row(*row)
+        for row in Article.objects.using(db_alias).values_list("pk", "title", "excerpt", "content")
+    ]
+    if rows:
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, excerpt, content) VALUES (%s, %s, %s, %s)",
+                rows,
+            )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_catalog_url_fields'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
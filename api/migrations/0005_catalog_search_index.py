@@ -0,0 +1,123 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:40
+
+import html
+import re
+import unicodedata
+
+from django.db import migrations
+from django.utils.html import strip_tags
+
+ARTICLE_FTS_TABLE = "api_article_fts"
+SEARCH_FTS_TABLE = "api_search_fts"
+KIND_SLOTS = 8
+
+# ============================
+# نسخة مجمّدة من api/search.py وقت كتابة الترحيل — لا تستورد الكود الحي هنا،
+# فتغييره لاحقًا يغيّر ما ينتجه هذا الترحيل التاريخي بصمت.
+# ============================
+# النوع -> (رمز rowid، اسم الموديل، حقل العنوان، حقل الملخص، حقل المتن)
+SEARCH_KINDS = {
+    "course_recorded": (1, "CourseRecorded", "title", "summary", "long_description"),
+    "course_onsite": (2, "CourseOnsite", "title", "summary", "long_description"),
+    "book": (3, "Book", "title", "author_name", "description"),
+    "tool": (4, "Tool", "name", None, "description"),
+    "article": (5, "Article", "title", "excerpt", "content"),
+}
+INSERT_SQL = (
+    f"INSERT INTO {SEARCH_FTS_TABLE} (rowid, kind, published, title, summary, body) "
+    "VALUES (%s, %s, %s, %s, %s, %s)"
+)
+BATCH_SIZE = 500
+
+_ARABIC_MARKS_RE = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]")
+_ARABIC_CHAR_MAP = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ؤ": "و", "ئ": "ي",
+    "ى": "ي",
+    "ة": "ه",
+})
+_ARABIC_ARTICLE_RE = re.compile(r"\b(?:[وفبك]?ال|لل)(?=\w\w)")
+
+
+def normalize_text(text):
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", str(text))
+    text = _ARABIC_MARKS_RE.sub("", text).translate(_ARABIC_CHAR_MAP)
+    return _ARABIC_ARTICLE_RE.sub("", text).casefold()
+
+
+def html_to_text(value):
+    return html.unescape(strip_tags(value or ""))
+
+
+def index_fields(kind):
+    _, _, title, summary, body = SEARCH_KINDS[kind]
+    return ["pk", "is_published", title, summary or title, body]
+
+
+def index_row(kind, pk, is_published, title, summary, body):
+    if SEARCH_KINDS[kind][3] is None:
+        summary = ""
+    return (
+        pk * KIND_SLOTS + SEARCH_KINDS[kind][0],
+        kind,
+        1 if is_published else 0,
+        normalize_text(title),
+        normalize_text(summary),
+        normalize_text(html_to_text(body)),
+    )
+
+
+def populate(apps, cursor, using):
+    for kind, spec in SEARCH_KINDS.items():
+        rows = (
+            apps.get_model("api", spec[1]).objects.using(using)
+            .order_by()
+            .values_list(*index_fields(kind))
+            .iterator(chunk_size=BATCH_SIZE)
+        )
+        batch = []
+        for row in rows:
+            batch.append(index_row(kind, *row))
+            if len(batch) >= BATCH_SIZE:
+                cursor.executemany(INSERT_SQL, batch)
+                batch = []
+        if batch:
+            cursor.executemany(INSERT_SQL, batch)
+
+
+def create_index(apps, schema_editor):
+    # فهرس موحّد للكتالوج يحلّ محل فهرس المقالات وحده
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_FTS_TABLE} "
+        "USING fts5(kind UNINDEXED, published UNINDEXED, title, summary, body, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_FTS_TABLE}")
+        populate(apps, cursor, schema_editor.connection.alias)
+    schema_editor.execute(f"DROP TABLE IF EXISTS {ARTICLE_FTS_TABLE}")
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_FTS_TABLE}")
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {ARTICLE_FTS_TABLE} "
+        "USING fts5(title, excerpt, content, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_article_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:03
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+KEYWORD_MODELS = ("CourseRecorded", "CourseOnsite", "Book", "Tool", "Article")
+KEYWORD_MAX_LENGTH = 120
+
+# ============================
+# نسخة مجمّدة من api/keywords.py (وتطبيع api/search.py) وقت كتابة الترحيل — لا تستورد
+# الكود الحي هنا، فتغييره لاحقًا يغيّر ما ينتجه هذا الترحيل التاريخي بصمت.
+# ============================
+_ARABIC_MARKS_RE = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]")
+_ARABIC_CHAR_MAP = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ؤ": "و", "ئ": "ي",
+    "ى": "ي",
+    "ة": "ه",
+})
+_ARABIC_ARTICLE_RE = re.compile(r"\b(?:[وفبك]?ال|لل)(?=\w\w)")
+
+
+def normalize_text(text):
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", str(text))
+    text = _ARABIC_MARKS_RE.sub("", text).translate(_ARABIC_CHAR_MAP)
+    return _ARABIC_ARTICLE_RE.sub("", text).casefold()
+
+
+def normalize_keyword(value):
+    return " ".join(normalize_text(str(value)).split())[:KEYWORD_MAX_LENGTH]
+
+
+def keywords_for(values):
+    if isinstance(values, str):
+        values = [values]
+    if not isinstance(values, (list, tuple)):
+        return set()
+    return {kw for kw in map(normalize_keyword, values) if kw}
+
+
+def populate_tags(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    KeywordTag = apps.get_model("api", "KeywordTag")
+    for name in KEYWORD_MODELS:
+        rows = apps.get_model("api", name).objects.using(db_alias).values_list("pk", "keywords")
+        if not rows.exists():
+            continue
+        ct, _ = ContentType.objects.using(db_alias).get_or_create(app_label="api", model=name.lower())
+        KeywordTag.objects.using(db_alias).bulk_create(
+            [
+                KeywordTag(content_type=ct, object_id=pk, keyword=kw)
+                for pk, values in rows
+                for kw in keywords_for(values)
+            ],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_catalog_search_index'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KeywordTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('keyword', models.CharField(max_length=120)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['content_type', 'keyword', 'object_id'], name='api_keyword_content_881978_idx')],
+                'constraints': [models.UniqueConstraint(fields=('content_type', 'object_id', 'keyword'), name='uniq_keyword_tag')],
+            },
+        ),
+        migrations.RunPython(populate_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_keyword_tag'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['published_at', 'created_at'], name='article_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['created_at'], name='book_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='courseonsite',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['created_at'], name='courseonsite_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='courserecorded',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['created_at'], name='courserecorded_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tool',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['created_at'], name='tool_keyset_idx'),
+        ),
+    ]
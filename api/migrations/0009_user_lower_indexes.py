@@ -0,0 +1,37 @@
+# فهارس تعبيرية LOWER(email) / LOWER(username) على جدول المستخدمين
+# (دخول/تسجيل بدون حساسية لحالة الأحرف يستخدم الفهرس بدل مسح الجدول).
+# بعد آخر ترحيل لـ auth: ترحيلاته تعيد بناء جدول المستخدمين في SQLite فتسقط الفهارس لو سبقتها.
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+USER_LOWER_INDEXES = (
+    models.Index(Lower("email"), name="user_email_lower_idx"),
+    models.Index(Lower("username"), name="user_username_lower_idx"),
+)
+
+
+def add_indexes(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    for index in USER_LOWER_INDEXES:
+        schema_editor.add_index(User, index)
+
+
+def remove_indexes(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    for index in USER_LOWER_INDEXES:
+        schema_editor.remove_index(User, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_rendered_payload'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_indexes, remove_indexes),
+    ]
@@ -0,0 +1,26 @@
+# فهرس على token_blacklist_blacklistedtoken.blacklisted_at: التحديث التزايدي لفلتر القائمة السوداء
+# (api/blacklist.py) يعيد قراءة نافذة زمنية حديثة بجانب id > آخر id، فتبقى قراءةً بالفهرس لا مسحًا.
+
+from django.db import migrations, models
+
+BLACKLISTED_AT_INDEX = models.Index(fields=["blacklisted_at"], name="blacklisted_at_idx")
+
+
+def add_index(apps, schema_editor):
+    schema_editor.add_index(apps.get_model("token_blacklist", "BlacklistedToken"), BLACKLISTED_AT_INDEX)
+
+
+def remove_index(apps, schema_editor):
+    schema_editor.remove_index(apps.get_model("token_blacklist", "BlacklistedToken"), BLACKLISTED_AT_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_user_lower_indexes'),
+        ('token_blacklist', '0012_alter_outstandingtoken_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_index, remove_index),
+    ]
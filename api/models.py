@@ -52,6 +52,12 @@ class Article(TimeStampedModel):
         indexes = [
             models.Index(fields=["slug"]),
             models.Index(fields=["is_published", "published_at"]),
+            # keyset (?cursor=): Django يكتب is_published=True كعمود مجرّد، فالفهرس الجزئي هو ما يُستخدم
+            models.Index(
+                fields=["published_at", "created_at"],
+                condition=models.Q(is_published=True),
+                name="article_keyset_idx",
+            ),
         ]
 
     def save(self, *args, **kwargs):
@@ -92,7 +98,13 @@ class _CourseBase(TimeStampedModel):
     url = models.URLField(blank=True)   
     class Meta:
         abstract = True
-        indexes = [models.Index(fields=["slug"]), models.Index(fields=["is_published"])]
+        indexes = [
+            models.Index(fields=["slug"]),
+            models.Index(fields=["is_published"]),
+            models.Index(  # keyset: ?cursor=
+                fields=["created_at"], condition=models.Q(is_published=True), name="%(class)s_keyset_idx",
+            ),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -131,7 +143,13 @@ class Book(TimeStampedModel):
     keywords = models.JSONField(default=list, blank=True)
 
     class Meta:
-        indexes = [models.Index(fields=["title"]), models.Index(fields=["is_published"])]
+        indexes = [
+            models.Index(fields=["title"]),
+            models.Index(fields=["is_published"]),
+            models.Index(  # keyset: ?cursor=
+                fields=["created_at"], condition=models.Q(is_published=True), name="book_keyset_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -150,7 +168,60 @@ class Tool(TimeStampedModel):
     keywords = models.JSONField(default=list, blank=True)
 
     class Meta:
-        indexes = [models.Index(fields=["name"]), models.Index(fields=["is_published"]), models.Index(fields=["is_featured"])]
+        indexes = [
+            models.Index(fields=["name"]),
+            models.Index(fields=["is_published"]),
+            models.Index(fields=["is_featured"]),
+            models.Index(  # keyset: ?cursor=
+                fields=["created_at"], condition=models.Q(is_published=True), name="tool_keyset_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
+
+
+# ========= فهرس الكلمات المفتاحية =========
+# ==============================
+class KeywordTag(models.Model):
+    """
+    صف لكل (عنصر، كلمة مفتاحية مُطبَّعة) من حقول keywords في الكتالوج.
+    يُزامَن بالإشارات (signals.py)؛ يسمح بفلترة ?keyword= عبر الفهرس بدل فك JSON لكل صف.
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    content_object = GenericForeignKey("content_type", "object_id")
+    keyword = models.CharField(max_length=120)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["content_type", "object_id", "keyword"], name="uniq_keyword_tag"),
+        ]
+        indexes = [models.Index(fields=["content_type", "keyword", "object_id"])]
+
+    def __str__(self):
+        return self.keyword
+
+
+# ========= حمولات التفاصيل الجاهزة =========
+# ==============================
+class RenderedPayload(models.Model):
+    """
+    JSON جاهز (bytes) لصفحة تفاصيل عنصر، يُولَّد عند الحفظ أو بالأمر rebuild_payloads.
+    صالح فقط إن طابق source_updated_at قيمة updated_at للعنصر و version نسخة الـ serializer.
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    content_object = GenericForeignKey("content_type", "object_id")
+    payload = models.BinaryField()
+    source_updated_at = models.DateTimeField()
+    version = models.CharField(max_length=32)
+    rendered_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["content_type", "object_id"], name="uniq_rendered_payload"),
+        ]
+
+    def __str__(self):
+        return f"{self.content_type_id}:{self.object_id}"
@@ -0,0 +1,176 @@
+# api/pagination.py
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+# =========================
+# Pagination موحّد
+# =========================
+class StandardResultsSetPagination(PageNumberPagination):
+    """
+    وضعان:
+    - رقم الصفحة (الافتراضي): ?page=N — كما كان (count + OFFSET).
+    - المؤشر (اختياري): ?cursor= (فارغ لأول صفحة) ثم اتبع `next`.
+      keyset على ترتيب الـ view (`cursor_ordering`) بدون COUNT وبدون OFFSET،
+      فكلفة الصفحة ثابتة مهما تعمّق العميل. الاتجاه للأمام فقط (previous دائمًا null).
+      الـ view الذي يغيّر ترتيبه ببعض المعاملات (ترتيب الصلة مع ?q=) يذكرها في
+      `cursor_disallowed_params`، فيُرفض المؤشر معها بـ 400 بدل صفحات بترتيب غير المطلوب.
+    """
+    page_size = 12                      # الافتراضي
+    page_size_query_param = "page_size" # ?page_size=...
+    max_page_size = 50
+
+    cursor_query_param = "cursor"
+    default_cursor_ordering = ("-created_at", "-id")
+    invalid_cursor_message = "Invalid cursor"
+    cursor_disallowed_message = "Cursor pagination is not available with ?{param}=; use ?page= instead."
+
+    cursor_mode = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = (
+            self.cursor_query_param in request.query_params and hasattr(queryset, "model")
+        )
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view=view)
+        return self.paginate_cursor(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ("next", self.next_cursor_link),
+            ("previous", None),
+            ("results", data),
+        ]))
+
+    # ---------- async ----------
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """نفس paginate_queryset لكن بـ acount() والتكرار غير المتزامن (للـ views غير المتزامنة)."""
+        self.cursor_mode = (
+            self.cursor_query_param in request.query_params and hasattr(queryset, "model")
+        )
+        if self.cursor_mode:
+            queryset, page_size, ordering = self.cursor_queryset(queryset, request, view)
+            rows = [row async for row in queryset[:page_size + 1]]
+            return self.cursor_page(rows, page_size, ordering, request)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        self.request = request
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()  # يملأ cached_property فلا يعدّ Paginator مرة أخرى
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        self.page.object_list = [row async for row in self.page.object_list]
+        return list(self.page)
+
+    # ---------- keyset ----------
+    def paginate_cursor(self, queryset, request, view):
+        queryset, page_size, ordering = self.cursor_queryset(queryset, request, view)
+        return self.cursor_page(list(queryset[:page_size + 1]), page_size, ordering, request)
+
+    def cursor_queryset(self, queryset, request, view):
+        """(queryset مرتّب ومقيّد بما بعد المؤشر، حجم الصفحة، الترتيب) — بدون أي استعلام."""
+        self.request = request
+        for param in getattr(view, "cursor_disallowed_params", ()):
+            if request.query_params.get(param):
+                raise ValidationError({self.cursor_query_param: [self.cursor_disallowed_message.format(param=param)]})
+        page_size = self.get_page_size(request) or self.page_size
+        ordering = tuple(getattr(view, "cursor_ordering", None) or self.default_cursor_ordering)
+
+        queryset = queryset.order_by(*ordering)
+        position = self.decode_cursor(request.query_params.get(self.cursor_query_param), queryset.model, ordering)
+        if position is not None:
+            queryset = queryset.filter(keyset_after(ordering, position, queryset.model))
+        return queryset, page_size, ordering
+
+    def cursor_page(self, rows, page_size, ordering, request):
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        self.next_cursor_link = None
+        if has_next:
+            last = rows[-1]
+            values = [_row_value(last, name.lstrip("-")) for name in ordering]
+            url = request.build_absolute_uri()
+            self.next_cursor_link = replace_query_param(url, self.cursor_query_param, self.encode_cursor(values))
+        return rows
+
+    def encode_cursor(self, values):
+        raw = json.dumps([v.isoformat() if hasattr(v, "isoformat") else v for v in values])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, token, model, ordering):
+        if not token:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            values = json.loads(raw)
+            if not isinstance(values, list) or len(values) != len(ordering):
+                raise ValueError
+            return [
+                None if v is None else _field(model, name.lstrip("-")).to_python(v)
+                for name, v in zip(ordering, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+
+def _field(model, name):
+    return model._meta.pk if name == "pk" else model._meta.get_field(name)
+
+
+def _row_value(row, name):
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+def keyset_after(ordering, values, model):
+    """
+    شرط "بعد هذا الموضع" لترتيب متعدد الحقول (قيم NULL حسب SQLite: أولًا تصاعديًا، أخيرًا تنازليًا):
+    after_0 | (eq_0 & after_1) | (eq_0 & eq_1 & after_2) ...
+    مع حارس (<= / >=) على الحقل الأول غير الفارغ ليتمكن الفهرس من البحث بدل المسح.
+    """
+    clauses = []
+    prefix = Q()
+    for name, value in zip(ordering, values):
+        desc = name.startswith("-")
+        name = name.lstrip("-")
+        if value is None:
+            # تنازليًا لا شيء بعد NULL على هذا الحقل؛ تصاعديًا كل القيم غير الفارغة بعده
+            if not desc:
+                clauses.append(prefix & Q(**{f"{name}__isnull": False}))
+            equal = Q(**{f"{name}__isnull": True})
+        else:
+            after = Q(**{f"{name}__{'lt' if desc else 'gt'}": value})
+            if desc and _field(model, name).null:
+                after |= Q(**{f"{name}__isnull": True})
+            equal = Q(**{name: value})
+            clauses.append(prefix & after)
+        prefix &= equal
+
+    if not clauses:
+        return Q(pk__in=[])
+    condition = Q()
+    for clause in clauses:
+        condition |= clause
+
+    first, first_value = ordering[0], values[0]
+    if first_value is not None:
+        name = first.lstrip("-")
+        guard = Q(**{f"{name}__{'lte' if first.startswith('-') else 'gte'}": first_value})
+        if first.startswith("-") and _field(model, name).null:
+            guard |= Q(**{f"{name}__isnull": True})
+        condition &= guard
+    return condition
@@ -0,0 +1,177 @@
+# api/payloads.py
+"""
+حمولات JSON جاهزة لصفحات التفاصيل الثقيلة (الكورسات والمقالات).
+
+- تُولَّد بنفس الـ Detail serializer ونفس JSONRenderer، فالبايتات مطابقة للتسلسل الحي.
+- تُحدَّث عند الحفظ (signals.py) أو بالأمر `rebuild_payloads`.
+- الـ view يقرأ updated_at والحمولة في استعلام واحد؛ إن كانت قديمة/مفقودة يعود للـ serializer.
+"""
+import hashlib
+from itertools import islice
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import OuterRef, Subquery
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+from rest_framework.response import Response
+
+from .models import Article, CourseOnsite, CourseRecorded, RenderedPayload
+from .serializers import (
+    ArticleDetailSerializer,
+    CourseOnsiteDetailSerializer,
+    CourseRecordedDetailSerializer,
+)
+
+PAYLOAD_SERIALIZERS = {
+    CourseRecorded: CourseRecordedDetailSerializer,
+    CourseOnsite: CourseOnsiteDetailSerializer,
+    Article: ArticleDetailSerializer,
+}
+
+
+def payload_version(serializer_class):
+    """يتغيّر إن تغيّرت حقول الـ serializer، فتسقط الحمولات القديمة تلقائيًا."""
+    raw = f"{serializer_class.__module__}.{serializer_class.__name__}:{','.join(serializer_class.Meta.fields)}"
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+class RawJSON:
+    """بايتات JSON جاهزة تمرّ عبر PayloadJSONRenderer كما هي."""
+    __slots__ = ("content",)
+
+    def __init__(self, content):
+        self.content = bytes(content)
+
+    def __getstate__(self):
+        return self.content
+
+    def __setstate__(self, state):
+        self.content = state
+
+
+class PayloadJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, RawJSON):
+            return data.content
+        return super().render(data, accepted_media_type, renderer_context)
+
+
+# ============================
+# التوليد
+# ============================
+def render_payload(instance):
+    serializer_class = PAYLOAD_SERIALIZERS[type(instance)]
+    return JSONRenderer().render(serializer_class(instance).data)
+
+
+def render_payloads(model, instances):
+    """
+    نفس render_payload لدفعة من موديل واحد: serializer واحد many=True يبني الحقول مرة
+    للدفعة بدل مرة لكل كائن (هذا البناء هو معظم الكلفة). البايتات مطابقة.
+    """
+    renderer = JSONRenderer()
+    data = PAYLOAD_SERIALIZERS[model](instances, many=True).data
+    return [renderer.render(item) for item in data]
+
+
+def store_payload(instance, using="default"):
+    serializer_class = PAYLOAD_SERIALIZERS.get(type(instance))
+    if serializer_class is None:
+        return
+    ct = ContentType.objects.db_manager(using).get_for_model(type(instance))
+    RenderedPayload.objects.using(using).update_or_create(
+        content_type=ct,
+        object_id=instance.pk,
+        defaults={
+            "payload": render_payload(instance),
+            "source_updated_at": instance.updated_at,
+            "version": payload_version(serializer_class),
+        },
+    )
+
+
+def _rendered_rows(model, ct, version, objs):
+    return [
+        RenderedPayload(
+            content_type=ct,
+            object_id=obj.pk,
+            payload=payload,
+            source_updated_at=obj.updated_at,
+            version=version,
+        )
+        for obj, payload in zip(objs, render_payloads(model, objs))
+    ]
+
+
+def store_payloads(model, pks, using="default"):
+    """store_payload لدفعة من موديل واحد (serializer واحد many=True)."""
+    serializer_class = PAYLOAD_SERIALIZERS.get(model)
+    if serializer_class is None:
+        return
+    ct = ContentType.objects.db_manager(using).get_for_model(model)
+    RenderedPayload.objects.using(using).filter(content_type=ct, object_id__in=pks).delete()
+    objs = list(model.objects.using(using).filter(pk__in=pks).order_by("pk"))
+    RenderedPayload.objects.using(using).bulk_create(
+        _rendered_rows(model, ct, payload_version(serializer_class), objs)
+    )
+
+
+def delete_payload(model, pk, using="default"):
+    ct = ContentType.objects.db_manager(using).get_for_model(model)
+    RenderedPayload.objects.using(using).filter(content_type=ct, object_id=pk).delete()
+
+
+def rebuild_payloads(using="default", batch_size=200):
+    """يعيد توليد كل الحمولات. يعيد {اسم الموديل: العدد}."""
+    totals = {}
+    for model, serializer_class in PAYLOAD_SERIALIZERS.items():
+        ct = ContentType.objects.db_manager(using).get_for_model(model)
+        version = payload_version(serializer_class)
+        RenderedPayload.objects.using(using).filter(content_type=ct).delete()
+        total = 0
+        objs = model.objects.using(using).order_by("pk").iterator(chunk_size=batch_size)
+        while chunk := list(islice(objs, batch_size)):
+            RenderedPayload.objects.using(using).bulk_create(_rendered_rows(model, ct, version, chunk))
+            total += len(chunk)
+        totals[model.__name__] = total
+    return totals
+
+
+# ============================
+# القراءة
+# ============================
+def with_payload(qs):
+    """يضيف عمود `rendered_payload` (أو NULL إن كانت الحمولة قديمة/مفقودة) لنفس الاستعلام."""
+    model = qs.model
+    ct = ContentType.objects.db_manager(qs.db).get_for_model(model)
+    fresh = RenderedPayload.objects.filter(
+        content_type=ct,
+        object_id=OuterRef("pk"),
+        source_updated_at=OuterRef("updated_at"),
+        version=payload_version(PAYLOAD_SERIALIZERS[model]),
+    ).values("payload")[:1]
+    return qs.annotate(rendered_payload=Subquery(fresh))
+
+
+class MaterializedDetailMixin:
+    """
+    لـ RetrieveAPIView: يجلب (pk, updated_at, الحمولة) باستعلام واحد يُستخدم أيضًا
+    للـ ETag (DetailValidatorsMixin)، ويعيد البايتات المخزّنة بدون serializer.
+    """
+    renderer_classes = [PayloadJSONRenderer, BrowsableAPIRenderer]
+
+    def detail_row_queryset(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        qs = with_payload(self.get_queryset().filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]}))
+        return qs.order_by().values_list("pk", "updated_at", "rendered_payload")
+
+    def stored_payload(self, row):
+        """RawJSON للحمولة المخزّنة إن كانت حديثة وصالحة للـ renderer المختار، وإلا None."""
+        if row is not None and row[2] is not None and isinstance(self.request.accepted_renderer, PayloadJSONRenderer):
+            return RawJSON(row[2])
+        return None
+
+    def retrieve(self, request, *args, **kwargs):
+        payload = self.stored_payload(self.get_detail_row())
+        if payload is not None:
+            return Response(payload)
+        return super().retrieve(request, *args, **kwargs)
@@ -0,0 +1,79 @@
+# api/routers.py
+"""
+توجيه القراءة/الكتابة بين `default` (الكاتب) و `replica` (اتصال للقراءة فقط).
+
+- الكتابة دائمًا على default.
+- القراءة على replica إن عُرِّف، إلا إذا "ثُبِّت" الطلب على default:
+  * بعد أي كتابة في نفس الطلب (db_for_write يثبّت)، فالقراءة بعد الكتابة ترى ما كُتب؛
+  * في طلبات POST/PUT/PATCH/DELETE من البداية (ReplicaPinningMiddleware)؛
+  * داخل transaction.atomic() مفتوحة على default.
+- التثبيت في contextvar يُصفَّر مع بداية كل طلب (آمن مع الخيوط و async).
+"""
+import contextvars
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_DB_ALIAS = "replica"
+
+_pinned = contextvars.ContextVar("api_db_pinned", default=False)
+
+
+def pin_to_primary():
+    _pinned.set(True)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+def read_alias():
+    """الـ alias الذي تذهب إليه قراءات الـ ORM الآن (للاستعلامات الخام)."""
+    if REPLICA_DB_ALIAS not in settings.DATABASES or is_pinned():
+        return DEFAULT_DB_ALIAS
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return DEFAULT_DB_ALIAS
+    return REPLICA_DB_ALIAS
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_alias()
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # نفس البيانات على الـ aliasين
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS  # replica مرآة، لا تُهاجَر
+
+
+class ReplicaPinningMiddleware:
+    """يصفّر التثبيت لكل طلب، ويثبّت الطلبات غير الآمنة على الكاتب من البداية."""
+    sync_capable = True
+    async_capable = True  # لا قفزة خيط أمام الـ views غير المتزامنة (async_views.py)
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _pinned.set(request.method not in ("GET", "HEAD", "OPTIONS"))
+        try:
+            return self.get_response(request)
+        finally:
+            _pinned.reset(token)
+
+    async def __acall__(self, request):
+        token = _pinned.set(request.method not in ("GET", "HEAD", "OPTIONS"))
+        try:
+            return await self.get_response(request)
+        finally:
+            _pinned.reset(token)
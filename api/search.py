@@ -0,0 +1,313 @@
+# api/search.py
+"""
+فهرس البحث النصي الكامل للكتالوج (SQLite FTS5).
+
+- جدول ظلّ افتراضي واحد `api_search_fts` يضم المقالات والكورسات (المسجّلة والحضورية)
+  والكتب والأدوات. لكل صف: النوع، حالة النشر، وثلاثة أعمدة مُطبَّعة (title, summary, body).
+- rowid = pk * KIND_SLOTS + رمز النوع؛ فتحديث/حذف عنصر واحد يتم على rowid مباشرة.
+- التطبيع عربي: حذف التشكيل والتطويل، توحيد الألف/الهمزات، التاء المربوطة والألف المقصورة،
+  نزع أداة التعريف، وحذف وسوم HTML قبل الفهرسة.
+- المزامنة عبر إشارات post_save/post_delete (انظر signals.py)، وإعادة البناء الكاملة عبر
+  الأمر `rebuild_search_index`.
+"""
+import asyncio
+import html
+import re
+import unicodedata
+
+from django.apps import apps
+from django.db import connections
+
+SEARCH_FTS_TABLE = "api_search_fts"
+KIND_SLOTS = 8
+
+# أعمدة الجدول بترتيبها (انظر الترحيل 0005)؛ bm25 يأخذ وزنًا لكل عمود بالموضع، ومنها UNINDEXED
+SEARCH_FTS_COLUMNS = ("kind", "published", "title", "summary", "body")
+# أوزان bm25 للأعمدة المفهرسة؛ غيرها (kind, published) صفر
+SEARCH_FTS_WEIGHTS = {"title": 10.0, "summary": 4.0, "body": 1.0}
+
+# النوع -> (رمز rowid، اسم الموديل، حقل العنوان، حقل الملخص، حقل المتن)
+SEARCH_KINDS = {
+    "course_recorded": (1, "CourseRecorded", "title", "summary", "long_description"),
+    "course_onsite": (2, "CourseOnsite", "title", "summary", "long_description"),
+    "book": (3, "Book", "title", "author_name", "description"),
+    "tool": (4, "Tool", "name", None, "description"),
+    "article": (5, "Article", "title", "excerpt", "content"),
+}
+_KIND_BY_CODE = {spec[0]: kind for kind, spec in SEARCH_KINDS.items()}
+_KIND_BY_MODEL = {spec[1]: kind for kind, spec in SEARCH_KINDS.items()}
+
+# ============================
+# التطبيع
+# ============================
+# الحركات وعلامات القرآن والتطويل
+_ARABIC_MARKS_RE = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]")
+# استبدالات متتالية بدل str.translate: أسرع بكثير على النصوص غير اللاتينية الطويلة
+_ARABIC_CHAR_MAP = (
+    ("أ", "ا"), ("إ", "ا"), ("آ", "ا"), ("ٱ", "ا"),
+    ("ؤ", "و"), ("ئ", "ي"),
+    ("ى", "ي"),
+    ("ة", "ه"),
+)
+# أداة التعريف وما يلتصق بها (وال، بال، كال، فال، لل) متبوعة بحرفين على الأقل
+_ARABIC_ARTICLE_RE = re.compile(r"\b(?:[وفبك]?ال|لل)(?=\w\w)")
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def normalize_text(text):
+    """تطبيع نص للفهرسة/البحث (عربي + لاتيني)."""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", str(text))
+    text = _ARABIC_MARKS_RE.sub("", text)
+    for old, new in _ARABIC_CHAR_MAP:
+        text = text.replace(old, new)
+    return _ARABIC_ARTICLE_RE.sub("", text).casefold()
+
+
+_TAG_RE = re.compile(r"<[^>]*>")
+
+
+def html_to_text(value):
+    """
+    من HTML إلى نص خام (بدون وسوم ومع فكّ الكيانات). تعبير نمطي بدل strip_tags
+    (محلّل HTML كامل) — يكفي للفهرسة، والوسم يصبح مسافة فلا تلتصق كلمات العناصر المتجاورة.
+    """
+    return html.unescape(_TAG_RE.sub(" ", value or ""))
+
+
+def build_match_query(q):
+    """
+    يحوّل نص المستخدم إلى تعبير MATCH آمن: كل كلمة بين علامتي تنصيص + بادئة (*)،
+    والكلمات مربوطة بـ AND ضمنيًا. يعيد "" إن لم يبقَ شيء بعد التطبيع.
+    """
+    terms = _TOKEN_RE.findall(normalize_text(q))
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+def kind_for_model(model):
+    return _KIND_BY_MODEL.get(model._meta.object_name)
+
+
+def search_rowid(kind, pk):
+    return pk * KIND_SLOTS + SEARCH_KINDS[kind][0]
+
+
+# ============================
+# توفّر الفهرس
+# ============================
+_available_aliases = set()
+
+
+def _in_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def fts_available(using="default"):
+    """
+    هل جدول الفهرس موجود على هذا الاتصال؟ (نخزّن النتيجة الإيجابية فقط).
+    داخل حلقة الأحداث (views غير متزامنة) بلا استعلام: ما حسمه awarm مسبقًا، وإلا False (icontains).
+    """
+    if using in _available_aliases:
+        return True
+    if _in_event_loop():
+        return False
+    conn = connections[using]
+    if conn.vendor != "sqlite":
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            [SEARCH_FTS_TABLE],
+        )
+        found = cursor.fetchone() is not None
+    if found:
+        _available_aliases.add(using)
+    return found
+
+
+# ============================
+# الاستعلام
+# ============================
+def _bm25():
+    weights = ", ".join(str(SEARCH_FTS_WEIGHTS.get(column, 0.0)) for column in SEARCH_FTS_COLUMNS)
+    return f"bm25({SEARCH_FTS_TABLE}, {weights})"
+
+
+def search_queryset(qs, q, ordering=()):
+    """
+    يقيّد queryset لأحد موديلات الكتالوج بنتائج الفهرس ويرتّبها حسب الصلة
+    (bm25 الأقل = الأفضل) ثم حسب `ordering`.
+    يعيد None إن كان الفهرس غير متاح أو الاستعلام فارغًا بعد التطبيع؛ وعندها يعود
+    المستدعي إلى icontains.
+    """
+    kind = kind_for_model(qs.model)
+    match = build_match_query(q)
+    if kind is None or not match or not fts_available(qs.db):
+        return None
+    table = qs.model._meta.db_table
+    return qs.extra(
+        select={"search_rank": _bm25()},
+        tables=[SEARCH_FTS_TABLE],
+        where=[
+            f"{SEARCH_FTS_TABLE} MATCH %s",
+            f"{SEARCH_FTS_TABLE}.kind = %s",
+            f"{table}.id = {SEARCH_FTS_TABLE}.rowid / {KIND_SLOTS}",
+        ],
+        params=[match, kind],
+    ).order_by("search_rank", *ordering)
+
+
+def search_articles(qs, q):
+    return search_queryset(qs, q, ordering=("-published_at", "-created_at"))
+
+
+class SearchHits:
+    """
+    نتائج البحث الموحّد (كل الأنواع) من الفهرس مباشرة بدون لمس جداول المحتوى.
+    كائن كسول يدعم count() والتقطيع، فيعمل مع Paginator كما يعمل queryset.
+    كل عنصر: (kind, pk, score).
+    """
+
+    def __init__(self, match, kinds=None, using="default"):
+        self.match = match
+        self.kinds = list(kinds or SEARCH_KINDS)
+        self.using = using
+        self._count = None
+
+    def _where(self):
+        placeholders = ", ".join(["%s"] * len(self.kinds))
+        sql = f"{SEARCH_FTS_TABLE} MATCH %s AND published = 1 AND kind IN ({placeholders})"
+        return sql, [self.match, *self.kinds]
+
+    def count(self):
+        if self._count is None:
+            where, params = self._where()
+            with connections[self.using].cursor() as cursor:
+                cursor.execute(f"SELECT COUNT(*) FROM {SEARCH_FTS_TABLE} WHERE {where}", params)
+                self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        start = item.start or 0
+        limit = -1 if item.stop is None else max(item.stop - start, 0)
+        where, params = self._where()
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, {_bm25()} AS score FROM {SEARCH_FTS_TABLE} WHERE {where} "
+                "ORDER BY score LIMIT %s OFFSET %s",
+                [*params, limit, start],
+            )
+            rows = cursor.fetchall()
+        return [
+            (_KIND_BY_CODE[rowid % KIND_SLOTS], rowid // KIND_SLOTS, score)
+            for rowid, score in rows
+        ]
+
+
+def search_catalog(q, kinds=None, using="default"):
+    """بحث موحّد مرتّب حسب الصلة؛ يعيد SearchHits أو None إن تعذّر استخدام الفهرس."""
+    match = build_match_query(q)
+    if not match or not fts_available(using):
+        return None
+    return SearchHits(match, kinds=kinds, using=using)
+
+
+# ============================
+# المزامنة
+# ============================
+_INSERT_SQL = (
+    f"INSERT INTO {SEARCH_FTS_TABLE} (rowid, kind, published, title, summary, body) "
+    "VALUES (%s, %s, %s, %s, %s, %s)"
+)
+
+
+def index_fields(kind):
+    """الحقول اللازمة لبناء صف فهرس لهذا النوع (بالترتيب الذي يتوقعه index_row)."""
+    _, _, title, summary, body = SEARCH_KINDS[kind]
+    return ["pk", "is_published", title, summary or title, body]
+
+
+def index_row(kind, pk, is_published, title, summary, body):
+    if SEARCH_KINDS[kind][3] is None:
+        summary = ""
+    return (
+        search_rowid(kind, pk),
+        kind,
+        1 if is_published else 0,
+        normalize_text(title),
+        normalize_text(summary),
+        normalize_text(html_to_text(body)),
+    )
+
+
+def index_object(instance, using="default"):
+    kind = kind_for_model(type(instance))
+    if kind is None or not fts_available(using):
+        return
+    values = [getattr(instance, f) for f in index_fields(kind)]
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_FTS_TABLE} WHERE rowid = %s", [search_rowid(kind, instance.pk)])
+        cursor.execute(_INSERT_SQL, index_row(kind, *values))
+
+
+def index_objects(model, pks, using="default"):
+    """index_object لدفعة من موديل واحد (بعد عمليات بالجملة لا ترسل post_save)."""
+    kind = kind_for_model(model)
+    if kind is None or not fts_available(using):
+        return
+    rows = model.objects.using(using).filter(pk__in=pks).order_by().values_list(*index_fields(kind))
+    with connections[using].cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {SEARCH_FTS_TABLE} WHERE rowid = %s", [(search_rowid(kind, pk),) for pk in pks],
+        )
+        cursor.executemany(_INSERT_SQL, [index_row(kind, *row) for row in rows])
+
+
+def unindex_object(model, pk, using="default"):
+    kind = kind_for_model(model)
+    if kind is None or not fts_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_FTS_TABLE} WHERE rowid = %s", [search_rowid(kind, pk)])
+
+
+def rebuild_search_index(using="default", batch_size=500, get_model=apps.get_model):
+    """
+    يعيد بناء الفهرس بالكامل من جداول الكتالوج. يعيد {kind: عدد الصفوف}.
+    `get_model` قابل للاستبدال ليعمل داخل الترحيلات مع الموديلات التاريخية.
+    """
+    if not fts_available(using):
+        return {}
+    totals = {}
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_FTS_TABLE}")
+        for kind, spec in SEARCH_KINDS.items():
+            model = get_model("api", spec[1])
+            rows = (
+                model.objects.using(using)
+                .order_by()
+                .values_list(*index_fields(kind))
+                .iterator(chunk_size=batch_size)
+            )
+            total, batch = 0, []
+            for row in rows:
+                batch.append(index_row(kind, *row))
+                if len(batch) >= batch_size:
+                    cursor.executemany(_INSERT_SQL, batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                cursor.executemany(_INSERT_SQL, batch)
+                total += len(batch)
+            totals[kind] = total
+    return totals
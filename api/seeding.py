@@ -0,0 +1,77 @@
+# api/seeding.py
+"""
+أدوات البذر (seed) بالجملة لأوامر الإدارة.
+
+- upsert(): bulk_create(update_conflicts=True) على دفعات، كل دفعة في معاملة قصيرة.
+  الحقل الفريد (slug) يُستخدم مباشرة في ON CONFLICT؛ وغير الفريد (عنوان/اسم/رابط الكتاب والأداة)
+  يُطابَق باستعلام واحد لكل دفعة ثم ON CONFLICT(id). إعادة التشغيل تحدّث ولا تكرّر.
+  المطابقة الملتبسة (قيمة مكررة في الدفعة أو في أكثر من صف) خطأ، كما في update_or_create.
+- bulk_create لا يرسل post_save، فبعد البذر: refresh_derived() يحدّث فهرس البحث والكلمات
+  المفتاحية والحمولات الجاهزة للعناصر المبذورة فقط، ويرفع جيل الكاش بعد الـ commit.
+"""
+from collections import Counter
+from functools import partial
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .cache import bump_generation
+from .keywords import sync_keywords_many
+from .payloads import store_payloads
+from .search import index_objects
+
+
+def batched(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def upsert_fields(model, match_field):
+    """الحقول التي تُحدَّث عند التعارض: كل شيء عدا المفتاح و created_at وحقل المطابقة."""
+    return [
+        f.name for f in model._meta.concrete_fields
+        if not f.primary_key and f.name not in ("created_at", match_field)
+    ]
+
+
+def upsert(model, objs, match_field, using=DEFAULT_DB_ALIAS, batch_size=1000):
+    """يدرج/يحدّث objs بالجملة مطابقةً على match_field ويضع pk لكلٍّ منها. يعيد (created, updated)."""
+    manager = model.objects.using(using)
+    field = model._meta.get_field(match_field)
+    update_fields = upsert_fields(model, match_field)
+    created = updated = 0
+    for batch in batched(list(objs), batch_size):
+        keys = [getattr(obj, match_field) for obj in batch]
+        repeated = [key for key, n in Counter(keys).items() if n > 1]
+        if repeated:
+            raise ValueError(f"{model.__name__}: duplicate {match_field} in one batch: {repeated[:5]!r}")
+        with transaction.atomic(using=using):
+            rows = manager.filter(**{f"{match_field}__in": keys}).values_list(match_field, "pk")
+            existing = {}
+            for key, pk in rows:
+                if key in existing:
+                    raise model.MultipleObjectsReturned(
+                        f"More than one {model.__name__} has {match_field}={key!r}; cannot upsert it."
+                    )
+                existing[key] = pk
+            if field.unique:
+                unique_fields = [match_field]
+            else:
+                for obj in batch:
+                    obj.pk = existing.get(getattr(obj, match_field))
+                unique_fields = [model._meta.pk.name]
+            manager.bulk_create(
+                batch, update_conflicts=True, unique_fields=unique_fields, update_fields=update_fields,
+            )
+        updated += len(existing)
+        created += len(batch) - len(existing)
+    return created, updated
+
+
+def refresh_derived(model, pks, using=DEFAULT_DB_ALIAS, batch_size=500):
+    """ما تفعله الإشارات عادةً، للعناصر pks فقط، على دفعات كل منها في معاملة قصيرة."""
+    for chunk in batched(list(pks), batch_size):
+        with transaction.atomic(using=using):
+            index_objects(model, chunk, using=using)
+            sync_keywords_many(model, chunk, using=using)
+            store_payloads(model, chunk, using=using)
+    transaction.on_commit(partial(bump_generation, model), using=using)
@@ -1,11 +1,16 @@
 # api/serializers.py
 from django.contrib.auth import get_user_model
-from django.db import transaction
-from django.db.models import Q
+from django.db import IntegrityError, transaction
+from django.db.models import Q, Value
+from django.db.models.functions import Lower
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from .authentication import remember_user
+from .cache import get_cached_me
+
 from .models import (
     UserProfile,
     CourseRecorded,
@@ -21,15 +26,16 @@ User = get_user_model()
 # ---------------------------
 
 def get_or_create_profile(user: User):
+    """لمسارات الكتابة فقط (PATCH/PUT)؛ القراءة لا تنشئ بروفايل."""
     profile, _ = UserProfile.objects.get_or_create(user=user)
     return profile
 
 def serialize_me(user: User):
-    profile = None
+    """لا يكتب شيئًا: إن لم يكن للمستخدم بروفايل (قبل backfill_profiles) تُعاد القيم الفارغة."""
     try:
-        profile = get_or_create_profile(user)
-    except Exception:
-        pass
+        profile = user.profile
+    except UserProfile.DoesNotExist:
+        profile = None
 
     full_name = ""
     if hasattr(user, "full_name") and user.full_name:
@@ -62,6 +68,71 @@ def serialize_me(user: User):
         })
     return data
 
+def get_me(user: User):
+    """
+    حمولة /api/me/ من الكاش لكل مستخدم؛ عند الغياب: المستخدم والبروفايل باستعلام واحد.
+    يُبطلها حفظ المستخدم أو البروفايل (signals.py).
+    """
+    def build():
+        fresh = User.objects.select_related("profile").filter(pk=user.pk, is_active=True).first()
+        if fresh is None:  # حُذف/عُطّل والتوكن ما زال صالحًا
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        return serialize_me(fresh)
+    return get_cached_me(user.pk, build)
+
+def lower_lookup(*fields):
+    """
+    شرط LOWER(field) = LOWER(value) يطابق فهارس migration 0009 (بديل iexact الذي لا يستخدم فهرسًا).
+    يُستخدم: lower_lookup("email", "username")(qs, value) -> أي حقل يطابق.
+    """
+    def apply(qs, value):
+        qs = qs.alias(**{f"{f}_lower": Lower(f) for f in fields})
+        cond = Q()
+        for f in fields:
+            cond |= Q(**{f"{f}_lower": Lower(Value(value))})
+        return qs.filter(cond)
+    return apply
+
+users_by_email = lower_lookup("email")
+users_by_username = lower_lookup("username")
+users_by_identifier = lower_lookup("email", "username")
+
+USERNAME_ALLOCATION_ATTEMPTS = 5
+
+def next_free_username(base: str, exclude=()):
+    """
+    base أو base2, base3... باستعلام واحد: كل الأسماء التي تبدأ بـ base (نطاق على فهرس
+    LOWER(username)) ثم أول لاحقة حرّة في الذاكرة.
+    """
+    prefix = base.lower()
+    taken = set(
+        User.objects.annotate(username_lower=Lower("username"))
+        .filter(username_lower__gte=prefix, username_lower__lt=prefix + "\U0010ffff")
+        .values_list("username_lower", flat=True)
+    )
+    taken.update(exclude)
+    if prefix not in taken:
+        return base
+    i = 2
+    while f"{prefix}{i}" in taken:
+        i += 1
+    return f"{base}{i}"
+
+def create_user_with_free_username(base: str, **fields):
+    """
+    create_user باسم حر. تسجيلان متزامنان قد يختاران نفس الاسم: الخاسر يصطدم بقيد
+    UNIQUE فيعيد المحاولة (داخل savepoint) مستبعدًا الاسم المأخوذ.
+    """
+    tried = set()
+    for _ in range(USERNAME_ALLOCATION_ATTEMPTS):
+        username = next_free_username(base, exclude=tried)
+        try:
+            with transaction.atomic():
+                return User.objects.create_user(username=username, **fields)
+        except IntegrityError:
+            tried.add(username.lower())
+    raise serializers.ValidationError("Could not allocate a username, please try again.")
+
 def issue_tokens_for_user(user: User):
     refresh = RefreshToken.for_user(user)
     return {"refresh": str(refresh), "access": str(refresh.access_token)}
@@ -78,7 +149,7 @@ class EmailOrUsernameTokenSerializer(TokenObtainPairSerializer):
             raise serializers.ValidationError("Email/Username and password are required.")
 
         try:
-            user = User.objects.get(Q(email__iexact=identifier) | Q(username__iexact=identifier))
+            user = users_by_identifier(User.objects.select_related("profile"), identifier).get()
         except User.DoesNotExist:
             raise serializers.ValidationError("Invalid credentials.")
         if not user.check_password(password):
@@ -87,6 +158,7 @@ class EmailOrUsernameTokenSerializer(TokenObtainPairSerializer):
         # مرّر username_field المتوقّع لـ SimpleJWT
         attrs[self.username_field] = getattr(user, self.username_field, user.username)
         data = super().validate(attrs)
+        remember_user(user)  # الختم وكاش المصادقة جاهزان لأول طلب بالتوكن الجديد
         data["me"] = serialize_me(user)
         return data
 
@@ -101,7 +173,7 @@ class RegisterSerializer(serializers.Serializer):
     phone = serializers.CharField(required=False, allow_blank=True)
 
     def validate_email(self, value):
-        if User.objects.filter(email__iexact=value).exists():
+        if users_by_email(User.objects.all(), value).exists():
             raise serializers.ValidationError("This email is already registered.")
         return value
 
@@ -112,23 +184,15 @@ class RegisterSerializer(serializers.Serializer):
         phone = validated_data.get("phone", "").strip()
 
         base_username = email.split("@")[0]
-        username = base_username
-        i = 1
-        while User.objects.filter(username__iexact=username).exists():
-            i += 1
-            username = f"{base_username}{i}"
 
         with transaction.atomic():
-            user = User.objects.create_user(username=username, email=email, password=password)
+            user = create_user_with_free_username(base_username, email=email, password=password)
+            username = user.username
             if hasattr(user, "full_name"):
                 user.full_name = full_name
                 user.save(update_fields=["full_name"])
-            profile = get_or_create_profile(user)
-            if not getattr(profile, "display_name", ""):
-                profile.display_name = full_name or username
-            if phone:
-                profile.phone = phone
-            profile.save()
+            # البروفايل يُنشأ هنا مرة واحدة (والحسابات القديمة عبر backfill_profiles)
+            UserProfile.objects.create(user=user, display_name=full_name or username, phone=phone)
         return user
 
 # ---------------------------
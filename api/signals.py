@@ -0,0 +1,136 @@
+# api/signals.py
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.core.signals import request_finished, request_started
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .authentication import evict_user, publish_user
+from .models import Article, Book, CourseOnsite, CourseRecorded, Tool, UserProfile
+from .cache import bump_generation, invalidate_me
+from .keywords import clear_keywords, sync_keywords
+from .payloads import PAYLOAD_SERIALIZERS, delete_payload, store_payload
+from .search import index_object, unindex_object
+from .slowqueries import defer_slow_query_logs, flush_slow_query_logs, install_slow_query_log
+from .sqlite import apply_pragmas
+
+CATALOG_MODELS = (CourseRecorded, CourseOnsite, Book, Tool, Article)
+
+
+# ============================
+# PRAGMAs لكل اتصال SQLite جديد
+# ============================
+connection_created.connect(apply_pragmas, dispatch_uid="api.sqlite_pragmas")
+# سجل الاستعلامات البطيئة (SLOW_QUERY_MS)
+connection_created.connect(install_slow_query_log, dispatch_uid="api.slow_queries")
+# EXPLAIN وكتابة السطور بعد إرسال الاستجابة، خارج قياسات الطلب
+request_started.connect(defer_slow_query_logs, dispatch_uid="api.slow_queries_defer")
+request_finished.connect(flush_slow_query_logs, dispatch_uid="api.slow_queries_flush")
+
+
+# ============================
+# مزامنة فهرس البحث للكتالوج
+# ============================
+def search_index_save(sender, instance, raw=False, using="default", **kwargs):
+    if raw:  # loaddata
+        return
+    index_object(instance, using=using)
+
+
+def search_index_delete(sender, instance, using="default", **kwargs):
+    unindex_object(sender, instance.pk, using=using)
+
+
+# ============================
+# مزامنة فهرس الكلمات المفتاحية
+# ============================
+def keyword_index_save(sender, instance, raw=False, using="default", update_fields=None, **kwargs):
+    if raw or (update_fields is not None and "keywords" not in update_fields):
+        return
+    sync_keywords(instance, using=using)
+
+
+def keyword_index_delete(sender, instance, using="default", **kwargs):
+    clear_keywords(sender, instance.pk, using=using)
+
+
+# ============================
+# إبطال كاش الاستجابات
+# ============================
+def response_cache_bump(sender, raw=False, using="default", **kwargs):
+    if raw:
+        return
+    # بعد الـ commit فقط: قبله قد يخزّن قارئٌ الصفوف القديمة تحت الجيل الجديد (انظر cache.py)
+    transaction.on_commit(partial(bump_generation, sender), using=using)
+
+
+# ============================
+# فلتر القائمة السوداء في العمّال الآخرين (blacklist.py)
+# ============================
+def blacklist_changed(sender, raw=False, using="default", **kwargs):
+    if raw:
+        return
+    # بعد الـ commit: عامل يرى الجيل الجديد قبل الصف فيحدّث فلتره بدونه
+    transaction.on_commit(partial(bump_generation, sender), using=using)
+
+
+post_save.connect(blacklist_changed, sender=BlacklistedToken, dispatch_uid="api.blacklist_changed")
+
+
+# ============================
+# حمولات التفاصيل الجاهزة
+# ============================
+def payload_save(sender, instance, raw=False, using="default", **kwargs):
+    if raw:
+        return
+    store_payload(instance, using=using)
+
+
+def payload_delete(sender, instance, using="default", **kwargs):
+    delete_payload(sender, instance.pk, using=using)
+
+
+# ============================
+# إبطال كاش /api/me/ وكاش المصادقة
+# ============================
+# الإبطال بعد الـ commit: قبله قد يعيد طلبٌ متزامن تخزين الصفوف القديمة (لقطة WAL)
+def me_user_changed(sender, instance, raw=False, update_fields=None, using="default", **kwargs):
+    evict_user(instance.pk)  # أي حفظ (منه تغيير كلمة المرور والتعطيل) أو حذف
+    if kwargs.get("signal") is post_delete:
+        transaction.on_commit(partial(evict_user, instance.pk), using=using)
+    else:
+        transaction.on_commit(partial(publish_user, instance), using=using)
+    if raw or (update_fields is not None and set(update_fields) <= {"last_login"}):
+        return  # تحديث last_login عند الدخول لا يغيّر الحمولة
+    transaction.on_commit(partial(invalidate_me, instance.pk), using=using)
+
+
+def me_profile_changed(sender, instance, raw=False, using="default", **kwargs):
+    if raw:
+        return
+    transaction.on_commit(partial(invalidate_me, instance.user_id), using=using)
+
+
+post_save.connect(me_user_changed, sender=get_user_model(), dispatch_uid="api.me_user_save")
+post_delete.connect(me_user_changed, sender=get_user_model(), dispatch_uid="api.me_user_delete")
+post_save.connect(me_profile_changed, sender=UserProfile, dispatch_uid="api.me_profile_save")
+post_delete.connect(me_profile_changed, sender=UserProfile, dispatch_uid="api.me_profile_delete")
+
+
+for _model in PAYLOAD_SERIALIZERS:
+    _name = _model.__name__
+    post_save.connect(payload_save, sender=_model, dispatch_uid=f"api.payload_save.{_name}")
+    post_delete.connect(payload_delete, sender=_model, dispatch_uid=f"api.payload_delete.{_name}")
+
+
+for _model in CATALOG_MODELS:
+    _name = _model.__name__
+    post_save.connect(search_index_save, sender=_model, dispatch_uid=f"api.search_index_save.{_name}")
+    post_delete.connect(search_index_delete, sender=_model, dispatch_uid=f"api.search_index_delete.{_name}")
+    post_save.connect(keyword_index_save, sender=_model, dispatch_uid=f"api.keyword_index_save.{_name}")
+    post_delete.connect(keyword_index_delete, sender=_model, dispatch_uid=f"api.keyword_index_delete.{_name}")
+    post_save.connect(response_cache_bump, sender=_model, dispatch_uid=f"api.response_cache_save.{_name}")
+    post_delete.connect(response_cache_bump, sender=_model, dispatch_uid=f"api.response_cache_delete.{_name}")
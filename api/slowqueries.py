@@ -0,0 +1,163 @@
+# api/slowqueries.py
+"""
+سجل الاستعلامات البطيئة مع خطة التنفيذ.
+
+- execute_wrapper على كل اتصال (connection_created في signals.py) إن كان SLOW_QUERY_MS > 0.
+- كل استعلام أبطأ من الحد يُسجَّل كسطر JSON على logger "api.slow_queries" (ملف SLOW_QUERY_LOG_FILE):
+  الزمن، بصمة الـ SQL (بعد حذف القيم وطيّ قوائم IN)، بصمة المعاملات (hash فقط — لا قيم خام في السجل)،
+  الـ view الذي أطلقه (من RequestTimingMiddleware)، الـ alias، الـ SQL، ومخرجات EXPLAIN QUERY PLAN.
+- EXPLAIN يُنفَّذ على cursor منفصل من نفس الاتصال (لا يلمس نتائج الاستعلام الأصلي)، مرة لكل بصمة
+  كل SLOW_QUERY_EXPLAIN_TTL ثانية، ولـ SELECT/WITH/UPDATE/DELETE فقط.
+- داخل طلب تُؤجَّل السطور (وEXPLAIN) إلى request_finished — بعد إرسال الاستجابة — فلا يُحسب زمنها
+  في قياسات الطلب (Server-Timing) ولا ينتظرها العميل. خارج الطلبات (أوامر الإدارة) تُكتب فورًا.
+- الملف يُكتب من كل العمّال (WatchedFileHandler)؛ التدوير خارجي (logrotate) — انظر LOGGING.
+- التلخيص: python manage.py slow_queries
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from .instrumentation import current_view
+
+logger = logging.getLogger("api.slow_queries")
+
+MAX_SQL_LENGTH = 4000
+EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*(?:\?|%s)\s*,?)+\)", re.IGNORECASE)
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """SQL بدون قيم حرفية، وقوائم IN بأي طول تصبح IN (...)، ومسافات موحّدة."""
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = _IN_LIST_RE.sub("IN (...)", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+def fingerprint(sql):
+    return hashlib.md5(normalize_sql(sql).encode()).hexdigest()[:12]
+
+
+def params_fingerprint(params):
+    if params is None:
+        return None
+    return hashlib.md5(repr(params).encode()).hexdigest()[:12]
+
+
+# ============================
+# EXPLAIN
+# ============================
+_plans = {}  # fingerprint -> (وقت الالتقاط، الخطة)
+_plans_lock = threading.Lock()
+
+
+def explain(connection, sql, params):
+    """خطة التنفيذ كسطور نصية، أو None إن لم تكن متاحة."""
+    if not sql.lstrip().upper().startswith(EXPLAINABLE):
+        return None
+    if connection.vendor != "sqlite" and connection.in_atomic_block:
+        return None  # خطأ في EXPLAIN يُفسد المعاملة المفتوحة في Postgres
+    prefix = "EXPLAIN QUERY PLAN" if connection.vendor == "sqlite" else "EXPLAIN"
+    connection.ensure_connection()  # بعد الطلب قد يكون close_old_connections أغلقه
+    cursor = connection.create_cursor()  # cursor الخلفية مباشرة: بلا wrappers ولا سجل debug
+    try:
+        cursor.execute(f"{prefix} {sql}", params)
+        rows = cursor.fetchall()
+    except Exception as exc:  # خطة فقط: لا نُفشل الطلب بسببها
+        return [f"EXPLAIN failed: {exc}"]
+    finally:
+        cursor.close()
+    if connection.vendor == "sqlite":  # (id, parent, notused, detail)
+        return [row[-1] for row in rows]
+    return [" ".join(str(col) for col in row) for row in rows]
+
+
+def cached_plan(connection, sql, params, key):
+    ttl = getattr(settings, "SLOW_QUERY_EXPLAIN_TTL", 300)
+    now = time.monotonic()
+    with _plans_lock:
+        entry = _plans.get(key)
+    if entry is not None and now - entry[0] < ttl:
+        return entry[1]
+    plan = explain(connection, sql, params)
+    with _plans_lock:
+        _plans[key] = (now, plan)
+    return plan
+
+
+# ============================
+# الـ wrapper
+# ============================
+def slow_query_wrapper(execute, sql, params, many, context):
+    threshold = getattr(settings, "SLOW_QUERY_MS", 0)
+    if threshold <= 0:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if elapsed_ms >= threshold:
+        log_slow_query(context["connection"], sql, params, many, elapsed_ms, threshold)
+    return result
+
+
+def log_slow_query(connection, sql, params, many, elapsed_ms, threshold):
+    entry = {
+        "ts": timezone.now().isoformat(),
+        "duration_ms": round(elapsed_ms, 3),
+        "threshold_ms": threshold,
+        "fingerprint": fingerprint(sql),
+        "params_fingerprint": None if many else params_fingerprint(params),
+        "view": current_view(),
+        "alias": connection.alias,
+        "many": many,
+        "sql": sql[:MAX_SQL_LENGTH],
+        "plan": None,
+    }
+    pending = getattr(_deferred, "entries", None)
+    if pending is not None:
+        pending.append((entry, sql, params))
+    else:
+        write_entry(entry, sql, params)
+
+
+def write_entry(entry, sql, params):
+    if not entry["many"]:
+        entry["plan"] = cached_plan(connections[entry["alias"]], sql, params, entry["fingerprint"])
+    logger.warning(json.dumps(entry, ensure_ascii=False, default=str))
+
+
+# ============================
+# التأجيل لما بعد الاستجابة
+# ============================
+_deferred = threading.local()  # الخيط الذي يخدم الطلب (ASGI: خيط sync_to_async نفسه)
+
+
+def defer_slow_query_logs(**kwargs):
+    """مستقبل request_started."""
+    flush_slow_query_logs()  # بقايا طلب لم يُغلق
+    _deferred.entries = []
+
+
+def flush_slow_query_logs(**kwargs):
+    """مستقبل request_finished (عند إغلاق الاستجابة بعد إرسالها)."""
+    pending, _deferred.entries = getattr(_deferred, "entries", None), None
+    for entry, sql, params in pending or ():
+        write_entry(entry, sql, params)
+
+
+def install_slow_query_log(connection, **kwargs):
+    """مستقبل connection_created: يضيف الـ wrapper مرة واحدة لكل اتصال."""
+    if getattr(settings, "SLOW_QUERY_MS", 0) > 0 and slow_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(slow_query_wrapper)
@@ -0,0 +1,49 @@
+# api/sqlite.py
+"""
+PRAGMAs لاتصالات SQLite (من الإعدادات/المتغيرات البيئية) عند فتح كل اتصال.
+
+- WAL: القرّاء لا يُحجبون بكاتب واحد (الإدارة تكتب والـ API تقرأ).
+- busy_timeout: انتظار القفل بدل "database is locked" الفوري.
+- synchronous=NORMAL آمن مع WAL (قد تضيع آخر معاملة عند انقطاع الكهرباء فقط، لا فساد).
+- mmap_size / cache_size / temp_store: قراءة أسرع وفرز مؤقت في الذاكرة.
+القيم: settings.SQLITE_PRAGMAS، ويمكن لكل alias تجاوزها بمفتاح "PRAGMAS" في DATABASES
+(None = لا تُطبَّق، مثل journal_mode على اتصال mode=ro).
+"""
+import re
+
+from django.conf import settings
+
+# ترتيب التطبيق مهم: busy_timeout قبل journal_mode (تحويل WAL يحتاج قفلًا)
+PRAGMA_ORDER = ("busy_timeout", "journal_mode", "synchronous", "mmap_size", "cache_size", "temp_store", "foreign_keys")
+REPORTED_PRAGMAS = PRAGMA_ORDER + ("page_size", "wal_autocheckpoint")
+_VALUE_RE = re.compile(r"^-?\w+$")
+
+
+def configured_pragmas(connection):
+    pragmas = dict(getattr(settings, "SQLITE_PRAGMAS", {}))
+    pragmas.update(connection.settings_dict.get("PRAGMAS") or {})
+    return {name: value for name, value in pragmas.items() if value is not None}
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    pragmas = configured_pragmas(connection)
+    names = [n for n in PRAGMA_ORDER if n in pragmas] + sorted(set(pragmas) - set(PRAGMA_ORDER))
+    with connection.cursor() as cursor:
+        for name in names:
+            value = str(pragmas[name])
+            if not (name.isidentifier() and _VALUE_RE.match(value)):
+                raise ValueError(f"Invalid SQLite pragma: {name}={value!r}")
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def effective_pragmas(connection, names=REPORTED_PRAGMAS):
+    """{الاسم: القيمة الفعلية} كما تراها قاعدة البيانات."""
+    out = {}
+    with connection.cursor() as cursor:
+        for name in names:
+            cursor.execute(f"PRAGMA {name}")
+            row = cursor.fetchone()
+            out[name] = row[0] if row else None
+    return out
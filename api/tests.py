@@ -1,3 +1,1705 @@
-from django.test import TestCase
+"""
+ميزانيات الاستعلامات وحجم الاستجابة لكل مسار في api/urls.py.
 
-# Create your tests here.
+- الجدول BUDGETS هو المرجع الوحيد: مسار + معاملات + أقصى عدد استعلامات SQL + أقصى حجم (بايت).
+  زيادة استعلام واحد (N+1، COUNT إضافي...) تُفشل الاختبار وتطبع الاستعلامات الزائدة بعلامة "+".
+- القياس بدون كاش الاستجابات (API_CACHE_ENABLED=False) ليُقاس العمل الحقيقي، ثم اختبار منفصل
+  يتأكد أن الطلب المكرّر من الكاش لا يلمس قاعدة البيانات.
+- عند تغيير مقصود في عدد الاستعلامات: حدّث الرقم في الجدول في نفس الـ commit.
+"""
+import contextvars
+import gzip
+import hmac
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from contextlib import ExitStack, contextmanager
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connections, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+from django.utils.http import http_date, parse_http_date
+from rest_framework import serializers as drf_serializers
+from rest_framework.exceptions import Throttled, ValidationError
+from rest_framework.request import Request
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt import tokens as simplejwt_tokens
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import async_views, authentication, instrumentation, routers, search, slowqueries
+from .authentication import LazyUser, StatelessJWTAuthentication, user_cache
+from .blacklist import BloomFilter, blacklist_filter
+from .cache import bump_generation, get_generations, get_user_stamp, me_cache_key
+from . import urls as api_urls
+from .metrics import CONTENT_TYPE, MetricsStore
+from .views import ArticleListView, BookDetailView, BookListView
+from .models import Article, Book, CourseOnsite, CourseRecorded, KeywordTag, RenderedPayload, Tool, UserProfile
+from .fastserializers import get_field_plan, project_queryset, projected_fields
+from .pagination import StandardResultsSetPagination
+from .payloads import RawJSON, payload_version
+from .throttling import HashingIPThrottle, hashing_slot
+from .sqlite import apply_pragmas, effective_pragmas
+from .routers import PrimaryReplicaRouter, ReplicaPinningMiddleware, is_pinned, pin_to_primary, read_alias
+from .serializers import (
+    USERNAME_ALLOCATION_ATTEMPTS, ArticleDetailSerializer, create_user_with_free_username, next_free_username,
+    users_by_identifier,
+)
+
+PASSWORD = "budget-pass-123"
+
+# name: اسم الحالة، route: اسم المسار، kwargs: دالة (test) -> kwargs للـ URL،
+# params: query string أو جسم POST، queries/max_bytes: الميزانية، auth: يرسل Bearer
+Budget = namedtuple("Budget", "name route method kwargs params queries max_bytes auth")
+
+
+def _get(name, route, queries, max_bytes, kwargs=None, auth=False, **params):
+    return Budget(name, route, "get", kwargs, params, queries, max_bytes, auth)
+
+
+def _post(name, route, queries, max_bytes, params):
+    return Budget(name, route, "post", None, params, queries, max_bytes, False)
+
+
+BUDGETS = (
+    # ---------- الكورسات المسجّلة ----------
+    _get("recorded list", "courses-recorded-list", 3, 6000),
+    _get("recorded list page 2", "courses-recorded-list", 3, 1600, page=2),
+    _get("recorded list page_size 50", "courses-recorded-list", 3, 7500, page_size=50),
+    _get("recorded list cursor", "courses-recorded-list", 1, 6000, cursor=""),
+    _get("recorded list ?q", "courses-recorded-list", 3, 6000, q="القيادة"),
+    _get("recorded list ?featured", "courses-recorded-list", 3, 1600, featured="1"),
+    _get("recorded list ?keyword", "courses-recorded-list", 3, 4000, keyword="Python"),
+    _get("recorded detail", "courses-recorded-detail", 1, 1400, kwargs=lambda t: {"slug": "recorded-1"}),
+    # ---------- الكورسات الحضورية ----------
+    _get("onsite list", "courses-onsite-list", 3, 6000),
+    _get("onsite list page 2", "courses-onsite-list", 3, 1600, page=2),
+    _get("onsite list ?q", "courses-onsite-list", 3, 6000, q="القيادة"),
+    _get("onsite list ?featured", "courses-onsite-list", 3, 1600, featured="1"),
+    _get("onsite detail", "courses-onsite-detail", 1, 1400, kwargs=lambda t: {"slug": "onsite-1"}),
+    # ---------- الكتب ----------
+    _get("books list", "books-list", 3, 7500),
+    _get("books list page 2", "books-list", 3, 2000, page=2),
+    _get("books list ?q", "books-list", 3, 7500, q="القيادة"),
+    _get("books list ?featured", "books-list", 3, 2000, featured="1"),
+    _get("books detail", "books-detail", 2, 700, kwargs=lambda t: {"pk": t.books[0].pk}),
+    # ---------- الأدوات ----------
+    _get("tools list", "tools-list", 3, 7500),
+    _get("tools list page 2", "tools-list", 3, 2000, page=2),
+    _get("tools list ?q", "tools-list", 3, 7500, q="القيادة"),
+    _get("tools list ?featured", "tools-list", 3, 2000, featured="1"),
+    _get("tools detail", "tools-detail", 2, 700, kwargs=lambda t: {"pk": t.tools[0].pk}),
+    # ---------- المقالات ----------
+    _get("articles list", "article-list", 3, 5000),
+    _get("articles list page 2", "article-list", 3, 900, page=2),
+    _get("articles list cursor", "article-list", 1, 5000, cursor=""),
+    _get("articles list ?q", "article-list", 3, 5000, q="القيادة"),
+    _get("articles list ?published=0", "article-list", 3, 5000, published="0"),
+    _get("articles list ?keyword", "article-list", 3, 3000, keyword="Python"),
+    _get("article detail", "article-detail", 1, 1400, kwargs=lambda t: {"slug": "article-1"}),
+    # ---------- البحث الموحّد ----------
+    _get("search", "search", 3, 6500, q="القيادة"),  # صفحة مختلطة حسب الصلة (بطاقات الكورسات أكبر)
+    _get("search ?type", "search", 3, 8500, q="القيادة", type="book"),
+    # ---------- الصفحة الرئيسية ----------
+    _get("home", "home", 5, 7500),
+    _get("home ?limit", "home", 4, 4000, limit=2, articles=0),
+    # ---------- المقاييس ----------
+    _get("metrics", "metrics", 0, 1500),
+    # ---------- الحساب ----------
+    _get("me", "me", 2, 250, auth=True),  # كاش مشترك فارغ: تحميل المستخدم لفحص is_active + الحمولة
+    _post("token", "token_obtain_pair", 4, 900, {"username": "budget@example.com", "password": PASSWORD}),
+    _post("register", "register", 8, 250, {"email": "new-user@example.com", "password": PASSWORD}),
+)
+# token_refresh: الجسم يحتاج refresh حيًّا، فله حالة منفصلة (test_token_refresh_budget)
+TOKEN_REFRESH_BUDGET = Budget("token refresh", "token_refresh", "post", None, None, 6, 650, False)
+
+
+def seed_catalog(n=15):
+    """عناصر واقعية (عربي/إنجليزي، HTML، كلمات مفتاحية، outline) تكفي لصفحتين."""
+    now = timezone.now()
+    body = "<h2>القيادة والتحول الرقمي</h2><p>محتوى تجريبي عن الإدارة والابتكار.</p><ul><li>Python</li></ul>"
+    common = lambda i: {
+        "keywords": ["قيادة", "Python" if i % 2 else "Data"],
+        "is_featured": i % 5 == 0,
+    }
+    for model, kind in ((CourseRecorded, "recorded"), (CourseOnsite, "onsite")):
+        for i in range(1, n + 1):
+            model.objects.create(
+                title=f"القيادة الاستراتيجية {i}", slug=f"{kind}-{i}", summary="ملخص الكورس " * 5,
+                long_description=body * 3, objectives=["هدف أول", "هدف ثانٍ"],
+                target_audience=["مدراء", "Engineers"],
+                outline=[{"title": "الوحدة الأولى", "bullets": ["مقدمة", "تطبيق"]}], **common(i),
+            )
+    books = [
+        Book.objects.create(
+            title=f"كتاب القيادة {i}", author_name="مؤلف", description="وصف الكتاب " * 10,
+            url=f"https://example.com/books/{i}", **common(i),
+        )
+        for i in range(1, n + 1)
+    ]
+    tools = [
+        Tool.objects.create(
+            name=f"أداة القيادة {i}", description="وصف الأداة " * 10,
+            url=f"https://example.com/tools/{i}", **common(i),
+        )
+        for i in range(1, n + 1)
+    ]
+    for i in range(1, n + 1):
+        Article.objects.create(
+            title=f"مقال عن القيادة {i}", slug=f"article-{i}", excerpt="مقتطف " * 10, content=body * 5,
+            is_published=i != n, published_at=now - timedelta(hours=i), keywords=common(i)["keywords"],
+        )
+    return books, tools
+
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def use_temp_metrics_dir(test, **settings):
+    """METRICS_DIR مؤقت وفارغ لهذا الاختبار (لا يقرأ لقطات العمليات الحقيقية في /tmp)."""
+    metrics_dir = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, metrics_dir, ignore_errors=True)
+    overrides = override_settings(METRICS_DIR=metrics_dir, **settings)
+    overrides.enable()
+    test.addCleanup(overrides.disable)
+    return metrics_dir
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    API_CACHE_ENABLED=False,
+    REQUEST_TIMING_ENABLED=False,
+    METRICS_ENABLED=False,
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class EndpointBudgetTests(TestCase):
+    databases = {"default"}  # replica مرآة لـ default في الاختبارات
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.books, cls.tools = seed_catalog()
+        cls.user = get_user_model().objects.create_user(
+            username="budget", email="budget@example.com", password=PASSWORD,
+        )
+        UserProfile.objects.create(user=cls.user, display_name="Budget")
+
+    def setUp(self):
+        use_temp_metrics_dir(self)
+        cache.clear()
+
+    # ---------- أدوات ----------
+    def url(self, budget):
+        kwargs = budget.kwargs(self) if budget.kwargs else None
+        return reverse(budget.route, kwargs=kwargs)
+
+    def send(self, budget, headers=None):
+        if budget.method == "post":
+            return self.client.post(self.url(budget), budget.params, content_type="application/json")
+        return self.client.get(self.url(budget), budget.params, headers=headers)
+
+    def access_token(self):
+        response = self.client.post(
+            reverse("token_obtain_pair"), {"username": self.user.email, "password": PASSWORD},
+            content_type="application/json",
+        )
+        return response.json()
+
+    def assertWithinBudget(self, budget, request):
+        """
+        ينفّذ request() ويقارن الاستعلامات والحجم بالميزانية. داخل TestCase كل القراءات على
+        default (read_alias يرى المعاملة المفتوحة)، فيكفي عدّ اتصالات self.databases.
+        """
+        with ExitStack() as stack:
+            captured = [
+                stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in sorted(self.databases)
+            ]
+            response = request()
+        queries = [q["sql"] for c in captured for q in c.captured_queries]
+
+        self.assertLess(response.status_code, 300, f"{budget.name}: {response.status_code} {response.content[:300]!r}")
+        if len(queries) > budget.queries:
+            lines = [
+                f"{'+' if i >= budget.queries else ' '} {i + 1}. {sql}" for i, sql in enumerate(queries)
+            ]
+            self.fail(
+                f"{budget.name}: {len(queries)} queries, budget {budget.queries} "
+                f"(+{len(queries) - budget.queries}):\n" + "\n".join(lines)
+            )
+        self.assertLessEqual(
+            len(response.content), budget.max_bytes,
+            f"{budget.name}: {len(response.content)} bytes, budget {budget.max_bytes}",
+        )
+        return response
+
+    # ---------- الاختبارات ----------
+    def test_every_route_has_a_budget(self):
+        named = {p.name for p in api_urls.urlpatterns if getattr(p, "name", None)}
+        covered = {b.route for b in BUDGETS} | {TOKEN_REFRESH_BUDGET.route}
+        self.assertEqual(named - covered, set(), "routes without a budget in BUDGETS")
+
+    def test_route_budgets(self):
+        auth = {"Authorization": f"Bearer {self.access_token()['access']}"}
+        for budget in BUDGETS:
+            with self.subTest(budget.name):
+                cache.clear()
+                self.assertWithinBudget(budget, lambda: self.send(budget, auth if budget.auth else None))
+
+    def test_token_refresh_budget(self):
+        refresh = self.access_token()["refresh"]
+        blacklist_filter.reset()
+        self.addCleanup(blacklist_filter.reset)
+        blacklist_filter.might_contain("")  # الفلتر جاهز: الميزانية للحالة المستقرة لا لأول بناء
+        budget = TOKEN_REFRESH_BUDGET._replace(params={"refresh": refresh})
+        self.assertWithinBudget(budget, lambda: self.send(budget))
+
+    @override_settings(API_CACHE_ENABLED=True)
+    def test_cached_catalog_responses_skip_the_database(self):
+        cached = [b for b in BUDGETS if b.method == "get" and not b.auth]
+        for budget in cached:
+            with self.subTest(budget.name):
+                self.send(budget)
+                self.assertWithinBudget(budget._replace(queries=0), lambda: self.send(budget))
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES, API_CACHE_ENABLED=False, REQUEST_TIMING_ENABLED=True, METRICS_ENABLED=False,
+)
+class RequestTimingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalog(n=3)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_server_timing_header_and_log_line(self):
+        with self.assertLogs("api.requests", "INFO") as logs:
+            response = self.client.get(reverse("books-list"))
+
+        header = response["Server-Timing"]
+        for metric in ("db;dur=", "serialize;dur=", "render;dur=", "total;dur="):
+            self.assertIn(metric, header)
+        self.assertIn('desc="books-list"', header)
+
+        fields = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(fields["route"], "books-list")
+        self.assertEqual(fields["status"], 200)
+        self.assertEqual(fields["sql_count"], 3)  # = ميزانية "books list"
+        self.assertGreater(fields["serialize_ms"], 0)
+        self.assertGreaterEqual(fields["total_ms"], fields["sql_ms"] + fields["serialize_ms"])
+
+    @override_settings(REQUEST_TIMING_ENABLED=False, METRICS_ENABLED=False)
+    def test_disabled_middleware_leaves_the_chain(self):
+        response = self.client.get(reverse("books-list"))
+        self.assertNotIn("Server-Timing", response)
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalog(n=3)
+
+    def setUp(self):
+        self.metrics_dir = use_temp_metrics_dir(
+            self, CACHES=LOCMEM_CACHES, API_CACHE_ENABLED=True, REQUEST_TIMING_ENABLED=False,
+            METRICS_ENABLED=True, METRICS_FLUSH_INTERVAL=3600,
+        )
+        cache.clear()
+
+    def scrape(self, **headers):
+        response = self.client.get("/api/metrics", headers=headers)
+        return response, response.content.decode()
+
+    def test_requests_latency_queries_and_cache_ratio(self):
+        for _ in range(3):
+            self.client.get(reverse("books-list"))
+        self.client.get(reverse("books-detail", kwargs={"pk": 10 ** 9}))
+
+        response, text = self.scrape()
+        self.assertEqual(response["Content-Type"], CONTENT_TYPE)
+        self.assertIn('api_requests_total{route="books-list",method="GET",status="200"} 3', text)
+        self.assertIn('api_requests_total{route="books-detail",method="GET",status="404"} 1', text)
+        self.assertIn('api_request_duration_seconds_bucket{route="books-list",le="+Inf"} 3', text)
+        self.assertIn('api_request_duration_seconds_count{route="books-list"} 3', text)
+        # أول طلب يعدّ (3 استعلامات)، والطلبان التاليان من الكاش بلا استعلامات
+        self.assertIn('api_db_queries_bucket{route="books-list",le="0"} 2', text)
+        self.assertIn('api_db_queries_sum{route="books-list"} 3', text)
+        self.assertIn('api_cache_requests_total{cache="response",result="hit"} 2', text)
+        self.assertIn('api_cache_hit_ratio{cache="response"} 0.500000', text)
+
+    def test_snapshots_of_other_workers_are_summed(self):
+        other = MetricsStore(self.metrics_dir, flush_interval=3600)
+        other.inc("api_requests_total", (("route", "books-list"), ("method", "GET"), ("status", "200")), 5)
+        other.flush()
+        self.client.get(reverse("books-list"))
+
+        _, text = self.scrape()
+        self.assertIn('api_requests_total{route="books-list",method="GET",status="200"} 6', text)
+        self.assertIn("api_metrics_processes 2", text)
+
+    def test_token_is_required_when_configured(self):
+        with self.settings(METRICS_TOKEN="secret"):
+            self.assertEqual(self.scrape()[0].status_code, 403)
+            self.assertEqual(self.scrape(Authorization="Bearer secret")[0].status_code, 200)
+            for wrong in ("Bearer secreT", "Bearer secret2", "secret", "Bearer سر"):
+                with self.subTest(wrong):
+                    self.assertEqual(self.scrape(Authorization=wrong)[0].status_code, 403)
+            with mock.patch("api.metrics.hmac.compare_digest", wraps=hmac.compare_digest) as compare:
+                self.scrape(Authorization="Bearer secret")
+            compare.assert_called_once_with(b"Bearer secret", b"Bearer secret")
+
+    def test_without_token_only_direct_loopback_requests(self):
+        self.assertEqual(self.scrape()[0].status_code, 200)  # عميل الاختبار: 127.0.0.1
+        self.assertEqual(self.client.get("/api/metrics", REMOTE_ADDR="203.0.113.7").status_code, 403)
+        self.assertEqual(self.scrape(**{"X-Forwarded-For": "203.0.113.7"})[0].status_code, 403)
+
+    def test_concurrent_flushes_from_threads(self):
+        store = MetricsStore(self.metrics_dir, flush_interval=0)
+        labels = (("route", "books-list"), ("method", "GET"), ("status", "200"))
+        errors = []
+
+        def work():
+            try:
+                for _ in range(300):
+                    store.inc("api_requests_total", labels)
+            except Exception as exc:  # os.replace لملف مؤقت مشترك كان يرفع FileNotFoundError
+                errors.append(exc)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        store.flush()
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(os.listdir(self.metrics_dir)), [os.path.basename(store.path)])
+        _, text = self.scrape()
+        self.assertIn('api_requests_total{route="books-list",method="GET",status="200"} 2400', text)
+
+    def test_snapshots_of_exited_workers_are_archived(self):
+        child = subprocess.Popen([sys.executable, "-c", ""])
+        child.wait()
+        exited = MetricsStore(self.metrics_dir, flush_interval=3600)
+        exited.path = os.path.join(self.metrics_dir, f"{child.pid}-exited.json")
+        exited.inc("api_requests_total", (("route", "books-list"), ("method", "GET"), ("status", "200")), 5)
+        exited.flush()
+        self.client.get(reverse("books-list"))
+
+        for _ in range(2):  # الدمج مرة واحدة: القراءة الثانية لا تضاعف العدّ
+            _, text = self.scrape()
+            self.assertIn('api_requests_total{route="books-list",method="GET",status="200"} 6', text)
+            self.assertIn("api_metrics_processes 1", text)
+        self.assertFalse(os.path.exists(exited.path))
+        self.assertTrue(os.path.exists(os.path.join(self.metrics_dir, "archive.json")))
+
+
+class SlowQueryLogTests(TestCase):
+    databases = {"default"}
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalog(n=3)
+
+    def setUp(self):
+        # المقاييس تُبقي RequestTimingMiddleware في السلسلة (اسم الـ view) بلا سطور سجل الطلبات
+        use_temp_metrics_dir(
+            self, CACHES=LOCMEM_CACHES, API_CACHE_ENABLED=False, REQUEST_TIMING_ENABLED=False,
+            METRICS_ENABLED=True,
+        )
+        slowqueries.install_slow_query_log(connections["default"])
+        slowqueries._plans.clear()
+
+    @contextmanager
+    def capture(self):
+        """كل استعلام "بطيء" داخل الكتلة فقط، فلا يُكتب شيء في ملف السجل الحقيقي."""
+        with self.settings(SLOW_QUERY_MS=0.000001), self.assertLogs("api.slow_queries", "WARNING") as logs:
+            yield logs
+
+    def test_slow_queries_are_logged_with_view_and_plan(self):
+        with self.capture() as logs:
+            self.client.get(reverse("books-list"), {"q": "كتاب 1"})
+
+        entries = [json.loads(record.getMessage()) for record in logs.records]
+        self.assertEqual({e["view"] for e in entries}, {"books-list"})
+        for entry in entries:
+            self.assertEqual(entry["fingerprint"], slowqueries.fingerprint(entry["sql"]))
+            self.assertTrue(entry["plan"])
+            self.assertNotIn("كتاب", json.dumps(entry, ensure_ascii=False))  # المعاملات كبصمة فقط
+
+    def test_explain_runs_after_the_response_outside_the_timings(self):
+        explained_in = []
+
+        def explain(*args):
+            explained_in.append(instrumentation._current.get())
+            return real_explain(*args)
+
+        real_explain = slowqueries.explain
+        with mock.patch.object(slowqueries, "explain", side_effect=explain), self.capture() as logs:
+            with self.settings(REQUEST_TIMING_ENABLED=True), self.assertLogs("api.requests", "INFO"):
+                response = self.client.get(reverse("books-list"))
+        self.assertIn("serialize;dur=", response["Server-Timing"])
+        self.assertTrue(explained_in)
+        self.assertEqual(set(explained_in), {None})  # لا طلب جارٍ: بعد إغلاق الاستجابة
+        entries = [json.loads(record.getMessage()) for record in logs.records]
+        self.assertEqual({e["view"] for e in entries}, {"books-list"})  # الـ view مأخوذ وقت الاستعلام
+        self.assertTrue(all(e["plan"] for e in entries))
+
+    def test_fingerprint_ignores_literals_and_in_list_length(self):
+        self.assertEqual(
+            slowqueries.fingerprint("SELECT * FROM t WHERE id IN (%s, %s) AND slug = 'a'"),
+            slowqueries.fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s) AND slug = 'bb'"),
+        )
+
+    def test_summary_command_groups_by_fingerprint(self):
+        with self.capture() as logs:
+            for _ in range(2):
+                self.client.get(reverse("books-list"))
+        fd, path = tempfile.mkstemp(suffix=".log")
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write("\n".join(record.getMessage() for record in logs.records) + "\nnot json\n")
+
+        out = io.StringIO()
+        call_command("slow_queries", path, "--json", stdout=out)
+        summary = json.loads(out.getvalue())
+        self.assertEqual(sum(row["count"] for row in summary), len(logs.records))
+        self.assertTrue(all(row["count"] == 2 for row in summary))
+        self.assertEqual(summary[0]["views"], {"books-list": 2})
+
+    def test_summary_reads_compressed_rotations(self):
+        with self.capture() as logs:
+            self.client.get(reverse("books-list"))
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, "slow.log")
+        lines = [record.getMessage() for record in logs.records]
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write("\n".join(lines) + "\n")
+        with gzip.open(f"{path}.1.gz", "wt", encoding="utf-8") as fh:
+            fh.write("\n".join(lines) + "\n")
+
+        out = io.StringIO()
+        with self.settings(SLOW_QUERY_LOG_FILE=path):
+            call_command("slow_queries", "--json", stdout=out)
+        self.assertEqual(sum(row["count"] for row in json.loads(out.getvalue())), 2 * len(lines))
+
+
+@override_settings(CACHES=LOCMEM_CACHES, API_CACHE_ENABLED=True, REQUEST_TIMING_ENABLED=False, METRICS_ENABLED=False)
+class HomeTests(TestCase):
+    databases = {"default"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.books, _ = seed_catalog(n=15)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_sections_match_the_featured_lists(self):
+        data = self.client.get(reverse("home")).json()
+        for section, route in (("courses_recorded", "courses-recorded-list"), ("books", "books-list")):
+            featured = self.client.get(reverse(route), {"featured": "1"}).json()["results"]
+            self.assertEqual(data[section], featured[:6])
+        latest = self.client.get(reverse("article-list")).json()["results"]
+        self.assertEqual(data["articles"], latest[:6])
+
+    def test_section_sizes(self):
+        data = self.client.get(reverse("home"), {"limit": 1, "tools": 2, "articles": 0, "books": "x"}).json()
+        self.assertEqual(
+            {name: len(items) for name, items in data.items()},
+            {"courses_recorded": 1, "courses_onsite": 1, "books": 1, "tools": 2, "articles": 0},
+        )
+
+    def test_content_save_invalidates_the_cached_response(self):
+        self.client.get(reverse("home"))
+        with self.assertNumQueries(0):
+            self.client.get(reverse("home"))
+
+        book = self.books[1]  # غير مميّز
+        book.is_featured = True
+        with self.captureOnCommitCallbacks(execute=True):  # الإبطال بعد الـ commit
+            book.save()
+        data = self.client.get(reverse("home")).json()
+        self.assertIn(book.pk, [item["id"] for item in data["books"]])
+
+
+@override_settings(CACHES=LOCMEM_CACHES, API_CACHE_ENABLED=False, REQUEST_TIMING_ENABLED=False, METRICS_ENABLED=False)
+class CursorPaginationTests(TestCase):
+    databases = {"default"}
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        # قيم مكرّرة و NULL في published_at (الحقل الأول في cursor_ordering للمقالات)
+        published = [now - timedelta(hours=1), now - timedelta(hours=1), None, None,
+                     now - timedelta(hours=2), now - timedelta(hours=3), None]
+        for i, published_at in enumerate(published, 1):
+            Article.objects.create(
+                title=f"مقال {i}", slug=f"cursor-{i}", content="<p>نص</p>",
+                is_published=True, published_at=published_at,
+            )
+        Article.objects.create(title="مسودة", slug="cursor-draft", content="-", is_published=False)
+
+    def expected(self, *ordering):
+        return list(Article.objects.filter(is_published=True).order_by(*ordering).values_list("id", flat=True))
+
+    def walk(self, page_size):
+        """يتبع روابط next من أول صفحة: (المعرّفات بالترتيب، عدد الصفحات)."""
+        ids, pages = [], 0
+        url, params = reverse("article-list"), {"cursor": "", "page_size": page_size}
+        while url:
+            body = self.client.get(url, params).json()
+            self.assertIsNone(body["previous"])
+            self.assertLessEqual(len(body["results"]), page_size)
+            ids += [item["id"] for item in body["results"]]
+            url, params, pages = body["next"], None, pages + 1
+        return ids, pages
+
+    def test_walk_matches_the_ordering_across_null_published_at(self):
+        expected = self.expected("-published_at", "-created_at", "-id")
+        self.assertIsNone(Article.objects.get(pk=expected[-1]).published_at)  # NULL في الآخر تنازليًا
+        for page_size in (1, 2, 3, 4):
+            with self.subTest(page_size=page_size):
+                self.assertEqual(self.walk(page_size)[0], expected)
+
+    def test_page_boundary(self):
+        self.assertEqual(self.walk(7), (self.expected("-published_at", "-created_at", "-id"), 1))
+        ids, pages = self.walk(6)
+        self.assertEqual((len(ids), pages), (7, 2))
+
+    def test_ascending_ordering_puts_nulls_first(self):
+        paginator = StandardResultsSetPagination()
+        view = SimpleNamespace(cursor_ordering=("published_at", "id"))
+        queryset = Article.objects.filter(is_published=True)
+        ids, token = [], ""
+        while token is not None:
+            request = Request(RequestFactory().get("/", {"cursor": token, "page_size": 2}))
+            ids += [obj.id for obj in paginator.paginate_queryset(queryset, request, view=view)]
+            link = paginator.next_cursor_link
+            token = parse_qs(urlparse(link).query)["cursor"][0] if link else None
+        self.assertEqual(ids, self.expected("published_at", "id"))
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get(reverse("article-list"), {"cursor": "bm90LWpzb24"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_is_rejected_with_relevance_search(self):
+        response = self.client.get(reverse("article-list"), {"cursor": "", "q": "مقال"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("cursor", response.json())
+        # بلا مؤشر يبقى البحث مرقّمًا بالصفحات، وبلا q يعمل المؤشر كما هو
+        self.assertEqual(self.client.get(reverse("article-list"), {"q": "مقال"}).json()["count"], 7)
+        self.assertEqual(self.client.get(reverse("article-list"), {"cursor": "", "q": ""}).status_code, 200)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, API_CACHE_ENABLED=True, REQUEST_TIMING_ENABLED=False, METRICS_ENABLED=False)
+class ResponseCacheInvalidationTests(TestCase):
+    databases = {"default"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.books, _ = seed_catalog(n=3)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_generation_is_bumped_after_commit_not_inside_the_transaction(self):
+        before = get_generations([Book])
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.books[0].save()
+            # قارئ قبل الـ commit يرى الجيل القديم، فما يخزّنه يصبح يتيمًا بعد الرفع
+            self.assertEqual(get_generations([Book]), before)
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertNotEqual(get_generations([Book]), before)
+
+    def test_saved_edit_is_visible_on_the_next_request(self):
+        url = reverse("books-detail", kwargs={"pk": self.books[0].pk})
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.books[0].delete()
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_every_bump_writes_a_new_generation(self):
+        seen = set(get_generations([Book]))
+        for _ in range(5):
+            bump_generation(Book)
+            seen.update(get_generations([Book]))
+        self.assertEqual(len(seen), 6)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, API_CACHE_ENABLED=True, REQUEST_TIMING_ENABLED=False, METRICS_ENABLED=False)
+class ConditionalGetTests(TestCase):
+    databases = {"default"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.books, _ = seed_catalog(n=3)
+
+    def setUp(self):
+        cache.clear()
+        self.detail = reverse("courses-recorded-detail", kwargs={"slug": "recorded-1"})
+        self.list = reverse("books-list")
+
+    def assertNotModified(self, url, **headers):
+        response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertIn("no-cache", response["Cache-Control"])
+        return response
+
+    def test_detail_if_none_match(self):
+        etag = self.client.get(self.detail)["ETag"]
+        with self.assertNumQueries(0):  # من الكاش
+            self.assertEqual(self.assertNotModified(self.detail, if_none_match=etag)["ETag"], etag)
+        with self.settings(API_CACHE_ENABLED=False), self.assertNumQueries(1):  # عمود updated_at فقط
+            self.assertNotModified(self.detail, if_none_match=f'"other", {etag}')
+
+    def test_detail_if_modified_since(self):
+        response = self.client.get(self.detail)
+        last_modified = response["Last-Modified"]
+        self.assertNotModified(self.detail, if_modified_since=last_modified)
+        earlier = http_date(parse_http_date(last_modified) - 3600)
+        self.assertEqual(self.client.get(self.detail, headers={"if_modified_since": earlier}).status_code, 200)
+
+    def test_if_none_match_takes_precedence_over_if_modified_since(self):
+        last_modified = self.client.get(self.detail)["Last-Modified"]
+        response = self.client.get(self.detail, headers={"if_none_match": '"stale"', "if_modified_since": last_modified})
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_edit_changes_the_etag(self):
+        etag = self.client.get(self.detail)["ETag"]
+        course = CourseRecorded.objects.get(slug="recorded-1")
+        course.title = "عنوان جديد"
+        with self.captureOnCommitCallbacks(execute=True):
+            course.save()
+        response = self.client.get(self.detail, headers={"if_none_match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_list_if_none_match_and_delete(self):
+        etag = self.client.get(self.list)["ETag"]
+        self.assertNotModified(self.list, if_none_match=etag)
+        with self.settings(API_CACHE_ENABLED=False):
+            self.assertNotModified(self.list, if_none_match=etag)
+        # الحذف لا يغيّر max(updated_at) لكن يغيّر العدد
+        with self.captureOnCommitCallbacks(execute=True):
+            self.books[0].delete()
+        self.assertEqual(self.client.get(self.list, headers={"if_none_match": etag}).status_code, 200)
+
+    def test_list_has_no_last_modified(self):
+        # max(updated_at) لا يلتقط الحذف، فالقائمة بـ ETag فقط و If-Modified-Since وحده لا يعطي 304
+        response = self.client.get(self.list)
+        self.assertNotIn("Last-Modified", response)
+        future = http_date(time.time() + 3600)
+        self.assertEqual(self.client.get(self.list, headers={"if_modified_since": future}).status_code, 200)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, API_CACHE_ENABLED=True, REQUEST_TIMING_ENABLED=False, METRICS_ENABLED=False)
+class MeCacheTests(TestCase):
+    databases = {"default"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="me", email="me@example.com", password=PASSWORD)
+        cls.profile = UserProfile.objects.create(user=cls.user, display_name="قبل")
+
+    def setUp(self):
+        cache.clear()
+        self.auth = {"Authorization": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+
+    def me(self):
+        return self.client.get(reverse("me"), headers=self.auth).json()["me"]
+
+    def test_profile_edit_invalidates_after_commit(self):
+        self.assertEqual(self.me()["profile"]["display_name"], "قبل")
+        self.profile.display_name = "بعد"
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.profile.save()
+            # داخل المعاملة: الحمولة المخزّنة باقية، فلا يعيد قارئ متزامن تخزين الصف القديم بعد الحذف
+            self.assertIsNotNone(cache.get(me_cache_key(self.user.pk)))
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(cache.get(me_cache_key(self.user.pk)))
+        self.assertEqual(self.me()["profile"]["display_name"], "بعد")
+
+    def test_last_login_update_keeps_the_cached_payload(self):
+        self.me()
+        self.user.last_login = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(update_fields=["last_login"])
+        self.assertIsNotNone(cache.get(me_cache_key(self.user.pk)))
+
+
+@override_settings(REQUEST_TIMING_ENABLED=False, METRICS_ENABLED=False)
+class UserLookupIndexTests(TestCase):
+    databases = {"default"}
+
+    def test_login_lookup_uses_the_lower_indexes(self):
+        # على قاعدة جديدة: 0009 يجري بعد آخر ترحيل لـ auth فلا يُعاد بناء الجدول بعد إنشاء الفهارس
+        plan = users_by_identifier(get_user_model().objects.all(), "Someone@Example.com").explain()
+        self.assertIn("user_email_lower_idx", plan)
+        self.assertIn("user_username_lower_idx", plan)
+
+
+@override_settings(
+    REQUEST_TIMING_ENABLED=False, METRICS_ENABLED=False,
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class UsernameAllocationTests(TestCase):
+    databases = {"default"}
+
+    @classmethod
+    def setUpTestData(cls):
+        for username in ("sara", "Sara2", "sara3", "sarah", "omar", "omar3"):
+            get_user_model().objects.create_user(username=username)
+
+    def test_next_free_username(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(next_free_username("sara"), "sara4")  # sarah لا يحجز لاحقة
+        self.assertEqual(next_free_username("SARA"), "SARA4")  # المقارنة بدون حالة الأحرف
+        self.assertEqual(next_free_username("omar"), "omar2")  # أول فجوة
+        self.assertEqual(next_free_username("nour"), "nour")
+        self.assertEqual(next_free_username("nour", exclude={"nour"}), "nour2")
+
+    def test_integrity_error_retries_with_the_next_suffix(self):
+        allocate = next_free_username
+
+        def racing(base, exclude=()):
+            username = allocate(base, exclude)
+            if not exclude:  # تسجيل متزامن يأخذ الاسم بين الاختيار والإدخال
+                get_user_model().objects.create_user(username=username)
+            return username
+
+        with mock.patch("api.serializers.next_free_username", side_effect=racing) as allocator:
+            user = create_user_with_free_username("layla", email="layla@example.com", password=PASSWORD)
+        self.assertEqual(user.username, "layla2")
+        self.assertEqual(allocator.call_count, 2)
+        self.assertTrue(user.check_password(PASSWORD))
+
+    def test_gives_up_after_the_allowed_attempts(self):
+        with mock.patch("api.serializers.next_free_username", return_value="sara") as allocator:
+            with self.assertRaises(ValidationError):
+                create_user_with_free_username("sara", email="x@example.com")
+        self.assertEqual(allocator.call_count, USERNAME_ALLOCATION_ATTEMPTS)
+        # كل محاولة داخل savepoint: المعاملة الخارجية ما زالت صالحة
+        self.assertFalse(get_user_model().objects.filter(email="x@example.com").exists())
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES, TOKEN_BLACKLIST_FILTER_BUILD_CHUNK=2, REQUEST_TIMING_ENABLED=False, METRICS_ENABLED=False,
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class BlacklistFilterTests(TestCase):
+    databases = {"default"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="bl", email="bl@example.com", password=PASSWORD)
+
+    def setUp(self):
+        cache.clear()
+        blacklist_filter.reset()
+        self.addCleanup(blacklist_filter.reset)
+
+    def blacklisted(self, n=1):
+        tokens = [RefreshToken.for_user(self.user) for _ in range(n)]
+        with self.captureOnCommitCallbacks(execute=True):
+            for token in tokens:
+                token.blacklist()
+        return tokens
+
+    def warm(self):
+        for _ in range(20):
+            blacklist_filter.might_contain("")
+            if blacklist_filter._bloom is not None:
+                return
+        self.fail("filter never finished building")
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(500)
+        jtis = [f"jti-{i}" for i in range(500)]
+        for jti in jtis:
+            bloom.add(jti)
+        self.assertTrue(all(jti in bloom for jti in jtis))
+        self.assertLess(sum(f"other-{i}" in bloom for i in range(5000)), 50)
+
+    def test_build_advances_one_chunk_per_check(self):
+        tokens = self.blacklisted(5)
+        # 5 صفوف بدفعات 2: قاعدة البيانات تجيب حتى يكتمل الفلتر
+        for queries in (2, 1):  # بدء البناء (max id) + دفعة، ثم دفعة
+            with self.assertNumQueries(queries):
+                self.assertTrue(blacklist_filter.might_contain("clean"))
+            self.assertIsNone(blacklist_filter._bloom)
+        with self.assertNumQueries(2):  # آخر دفعة + التحديث التزايدي
+            self.assertFalse(blacklist_filter.might_contain("clean"))
+        self.assertTrue(all(blacklist_filter.might_contain(t["jti"]) for t in tokens))
+
+    def test_clean_token_check_skips_the_database(self):
+        self.blacklisted(3)
+        token = RefreshToken.for_user(self.user)
+        self.warm()
+        with self.assertNumQueries(0):
+            self.assertFalse(blacklist_filter.might_contain(token["jti"]))
+
+    def test_blacklist_written_by_another_worker_is_seen_immediately(self):
+        token = RefreshToken.for_user(self.user)
+        self.warm()
+        self.assertFalse(blacklist_filter.might_contain(token["jti"]))
+        # عامل آخر: صف في قاعدة البيانات فقط، لا شيء في فلتر هذه العملية
+        with self.captureOnCommitCallbacks(execute=True):
+            BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=token["jti"]))
+        response = self.client.post(reverse("token_refresh"), {"refresh": str(token)}, content_type="application/json")
+        self.assertEqual(response.status_code, 401)
+
+    def test_rotation_blacklists_the_old_token(self):
+        token = RefreshToken.for_user(self.user)
+        self.warm()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("token_refresh"), {"refresh": str(token)}, content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.json()["refresh"], str(token))
+        replay = self.client.post(reverse("token_refresh"), {"refresh": str(token)}, content_type="application/json")
+        self.assertEqual(replay.status_code, 401)
+
+    def test_lower_id_row_after_the_watermark_is_seen(self):
+        high, late, reused = (RefreshToken.for_user(self.user) for _ in range(3))
+        outstanding = lambda token: OutstandingToken.objects.get(jti=token["jti"])
+        with self.captureOnCommitCallbacks(execute=True):
+            BlacklistedToken.objects.create(pk=100, token=outstanding(high))
+        self.warm()
+        self.assertEqual(blacklist_filter._watermark, 100)
+        count = blacklist_filter._bloom.count
+
+        # commit متأخر لمعاملة بدأت قبل آخر قراءة (id أصغر، blacklisted_at قبلها بقليل)،
+        # ثم rowid أعيد استعماله بعد الحذف: كلاهما تحت الـ watermark
+        with self.captureOnCommitCallbacks(execute=True):
+            BlacklistedToken.objects.create(pk=40, token=outstanding(late))
+            BlacklistedToken.objects.filter(pk=40).update(blacklisted_at=timezone.now() - timedelta(seconds=5))
+        self.assertTrue(blacklist_filter.might_contain(late["jti"]))
+        with self.captureOnCommitCallbacks(execute=True):
+            BlacklistedToken.objects.create(pk=50, token=outstanding(reused))
+        self.assertTrue(blacklist_filter.might_contain(reused["jti"]))
+        response = self.client.post(reverse("token_refresh"), {"refresh": str(reused)}, content_type="application/json")
+        self.assertEqual(response.status_code, 401)
+
+        # النافذة تعيد قراءة الصفوف المعروفة بدون تضخيم العدد (ولا إعادة بناء مبكرة)
+        bump_generation(BlacklistedToken)
+        blacklist_filter.might_contain("clean")
+        self.assertEqual(blacklist_filter._bloom.count, count + 2)
+        self.assertEqual(blacklist_filter._watermark, 100)
+
+    @override_settings(TOKEN_BLACKLIST_FILTER_REBUILD=0)
+    def test_periodic_rebuild_keeps_answering_from_the_old_filter(self):
+        tokens = self.blacklisted(5)
+        self.warm()
+        old = blacklist_filter._bloom
+        with self.assertNumQueries(2):  # بدء البناء + دفعة واحدة، لا تحميل القائمة كلها
+            self.assertFalse(blacklist_filter.might_contain("clean"))
+        self.assertIs(blacklist_filter._bloom, old)
+        self.assertTrue(all(blacklist_filter.might_contain(t["jti"]) for t in tokens))
+
+
+@override_settings(REQUEST_TIMING_ENABLED=False, METRICS_ENABLED=False)
+class PruneTokenBlacklistTests(TestCase):
+    databases = {"default"}
+
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create_user(username="prune", email="prune@example.com")
+        now = timezone.now()
+
+        def outstanding(jti, expires_at):
+            return OutstandingToken.objects.create(
+                user=user, jti=jti, token=jti, created_at=now - timedelta(days=200), expires_at=expires_at,
+            )
+
+        for i in range(3):
+            BlacklistedToken.objects.create(token=outstanding(f"old-bl-{i}", now - timedelta(days=1)))
+        outstanding("old", now - timedelta(days=1))
+        BlacklistedToken.objects.create(token=outstanding("live-bl", now + timedelta(days=1)))
+        outstanding("live", now + timedelta(days=1))
+
+    def prune(self, **options):
+        out = io.StringIO()
+        call_command("prune_token_blacklist", stdout=out, **options)
+        return out.getvalue()
+
+    def test_deletes_expired_tokens_in_batches(self):
+        output = self.prune(batch_size=2)
+        self.assertIn("Pruned 4 outstanding and 3 blacklisted tokens.", output)
+        self.assertEqual(
+            set(OutstandingToken.objects.values_list("jti", flat=True)), {"live-bl", "live"},
+        )
+        self.assertEqual(list(BlacklistedToken.objects.values_list("token__jti", flat=True)), ["live-bl"])
+
+    def test_dry_run_only_counts(self):
+        self.assertIn("Would delete 4 outstanding and 3 blacklisted tokens.", self.prune(dry_run=True))
+        self.assertEqual(OutstandingToken.objects.count(), 6)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES, HASHING_THROTTLE_RATES={"ip": "2/min"}, REQUEST_TIMING_ENABLED=False, METRICS_ENABLED=False,
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class HashingAdmissionTests(TestCase):
+    databases = {"default"}
+
+    def setUp(self):
+        cache.clear()
+        lock_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, lock_dir, ignore_errors=True)
+        overrides = override_settings(HASHING_LOCK_DIR=lock_dir, HASHING_MAX_CONCURRENCY=1, HASHING_SLOT_WAIT=0.1)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def login(self):
+        return self.client.post(
+            reverse("token_obtain_pair"), {"username": "nobody@example.com", "password": "wrong"},
+            content_type="application/json",
+        )
+
+    def test_token_bucket_refills(self):
+        request = RequestFactory().post("/", REMOTE_ADDR="10.0.0.1")
+        throttle = HashingIPThrottle()
+        now = time.time()
+        throttle.timer = lambda: now
+        self.assertEqual([throttle.allow_request(request, None) for _ in range(3)], [True, True, False])
+        self.assertAlmostEqual(throttle.wait(), 30, places=3)  # 2/min: رمز كل 30 ثانية
+
+        throttle.timer = lambda: now + 29
+        self.assertFalse(throttle.allow_request(request, None))
+        throttle.timer = lambda: now + 31
+        self.assertTrue(throttle.allow_request(request, None))
+        self.assertFalse(throttle.allow_request(request, None))
+        # دلو منفصل لكل IP
+        self.assertTrue(throttle.allow_request(RequestFactory().post("/", REMOTE_ADDR="10.0.0.2"), None))
+
+    def test_empty_bucket_returns_429_with_retry_after(self):
+        self.assertEqual([self.login().status_code for _ in range(2)], [400, 400])
+        response = self.login()
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(29 <= int(response["Retry-After"]) <= 30)
+
+    def test_busy_slots_return_429_after_waiting(self):
+        with hashing_slot():
+            started = time.monotonic()
+            response = self.login()
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "1")
+        with self.assertRaises(Throttled), hashing_slot(), hashing_slot():
+            pass
+
+    @override_settings(HASHING_SLOT_WAIT=5)
+    def test_waits_for_a_slot_to_free_up(self):
+        acquired, release = threading.Event(), threading.Event()
+
+        def hold():
+            with hashing_slot():
+                acquired.set()
+                release.wait(5)
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        self.addCleanup(holder.join)
+        self.addCleanup(release.set)
+        acquired.wait(5)
+        threading.Timer(0.1, release.set).start()
+        self.assertEqual(self.login().status_code, 400)  # حصل على الخانة بعد تحريرها، لا 429
+
+
+@override_settings(CACHES=LOCMEM_CACHES, API_CACHE_ENABLED=False, REQUEST_TIMING_ENABLED=False, METRICS_ENABLED=False)
+class AsyncCatalogViewTests(TestCase):
+    databases = {"default"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.books, _ = seed_catalog(n=3)
+
+    def setUp(self):
+        cache.clear()
+        for patcher in (
+            mock.patch.object(async_views, "_warm_aliases", set()),
+            mock.patch.object(search, "_available_aliases", set()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def call(self, view_class, path, **kwargs):
+        async_class = async_views.AsyncDetailView if "pk" in kwargs else async_views.AsyncListView
+        response = await async_class.as_view(view_class=view_class)(AsyncRequestFactory().get(path), **kwargs)
+        return response.status_code, json.loads(response.content)
+
+    async def test_list_and_detail_match_the_sync_views(self):
+        book = self.books[0]
+        for view_class, path, kwargs in (
+            (BookListView, reverse("books-list"), {}),
+            (BookDetailView, reverse("books-detail", kwargs={"pk": book.pk}), {"pk": book.pk}),
+        ):
+            with self.subTest(path):
+                expected = await self.async_client.get(path)
+                self.assertEqual(await self.call(view_class, path, **kwargs), (200, expected.json()))
+
+    async def test_missing_detail_returns_404(self):
+        status, _ = await self.call(BookDetailView, "/api/books/0/", pk=0)
+        self.assertEqual(status, 404)
+
+    async def test_article_search_uses_the_index_resolved_by_warmup(self):
+        status, data = await self.call(ArticleListView, "/api/articles/?q=القيادة")
+        self.assertEqual(status, 200)
+        self.assertEqual(data["count"], 2)  # المقال الثالث غير منشور
+        self.assertIn("default", search._available_aliases)
+
+    async def test_article_search_without_the_index_stays_async_safe(self):
+        # بدون جدول FTS لا يُخزَّن شيء: البحث لا يستعلم sqlite_master داخل الحلقة بل يعود لـ icontains
+        with mock.patch.object(search, "SEARCH_FTS_TABLE", "api_missing_fts"):
+            status, data = await self.call(ArticleListView, "/api/articles/?q=القيادة")
+        self.assertEqual(status, 200)
+        self.assertEqual(data["count"], 2)
+        self.assertNotIn("default", search._available_aliases)
+
+
+@override_settings(REQUEST_TIMING_ENABLED=False, METRICS_ENABLED=False)
+class SeedCommandTests(TestCase):
+    databases = {"default"}
+
+    def seed(self, command, **options):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command(command, stdout=io.StringIO(), **options)
+
+    def indexed(self, kind, pk):
+        with connections["default"].cursor() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*) FROM {search.SEARCH_FTS_TABLE} WHERE rowid = %s", [search.search_rowid(kind, pk)],
+            )
+            return cursor.fetchone()[0]
+
+    def test_demo_content_is_idempotent_and_derived(self):
+        before = get_generations([Book, Tool])
+        self.seed("seed_demo_content")
+        self.seed("seed_demo_content")
+        self.assertEqual((Book.objects.count(), Tool.objects.count()), (5, 5))
+        self.assertTrue(all(self.indexed("book", pk) for pk in Book.objects.values_list("pk", flat=True)))
+        self.assertTrue(KeywordTag.objects.filter(keyword="python").exists())
+        self.assertEqual(search.search_catalog("Kleppmann").count(), 1)
+        self.assertNotEqual(get_generations([Book, Tool]), before)
+
+    def test_refresh_is_limited_to_the_seeded_rows(self):
+        other = Book.objects.create(title="غير مبذور", keywords=["x"])
+        search.unindex_object(Book, other.pk)
+        self.seed("seed_demo_content")
+        self.assertEqual(self.indexed("book", other.pk), 0)  # لا إعادة بناء للفهرس كله
+
+    def test_ambiguous_match_is_rejected_without_changes(self):
+        for _ in range(2):
+            Book.objects.create(title="Clean Code", author_name="قديم")
+        with self.assertRaises(Book.MultipleObjectsReturned):
+            self.seed("seed_demo_content")
+        self.assertEqual(Book.objects.count(), 2)
+        self.assertFalse(Tool.objects.exists())
+
+    def test_synthetic_content_refreshes_each_batch(self):
+        self.seed("generate_synthetic_content", scale=3, batch_size=2)
+        self.seed("generate_synthetic_content", scale=3, batch_size=2)
+        articles = list(Article.objects.values_list("pk", flat=True))
+        self.assertEqual(len(articles), 3)
+        self.assertTrue(all(self.indexed("article", pk) for pk in articles))
+        self.assertEqual(RenderedPayload.objects.count(), 3 * 3)  # مقالات وكورسات مسجّلة وحضورية
+
+
+@override_settings(CACHES=LOCMEM_CACHES, API_CACHE_ENABLED=False, REQUEST_TIMING_ENABLED=False, METRICS_ENABLED=False)
+class SearchRankingTests(TestCase):
+    databases = {"default"}
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        # الأحدث يطابق في المتن فقط: الترتيب بالتاريخ وحده يضعه أولًا
+        cls.body_hit = Article.objects.create(
+            title="مقال عام", slug="body-hit", excerpt="مقتطف", content="<p>الفلسفة</p>",
+            is_published=True, published_at=now,
+        )
+        cls.title_hit = Article.objects.create(
+            # عنوان طويل ومتن قصير المطابقة: بأوزان متساوية يتقدّم مقال المتن (تطبيع الطول في bm25)
+            title="مدخل موسع إلى الفلسفة وتاريخها ومدارسها الكبرى عبر العصور", slug="title-hit",
+            excerpt="مقتطف", content="<p>نص عادي</p>",
+            is_published=True, published_at=now - timedelta(days=3),
+        )
+
+    def test_bm25_weights_follow_the_column_order(self):
+        self.assertEqual(search._bm25(), f"bm25({search.SEARCH_FTS_TABLE}, 0.0, 0.0, 10.0, 4.0, 1.0)")
+
+    def test_title_hit_ranks_above_body_only_hit(self):
+        hits = search.search_catalog("فلسفة")[:10]
+        self.assertEqual([pk for _, pk, _ in hits], [self.title_hit.pk, self.body_hit.pk])
+        self.assertLess(hits[0][2], hits[1][2])  # bm25 الأقل = الأفضل
+
+        slugs = [a["slug"] for a in self.client.get(reverse("article-list"), {"q": "فلسفة"}).json()["results"]]
+        self.assertEqual(slugs, ["title-hit", "body-hit"])
+        results = self.client.get(reverse("search"), {"q": "فلسفة"}).json()["results"]
+        self.assertEqual([r["item"]["slug"] for r in results], ["title-hit", "body-hit"])
+
+
+@override_settings(CACHES=LOCMEM_CACHES, API_CACHE_ENABLED=False, REQUEST_TIMING_ENABLED=False, METRICS_ENABLED=False)
+class ArticleSearchTests(TestCase):
+    databases = {"default"}
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        for slug, title, excerpt, content, hours in (
+            ("excerpt-hit", "ملاحظات أسبوعية", "عن التَّخطيط الاستراتيجي", "<p>نص</p>", 1),
+            ("title-hit", "التخطيط الاستراتيجي للمؤسسات", "مقتطف", "<p>نص</p>", 48),
+            ("other", "موضوع آخر", "مقتطف", "<p>لا علاقة</p>", 2),
+        ):
+            Article.objects.create(
+                title=title, slug=slug, excerpt=excerpt, content=content, is_published=True,
+                published_at=now - timedelta(hours=hours),
+            )
+
+    def slugs(self, q):
+        response = self.client.get(reverse("article-list"), {"q": q})
+        self.assertEqual(response.status_code, 200)
+        return [a["slug"] for a in response.json()["results"]]
+
+    def test_normalize_text(self):
+        for raw, expected in (
+            ("مُحَمَّدٌ", "محمد"),                       # التشكيل
+            ("العـــربية", "عربيه"),                     # التطويل + ال + التاء المربوطة
+            ("أحمد إسلام آمن ٱسم", "احمد اسلام امن اسم"),  # الألف والهمزات
+            ("مؤتمر شاطئ مستشفى", "موتمر شاطي مستشفي"),   # الهمزة على الواو/الياء، الألف المقصورة
+            ("والكتاب بالقلم للطالب", "كتاب قلم طالب"),     # أداة التعريف وما يلتصق بها
+            ("الم", "الم"),                               # لا حذف إن بقي أقل من حرفين
+            ("Python ﬁle", "python file"),               # NFKC + casefold
+        ):
+            with self.subTest(raw):
+                self.assertEqual(search.normalize_text(raw), expected)
+        self.assertEqual(search.normalize_text(None), "")
+
+    def test_build_match_query_quotes_every_term(self):
+        self.assertEqual(search.build_match_query("القيادة الحديثة"), '"قياده"* "حديثه"*')
+        # علامات التنصيص ومعاملات FTS5 تصبح كلمات عادية
+        self.assertEqual(search.build_match_query('"a" OR b* NEAR(c d) -e ^f'), '"a"* "or"* "b"* "near"* "c"* "d"* "e"* "f"*')
+        self.assertEqual(search.build_match_query("!!! ..."), "")
+        for q in ('"', "OR", "NEAR(", "a AND", "*"):
+            with self.subTest(q):
+                self.assertIsNotNone(self.slugs(q))  # لا خطأ fts5 syntax
+
+    def test_query_ranks_by_relevance_then_date(self):
+        # الأحدث يطابق في المقتطف، والأقدم في العنوان (وزن أعلى)
+        self.assertEqual(self.slugs("تخطيط"), ["title-hit", "excerpt-hit"])
+        self.assertEqual(self.slugs("التّخطيط"), ["title-hit", "excerpt-hit"])  # التطبيع على الاستعلام أيضًا
+
+    def test_icontains_fallback_without_the_index(self):
+        with mock.patch.object(search, "fts_available", return_value=False):
+            self.assertEqual(self.slugs("التخطيط الاستراتيجي"), ["title-hit"])  # الترتيب بالتاريخ، بلا تطبيع
+            results = self.client.get(reverse("search"), {"q": "التخطيط", "type": "article"}).json()["results"]
+        self.assertEqual([r["item"]["slug"] for r in results], ["title-hit"])
+        self.assertIsNone(results[0]["score"])
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES, API_CACHE_ENABLED=False, REQUEST_TIMING_ENABLED=False, METRICS_ENABLED=False,
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class KeywordFilterTests(TestCase):
+    databases = {"default"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ai = Book.objects.create(title="كتاب أ", keywords=["Python", "الذكاء الاصطناعي"])
+        cls.both = Book.objects.create(title="كتاب ب", keywords=["python", "Data"])
+        cls.data = Book.objects.create(title="كتاب ج", keywords=["DATA"])
+
+    def titles(self, **params):
+        response = self.client.get(reverse("books-list"), params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(b["title"] for b in response.json()["results"])
+
+    def tags(self, obj):
+        return set(KeywordTag.objects.filter(object_id=obj.pk, content_type__model="book").values_list("keyword", flat=True))
+
+    def test_all_and_any_modes(self):
+        self.assertEqual(self.titles(keyword="PYTHON"), ["كتاب أ", "كتاب ب"])
+        self.assertEqual(self.client.get(reverse("books-list"), {"keyword": ["python", "data"]}).json()["count"], 1)
+        self.assertEqual(self.titles(keyword="python,data"), ["كتاب ب"])
+        self.assertEqual(self.titles(keyword="python,data", keyword_mode="any"), ["كتاب أ", "كتاب ب", "كتاب ج"])
+        self.assertEqual(self.titles(keyword="python,missing"), [])
+
+    def test_arabic_spelling_variants_match(self):
+        for variant in ("الذكاء الاصطناعي", "ذكاء اصطناعي", "الذّكاء الإصطناعي", "الذكـــاء  الاصطناعى"):
+            with self.subTest(variant):
+                self.assertEqual(self.titles(keyword=variant), ["كتاب أ"])
+
+    def test_tags_follow_save_and_delete(self):
+        self.assertEqual(self.tags(self.ai), {"python", "ذكاء اصطناعي"})
+        self.ai.keywords = ["Rust", "Python"]
+        self.ai.save()
+        self.assertEqual(self.tags(self.ai), {"rust", "python"})
+        self.ai.title = "كتاب أ معدّل"
+        self.ai.save(update_fields=["title"])  # keywords لم تتغير: بلا مزامنة
+        self.assertEqual(self.tags(self.ai), {"rust", "python"})
+        pk = self.both.pk
+        self.both.delete()
+        self.assertFalse(KeywordTag.objects.filter(object_id=pk, content_type__model="book").exists())
+
+    def test_admin_search_matches_keyword_prefixes(self):
+        admin_user = get_user_model().objects.create_superuser("admin", "admin@example.com", PASSWORD)
+        self.client.force_login(admin_user)
+
+        def found(q):
+            response = self.client.get(reverse("admin:api_book_changelist"), {"q": q})
+            return sorted(b.title for b in response.context["cl"].result_list)
+
+        self.assertEqual(found("pyth"), ["كتاب أ", "كتاب ب"])
+        self.assertEqual(found("الذكا"), ["كتاب أ"])  # بادئة بعد التطبيع
+        self.assertEqual(found("ج"), ["كتاب ج"])  # search_fields العادية باقية
+
+
+@override_settings(CACHES=LOCMEM_CACHES, API_CACHE_ENABLED=False, REQUEST_TIMING_ENABLED=False, METRICS_ENABLED=False)
+class RenderedPayloadTests(TestCase):
+    databases = {"default"}
+    sentinel = b'{"served":"stored"}'
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalog(n=2)
+        cls.article = Article.objects.filter(is_published=True).first()
+        cls.course = CourseRecorded.objects.first()
+
+    def url(self, obj=None):
+        obj = obj or self.article
+        if isinstance(obj, Article):
+            return reverse("article-detail", kwargs={"slug": obj.slug})
+        return reverse("courses-recorded-detail", kwargs={"slug": obj.slug})
+
+    def stored(self, obj=None):
+        obj = obj or self.article
+        return RenderedPayload.objects.filter(
+            content_type=ContentType.objects.get_for_model(type(obj)), object_id=obj.pk,
+        )
+
+    def live(self, obj=None):
+        """البايتات من الـ serializer مباشرة (بعد حذف الحمولة)."""
+        self.stored(obj).delete()
+        response = self.client.get(self.url(obj))
+        self.assertEqual(response.status_code, 200)
+        return response.content
+
+    def test_stored_payload_is_served_and_matches_live_output_byte_for_byte(self):
+        for obj in (self.article, self.course):
+            with self.subTest(type(obj).__name__):
+                stored = bytes(self.stored(obj).get().payload)
+                served = self.client.get(self.url(obj)).content
+                self.assertEqual(served, stored)
+                self.assertEqual(self.live(obj), stored)
+
+    def test_fresh_payload_skips_the_serializer(self):
+        self.stored().update(payload=self.sentinel)
+        self.assertEqual(self.client.get(self.url()).content, self.sentinel)
+
+    def test_stale_updated_at_falls_back_to_the_serializer(self):
+        self.stored().update(payload=self.sentinel, source_updated_at=self.article.updated_at - timedelta(seconds=1))
+        content = self.client.get(self.url()).content
+        self.assertNotEqual(content, self.sentinel)
+        self.assertEqual(json.loads(content)["slug"], self.article.slug)
+
+    def test_stale_version_falls_back_to_the_serializer(self):
+        self.assertEqual(self.stored().get().version, payload_version(ArticleDetailSerializer))
+        self.stored().update(payload=self.sentinel, version="0" * 32)
+        content = self.client.get(self.url()).content
+        self.assertNotEqual(content, self.sentinel)
+        self.assertEqual(json.loads(content)["slug"], self.article.slug)
+
+    def test_browsable_api_uses_the_serializer(self):
+        self.stored().update(payload=self.sentinel)
+        response = self.client.get(self.url(), HTTP_ACCEPT="text/html")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/html"))
+        self.assertNotIsInstance(response.data, RawJSON)
+        self.assertEqual(response.data["slug"], self.article.slug)
+
+    def test_save_refreshes_and_delete_removes_the_payload(self):
+        self.article.title = "عنوان جديد"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.save()
+        row = self.stored().get()
+        self.assertEqual(row.source_updated_at, self.article.updated_at)
+        self.assertEqual(json.loads(bytes(row.payload))["title"], "عنوان جديد")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.delete()
+        self.assertFalse(RenderedPayload.objects.filter(object_id=row.object_id, content_type=row.content_type).exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHES, API_CACHE_ENABLED=False, REQUEST_TIMING_ENABLED=False, METRICS_ENABLED=False)
+class FastListParityTests(TestCase):
+    """مسار values() يجب أن يعطي نفس بايتات الـ DRF serializer لكل قائمة."""
+    databases = {"default"}
+    routes = ("courses-recorded-list", "courses-onsite-list", "books-list", "tools-list", "article-list")
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalog(n=4)
+        # قيم حدّية: NULL ونصوص فارغة وتواريخ بأجزاء من الثانية
+        Book.objects.create(title="Edge", author_name="", description="", keywords=[], url="")
+        Article.objects.create(title="Edge", slug="edge", content="-", excerpt="", is_published=True, published_at=None)
+
+    def get(self, route, params):
+        response = self.client.get(reverse(route), params)
+        self.assertEqual(response.status_code, 200)
+        return response.content
+
+    def test_every_list_endpoint_matches_the_drf_serializer(self):
+        for route in self.routes:
+            view_class = resolve(reverse(route)).func.view_class
+            self.assertIsNotNone(get_field_plan(view_class.serializer_class), route)
+            for params in ({}, {"page_size": 50}, {"cursor": ""}, {"q": "القيادة"}, {"keyword": "python"}):
+                with self.subTest(route=route, params=params):
+                    fast = self.get(route, params)
+                    with mock.patch("api.fastserializers.get_field_plan", return_value=None):
+                        drf = self.get(route, params)
+                    self.assertEqual(fast, drf)
+                    if not params:
+                        self.assertGreater(len(json.loads(fast)["results"]), 0)
+
+    def test_bench_command_checks_parity_and_rolls_back(self):
+        before = {model: model.objects.count() for model in (Article, Book, Tool, CourseOnsite, CourseRecorded)}
+        out = io.StringIO()
+        call_command("bench_serializers", rows=8, repeat=1, stdout=out)
+        self.assertIn("ArticleListSerializer", out.getvalue())
+        self.assertEqual({model: model.objects.count() for model in before}, before)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, API_CACHE_ENABLED=False, REQUEST_TIMING_ENABLED=False, METRICS_ENABLED=False)
+class ColumnProjectionTests(TestCase):
+    databases = {"default"}
+    # أعمدة ثقيلة لا تعرضها serializers القوائم
+    heavy = {
+        "article-list": ("content",),
+        "courses-recorded-list": ("long_description", "outline", "objectives"),
+        "courses-onsite-list": ("long_description", "outline", "objectives"),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalog(n=2)
+
+    def list_sql(self, route):
+        with CaptureQueriesContext(connections["default"]) as ctx:
+            response = self.client.get(reverse(route))
+        self.assertEqual(response.status_code, 200)
+        return [q["sql"] for q in ctx.captured_queries if "COUNT(" not in q["sql"]]
+
+    def test_drf_fallback_defers_large_columns(self):
+        for route, columns in self.heavy.items():
+            with self.subTest(route), mock.patch("api.fastserializers.get_field_plan", return_value=None):
+                sql = self.list_sql(route)
+                self.assertEqual(len(sql), 1, sql)
+                for column in columns:
+                    self.assertNotIn(f'."{column}"', sql[0])
+                self.assertIn('."title"', sql[0])
+
+    def test_projection_is_none_when_fields_are_unknowable(self):
+        class MethodSerializer(drf_serializers.ModelSerializer):
+            extra = drf_serializers.SerializerMethodField()
+
+            class Meta:
+                model = Book
+                fields = ["id", "title", "extra"]
+
+            def get_extra(self, obj):
+                return obj.description
+
+        class WholeObjectSerializer(drf_serializers.ModelSerializer):
+            everything = drf_serializers.CharField(source="*", read_only=True)
+
+            class Meta:
+                model = Book
+                fields = ["id", "everything"]
+
+        class DottedSerializer(drf_serializers.ModelSerializer):
+            title_length = drf_serializers.IntegerField(source="title.__len__", read_only=True)
+
+            class Meta:
+                model = Book
+                fields = ["id", "title_length"]
+
+        self.assertIsNone(projected_fields(MethodSerializer))
+        self.assertIsNone(projected_fields(WholeObjectSerializer))
+        self.assertEqual(projected_fields(DottedSerializer), ("id", "title"))
+        queryset = Book.objects.all()
+        self.assertIs(project_queryset(queryset, MethodSerializer), queryset)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, API_CACHE_ENABLED=False, REQUEST_TIMING_ENABLED=False, METRICS_ENABLED=False)
+class AuthUserCacheTests(TestCase):
+    """كاش المستخدمين داخل العملية يتبع ختم المستخدم في الكاش المشترك (كما لو كان عاملًا آخر)."""
+    databases = {"default"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="cached", email="cached@example.com", password=PASSWORD)
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+        self.auth = StatelessJWTAuthentication()
+
+    def token(self, user=None):
+        return RefreshToken.for_user(user or self.user).access_token
+
+    def authenticate(self, token, method="get"):
+        request = getattr(RequestFactory(), method)("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        return self.auth.authenticate(request)[0]
+
+    def save(self, user, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save(**kwargs)
+
+    def stale_worker_copy(self):
+        """نسخة عامل آخر: المستخدم الحالي في كاشه تحت الجيل الحالي للختم."""
+        user = get_user_model().objects.get(pk=self.user.pk)
+        stamp = get_user_stamp(user.pk)
+        return user, stamp
+
+    def test_uncached_read_checks_the_stamp_without_queries(self):
+        token = self.token()
+        with self.assertNumQueries(1):  # لا ختم بعد: تحميل ونشر
+            self.assertEqual(self.authenticate(token).pk, self.user.pk)
+        user_cache.clear()  # عامل آخر بلا نسخة محلية
+        with self.assertNumQueries(0):
+            self.assertIsInstance(self.authenticate(token), LazyUser)
+
+    def test_save_drops_other_workers_copies(self):
+        token = self.token()
+        self.authenticate(token)
+        stale, stamp = self.stale_worker_copy()
+        fresh = get_user_model().objects.get(pk=self.user.pk)
+        fresh.first_name = "جديد"
+        self.save(fresh)
+        self.assertNotEqual(get_user_stamp(fresh.pk)[0], stamp[0])
+        user_cache.set(stale.pk, stale, stamp[0])  # نسخة العامل الآخر قبل الحفظ
+        with self.assertNumQueries(1):
+            self.assertEqual(self.auth.load_user(token, fresh.pk).first_name, "جديد")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.auth.load_user(token, fresh.pk).first_name, "جديد")
+
+    def test_deactivation_rejects_cached_and_lazy_reads(self):
+        token = self.token()
+        self.authenticate(token)
+        stale, stamp = self.stale_worker_copy()
+        inactive = get_user_model().objects.get(pk=self.user.pk)
+        inactive.is_active = False
+        self.save(inactive)
+        user_cache.set(stale.pk, stale, stamp[0])
+        for method in ("get", "post"):
+            with self.subTest(method):
+                with self.assertRaises(AuthenticationFailed) as ctx:
+                    self.authenticate(token, method)
+                self.assertEqual(ctx.exception.detail["code"], "user_inactive")
+        response = self.client.get(reverse("books-list"), headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(response.status_code, 401)
+
+    def test_password_change_rejects_old_tokens(self):
+        # api_settings كائن يُستورد بالاسم (override_settings يعيد بناءه ولا يصل لمن استورده)
+        for module in (authentication, simplejwt_tokens):
+            patcher = mock.patch.object(module.api_settings, "CHECK_REVOKE_TOKEN", True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        old = self.token()
+        self.authenticate(old)
+        stale, stamp = self.stale_worker_copy()
+        changed = get_user_model().objects.get(pk=self.user.pk)
+        changed.set_password("another-pass-456")
+        self.save(changed)
+        user_cache.set(stale.pk, stale, stamp[0])
+        for method in ("get", "post"):
+            with self.subTest(method):
+                with self.assertRaises(AuthenticationFailed) as ctx:
+                    self.authenticate(old, method)
+                self.assertEqual(ctx.exception.detail["code"], "password_changed")
+        self.assertEqual(self.authenticate(self.token(changed)).pk, changed.pk)
+
+    def test_delete_clears_the_stamp(self):
+        token = self.token()
+        self.authenticate(token)
+        with self.captureOnCommitCallbacks(execute=True):
+            get_user_model().objects.filter(pk=self.user.pk).delete()
+        self.assertIsNone(get_user_stamp(self.user.pk))
+        with self.assertRaises(AuthenticationFailed) as ctx:
+            self.authenticate(token)
+        self.assertEqual(ctx.exception.detail["code"], "user_not_found")
+
+
+@override_settings(REQUEST_TIMING_ENABLED=False, METRICS_ENABLED=False)
+class SqlitePragmaTests(TestCase):
+    databases = {"default"}
+
+    def connect(self, **settings_dict):
+        """اتصال جديد بملف مؤقت: connection_created يطبّق الـ PRAGMAs كما في الإنتاج."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        wrapper = SQLiteDatabaseWrapper(
+            {**connections["default"].settings_dict, "NAME": os.path.join(directory, "db.sqlite3"), **settings_dict},
+            alias="pragma-test",
+        )
+        wrapper.ensure_connection()
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def executed(self, vendor="sqlite", **settings_dict):
+        cursor = mock.MagicMock()
+        connection = SimpleNamespace(vendor=vendor, settings_dict=settings_dict, cursor=mock.MagicMock())
+        connection.cursor.return_value.__enter__.return_value = cursor
+        apply_pragmas(sender=None, connection=connection)
+        return [call.args[0] for call in cursor.execute.call_args_list]
+
+    def test_defaults_are_applied_on_connect(self):
+        pragmas = effective_pragmas(self.connect())
+        self.assertEqual(str(pragmas["journal_mode"]).lower(), "wal")
+        self.assertEqual(pragmas["busy_timeout"], settings.SQLITE_PRAGMAS["busy_timeout"])
+        self.assertEqual(pragmas["synchronous"], 1)  # NORMAL
+        self.assertEqual(pragmas["cache_size"], settings.SQLITE_PRAGMAS["cache_size"])
+        self.assertEqual(pragmas["temp_store"], 2)  # MEMORY
+
+    def test_alias_overrides_and_none_skips(self):
+        pragmas = effective_pragmas(self.connect(PRAGMAS={"cache_size": -2000, "synchronous": "FULL", "journal_mode": None}))
+        self.assertEqual(pragmas["cache_size"], -2000)
+        self.assertEqual(pragmas["synchronous"], 2)  # FULL
+        self.assertEqual(str(pragmas["journal_mode"]).lower(), "delete")  # لم يُطبَّق WAL
+        self.assertEqual(pragmas["temp_store"], 2)  # الباقي من SQLITE_PRAGMAS
+
+    @override_settings(SQLITE_PRAGMAS={"journal_mode": "WAL", "cache_size": -10, "busy_timeout": 100})
+    def test_busy_timeout_goes_first_and_unknown_names_last(self):
+        self.assertEqual(self.executed(PRAGMAS={"wal_autocheckpoint": 500, "cache_size": None}), [
+            "PRAGMA busy_timeout = 100", "PRAGMA journal_mode = WAL", "PRAGMA wal_autocheckpoint = 500",
+        ])
+        self.assertEqual(self.executed(vendor="postgresql"), [])
+
+    def test_invalid_names_and_values_are_rejected(self):
+        for pragmas in (
+            {"journal_mode": "WAL; DROP TABLE auth_user"},
+            {"cache_size": "1 2"},
+            {"bad name": 1},
+            {"x=1; --": 1},
+        ):
+            with self.subTest(pragmas), self.assertRaises(ValueError):
+                self.executed(PRAGMAS=pragmas)
+
+
+@override_settings(REQUEST_TIMING_ENABLED=False, METRICS_ENABLED=False)
+class PrimaryReplicaRouterTests(TransactionTestCase):
+    databases = {"default"}
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def fresh(self, fn, *args):
+        """كل حالة في context جديد غير مثبَّت كخيط عامل جديد (كتابات الاختبارات السابقة تثبّت الخيط الرئيسي)."""
+        def run():
+            routers._pinned.set(False)
+            return fn(*args)
+        return contextvars.copy_context().run(run)
+
+    def through_middleware(self, method, view):
+        seen = []
+
+        def get_response(request):
+            seen.append(read_alias())
+            view()
+            seen.append(read_alias())
+            return HttpResponse()
+
+        middleware = ReplicaPinningMiddleware(get_response)
+        middleware(getattr(RequestFactory(), method)("/"))
+        return seen
+
+    def test_reads_use_the_replica_until_a_write(self):
+        def request():
+            before = self.router.db_for_read(Book)
+            self.assertEqual(self.router.db_for_write(Book), "default")
+            return before, self.router.db_for_read(Book)
+
+        self.assertEqual(self.fresh(request), ("replica", "default"))
+
+    def test_unsafe_methods_are_pinned_from_the_start(self):
+        for method, expected in (("get", "replica"), ("head", "replica"), ("options", "replica"),
+                                 ("post", "default"), ("put", "default"), ("patch", "default"), ("delete", "default")):
+            with self.subTest(method):
+                self.assertEqual(self.fresh(self.through_middleware, method, lambda: None)[0], expected)
+
+    def test_pin_is_reset_between_requests(self):
+        def requests():
+            first = self.through_middleware("get", pin_to_primary)
+            return first, is_pinned(), self.through_middleware("get", lambda: None)
+
+        first, pinned_after, second = self.fresh(requests)
+        self.assertEqual(first, ["replica", "default"])  # القراءة بعد الكتابة على الكاتب
+        self.assertFalse(pinned_after)
+        self.assertEqual(second, ["replica", "replica"])
+
+    async def test_async_middleware_resets_the_pin(self):
+        async def get_response(request):
+            pin_to_primary()
+            return HttpResponse()
+
+        token = routers._pinned.set(False)
+        try:
+            middleware = ReplicaPinningMiddleware(get_response)
+            await middleware(AsyncRequestFactory().get("/"))
+            self.assertFalse(is_pinned())
+        finally:
+            routers._pinned.reset(token)
+
+    def test_open_transaction_reads_from_the_primary(self):
+        def request():
+            with transaction.atomic():
+                inside = read_alias()
+            return inside, read_alias()
+
+        self.assertEqual(self.fresh(request), ("default", "replica"))
+
+    def test_replica_is_read_only(self):
+        self.assertFalse(self.router.allow_migrate("replica", "api"))
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, "db.sqlite3")
+        wrappers = []
+        for name, extra in ((path, {}), (f"file:{path}?mode=ro", {"PRAGMAS": {"journal_mode": None}})):
+            wrapper = SQLiteDatabaseWrapper({**connections["default"].settings_dict, "NAME": name, **extra}, alias=name)
+            self.addCleanup(wrapper.close)
+            wrappers.append(wrapper)
+        primary, replica = wrappers
+        with primary.cursor() as cursor:
+            cursor.execute("CREATE TABLE t (x INTEGER)")
+            cursor.execute("INSERT INTO t VALUES (1)")
+        with replica.cursor() as cursor:
+            cursor.execute("SELECT x FROM t")
+            self.assertEqual(cursor.fetchall(), [(1,)])
+            with self.assertRaisesMessage(OperationalError, "readonly"):
+                cursor.execute("INSERT INTO t VALUES (2)")
@@ -0,0 +1,164 @@
+# api/throttling.py
+"""
+التحكم في القبول لعمل تجزئة كلمات المرور (PBKDF2) في الدخول والتسجيل.
+
+- دلوان (token buckets) في الكاش المشترك: لكل IP ولكل معرّف (البريد/اسم المستخدم).
+  عند نفاد الدلو: 429 فوري مع Retry-After (DRF Throttled) قبل أي تجزئة.
+- حد تزامن عبر العمليات: HASHING_MAX_CONCURRENCY خانة (ملفات مقفلة بـ flock)؛ الافتراضي
+  حصة HASHING_WORKER_SHARE من WEB_CONCURRENCY، فيبقى باقي العمال لطلبات الكتالوج.
+  إن كانت كل الخانات مشغولة: انتظار قصير (HASHING_SLOT_WAIT، أقل من ثانية أو نحوها = تجزئة أو اثنتان)
+  ثم 429؛ فدخولان متزامنان مشروعان ينتظر أحدهما الآخر بدل أن يُرفض.
+- الدلو في الكاش تقريبي تحت التزامن الشديد (قراءة ثم كتابة)؛ يكفي لصد الدفعات.
+"""
+import contextlib
+import math
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import BaseThrottle
+
+try:
+    import fcntl
+except ImportError:  # Windows (تطوير محلي): حد داخل العملية فقط
+    fcntl = None
+
+BUCKET_PREFIX = "api:bucket"
+
+_DURATIONS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """"10/min" -> (10 رمز سعة، 10/60 رمز في الثانية)."""
+    num, period = rate.split("/")
+    return int(num), int(num) / _DURATIONS[period[0]]
+
+
+# ============================
+# الدلاء
+# ============================
+class TokenBucketThrottle(BaseThrottle):
+    scope = None
+    timer = time.time
+
+    def get_rate(self):
+        rates = getattr(settings, "HASHING_THROTTLE_RATES", {})
+        return rates.get(self.scope)
+
+    def get_ident_key(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        rate = self.get_rate()
+        ident = self.get_ident_key(request)
+        if not rate or not ident:
+            return True
+        capacity, refill = parse_rate(rate)
+        cache = caches[getattr(settings, "API_CACHE_ALIAS", "default")]
+        key = f"{BUCKET_PREFIX}:{self.scope}:{ident}"
+
+        now = self.timer()
+        tokens, updated = cache.get(key) or (capacity, now)
+        tokens = min(capacity, tokens + (now - updated) * refill)
+        if tokens < 1:
+            self.retry_after = (1 - tokens) / refill
+            return False
+        cache.set(key, (tokens - 1, now), timeout=math.ceil(capacity / refill) + 1)
+        return True
+
+    def wait(self):
+        return getattr(self, "retry_after", None)
+
+
+class HashingIPThrottle(TokenBucketThrottle):
+    scope = "ip"
+
+    def get_ident_key(self, request):
+        return self.get_ident(request)
+
+
+class HashingIdentifierThrottle(TokenBucketThrottle):
+    """البريد أو اسم المستخدم المرسل (يحمي حسابًا واحدًا من IPs كثيرة)."""
+    scope = "identifier"
+    fields = ("email", "username")
+
+    def get_ident_key(self, request):
+        data = request.data if hasattr(request.data, "get") else {}
+        for field in self.fields:
+            value = data.get(field)
+            if isinstance(value, str) and value.strip():
+                return value.strip().lower()
+        return None
+
+
+# ============================
+# حد التزامن
+# ============================
+def max_hashing_concurrency():
+    configured = getattr(settings, "HASHING_MAX_CONCURRENCY", None)
+    if configured:
+        return int(configured)
+    workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+    return max(1, int(workers * getattr(settings, "HASHING_WORKER_SHARE", 0.5)))
+
+
+_local_slots = {}
+_local_lock = threading.Lock()
+
+
+def _local_semaphore(n):
+    with _local_lock:
+        if n not in _local_slots:
+            _local_slots[n] = threading.BoundedSemaphore(n)
+        return _local_slots[n]
+
+
+def _try_slot(lock_dir, n):
+    """أول خانة حرة (fd مقفل) أو None."""
+    for slot in range(n):
+        fd = os.open(os.path.join(lock_dir, f"slot-{slot}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            continue
+        return fd
+    return None
+
+
+@contextlib.contextmanager
+def hashing_slot():
+    """يحجز خانة تجزئة، منتظرًا حتى HASHING_SLOT_WAIT ثانية، أو يرفع Throttled."""
+    n = max_hashing_concurrency()
+    wait = getattr(settings, "HASHING_SLOT_WAIT", 1.0)
+    retry_after = getattr(settings, "HASHING_BUSY_RETRY_AFTER", 1)
+
+    if fcntl is None:
+        semaphore = _local_semaphore(n)
+        if not semaphore.acquire(timeout=wait):
+            raise Throttled(wait=retry_after)
+        try:
+            yield
+        finally:
+            semaphore.release()
+        return
+
+    lock_dir = getattr(settings, "HASHING_LOCK_DIR", "/tmp/epicblog_api_hashing")
+    os.makedirs(lock_dir, exist_ok=True)
+    deadline = time.monotonic() + wait
+    while (fd := _try_slot(lock_dir, n)) is None:
+        if time.monotonic() >= deadline:
+            raise Throttled(wait=retry_after)
+        time.sleep(0.02)
+    try:
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+# لـ throttle_classes في views الدخول والتسجيل
+HASHING_THROTTLES = [HashingIPThrottle, HashingIdentifierThrottle]
@@ -1,5 +1,7 @@
 from django.urls import path
 from .views import *
+from .async_views import catalog_path
+from .metrics import metrics_view
 from rest_framework_simplejwt.views import TokenRefreshView
 
 urlpatterns = [
@@ -10,22 +12,31 @@ urlpatterns = [
     path("me/", MeView.as_view(), name="me"),
 
     # Recorded Courses
-    path("courses/recorded/",              RecordedCourseListView.as_view(),   name="courses-recorded-list"),
-    path("courses/recorded/<slug:slug>/",  RecordedCourseDetailView.as_view(), name="courses-recorded-detail"),
+    catalog_path("courses/recorded/",                   RecordedCourseListView,    name="courses-recorded-list"),
+    catalog_path("courses/recorded/<slug:slug>/",       RecordedCourseDetailView,  name="courses-recorded-detail"),
 
     # Onsite Courses
-    path("courses/onsite/",                OnsiteCourseListView.as_view(),     name="courses-onsite-list"),
-    path("courses/onsite/<slug:slug>/",    OnsiteCourseDetailView.as_view(),   name="courses-onsite-detail"),
+    catalog_path("courses/onsite/",                     OnsiteCourseListView,      name="courses-onsite-list"),
+    catalog_path("courses/onsite/<slug:slug>/",         OnsiteCourseDetailView,    name="courses-onsite-detail"),
 
     # Books
-    path("books/",                         BookListView.as_view(),             name="books-list"),
-    path("books/<int:pk>/",                BookDetailView.as_view(),           name="books-detail"),
+    catalog_path("books/",                              BookListView,              name="books-list"),
+    catalog_path("books/<int:pk>/",                     BookDetailView,            name="books-detail"),
 
     # Tools
-    path("tools/",                         ToolListView.as_view(),             name="tools-list"),
-    path("tools/<int:pk>/",                ToolDetailView.as_view(),           name="tools-detail"),
-    path("articles/", ArticleListView.as_view(), name="article-list"),
+    catalog_path("tools/",                              ToolListView,              name="tools-list"),
+    catalog_path("tools/<int:pk>/",                     ToolDetailView,            name="tools-detail"),
+    catalog_path("articles/",                           ArticleListView,           name="article-list"),
     # يقبل أي نص بدون "/" — مناسب للسلاجز العربية
-    path("articles/<path:slug>/", ArticleDetailView.as_view(), name="article-detail"),
+    catalog_path("articles/<path:slug>/",               ArticleDetailView,         name="article-detail"),
+
+    # الصفحة الرئيسية (المميّز من كل كتالوج + أحدث المقالات)
+    path("home/",                          HomeView.as_view(),                 name="home"),
+
+    # Unified Search
+    path("search/",                        SearchView.as_view(),               name="search"),
+
+    # Prometheus (بدون "/" أخيرة كما يتوقعها المُجمِّع)
+    path("metrics",                        metrics_view,                       name="metrics"),
 
 ]
@@ -5,17 +5,27 @@ from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.generics import ListAPIView, RetrieveAPIView
-from rest_framework.pagination import PageNumberPagination
 
+from django.conf import settings
 from django.db.models import Q
 
 from .models import CourseRecorded, CourseOnsite, Book, Tool, Article
+from .cache import CachedResponseMixin
+from .conditional import DetailValidatorsMixin, ListValidatorsMixin
+from .fastserializers import FastListMixin, get_field_plan, project_queryset
+from .keywords import apply_keyword_filter
+from .pagination import StandardResultsSetPagination
+from .routers import read_alias
+from .payloads import MaterializedDetailMixin
+from .search import SEARCH_KINDS, search_articles, search_catalog
+from .throttling import HASHING_THROTTLES, hashing_slot
 
 from .serializers import (
     # Auth / Profile
     EmailOrUsernameTokenSerializer,
     RegisterSerializer,
     MeUpdateSerializer,
+    get_me,
     serialize_me,
     # Courses
     CourseRecordedListSerializer,
@@ -32,29 +42,28 @@ from .serializers import (
 )
 
 
-# =========================
-# Pagination موحّد
-# =========================
-class StandardResultsSetPagination(PageNumberPagination):
-    page_size = 12                      # الافتراضي
-    page_size_query_param = "page_size" # ?page_size=...
-    max_page_size = 50
-
-
 # =========================
 # Auth
 # =========================
+# الدخول والتسجيل يجزّئان كلمة المرور: دلاء لكل IP/معرّف + خانة تزامن محدودة (throttling.py)
 class LoginView(TokenObtainPairView):
     permission_classes = [AllowAny]
     serializer_class = EmailOrUsernameTokenSerializer
+    throttle_classes = HASHING_THROTTLES
+
+    def post(self, request, *args, **kwargs):
+        with hashing_slot():
+            return super().post(request, *args, **kwargs)
 
 class RegisterView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = HASHING_THROTTLES
 
     def post(self, request):
         ser = RegisterSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
-        user = ser.save()
+        with hashing_slot():
+            user = ser.save()
         return Response({"me": serialize_me(user)}, status=status.HTTP_201_CREATED)
 
 # api/views.py
@@ -63,27 +72,27 @@ class MeView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        return Response({"me": serialize_me(request.user)})
+        return Response({"me": get_me(request.user)})
 
     def patch(self, request):
         ser = MeUpdateSerializer(instance=request.user, data=request.data, partial=True)
         ser.is_valid(raise_exception=True)
         ser.save()
-        return Response({"me": serialize_me(request.user)})
+        return Response({"me": get_me(request.user)})
 
     # NEW: accept PUT as well (treat it like PATCH to avoid requiring all fields)
     def put(self, request):
         ser = MeUpdateSerializer(instance=request.user, data=request.data, partial=True)
         ser.is_valid(raise_exception=True)
         ser.save()
-        return Response({"me": serialize_me(request.user)})
+        return Response({"me": get_me(request.user)})
 
 
 
 # =========================
 # Recorded Courses
 # =========================
-class RecordedCourseListView(ListAPIView):
+class RecordedCourseListView(ListValidatorsMixin, CachedResponseMixin, FastListMixin, ListAPIView):
     permission_classes = [AllowAny]
     serializer_class = CourseRecordedListSerializer
     pagination_class = StandardResultsSetPagination
@@ -96,9 +105,9 @@ class RecordedCourseListView(ListAPIView):
             qs = qs.filter(Q(title__icontains=q) | Q(summary__icontains=q))
         if featured in ("1", "true", "True"):
             qs = qs.filter(is_featured=True)
-        return qs
+        return apply_keyword_filter(qs, self.request)
 
-class RecordedCourseDetailView(RetrieveAPIView):
+class RecordedCourseDetailView(MaterializedDetailMixin, DetailValidatorsMixin, CachedResponseMixin, RetrieveAPIView):
     permission_classes = [AllowAny]
     serializer_class = CourseRecordedDetailSerializer
     lookup_field = "slug"
@@ -108,7 +117,7 @@ class RecordedCourseDetailView(RetrieveAPIView):
 # =========================
 # Onsite Courses
 # =========================
-class OnsiteCourseListView(ListAPIView):
+class OnsiteCourseListView(ListValidatorsMixin, CachedResponseMixin, FastListMixin, ListAPIView):
     permission_classes = [AllowAny]
     serializer_class = CourseOnsiteListSerializer
     pagination_class = StandardResultsSetPagination
@@ -121,9 +130,9 @@ class OnsiteCourseListView(ListAPIView):
             qs = qs.filter(Q(title__icontains=q) | Q(summary__icontains=q))
         if featured in ("1", "true", "True"):
             qs = qs.filter(is_featured=True)
-        return qs
+        return apply_keyword_filter(qs, self.request)
 
-class OnsiteCourseDetailView(RetrieveAPIView):
+class OnsiteCourseDetailView(MaterializedDetailMixin, DetailValidatorsMixin, CachedResponseMixin, RetrieveAPIView):
     permission_classes = [AllowAny]
     serializer_class = CourseOnsiteDetailSerializer
     lookup_field = "slug"
@@ -133,7 +142,7 @@ class OnsiteCourseDetailView(RetrieveAPIView):
 # =========================
 # Books
 # =========================
-class BookListView(ListAPIView):
+class BookListView(ListValidatorsMixin, CachedResponseMixin, FastListMixin, ListAPIView):
     permission_classes = [AllowAny]
     serializer_class = BookListSerializer
     pagination_class = StandardResultsSetPagination
@@ -150,9 +159,9 @@ class BookListView(ListAPIView):
             )
         if featured in ("1", "true", "True"):
             qs = qs.filter(is_featured=True)
-        return qs
+        return apply_keyword_filter(qs, self.request)
 
-class BookDetailView(RetrieveAPIView):
+class BookDetailView(DetailValidatorsMixin, CachedResponseMixin, RetrieveAPIView):
     permission_classes = [AllowAny]
     serializer_class = BookDetailSerializer
     lookup_field = "pk"
@@ -162,7 +171,7 @@ class BookDetailView(RetrieveAPIView):
 # =========================
 # Tools
 # =========================
-class ToolListView(ListAPIView):
+class ToolListView(ListValidatorsMixin, CachedResponseMixin, FastListMixin, ListAPIView):
     permission_classes = [AllowAny]
     serializer_class = ToolListSerializer
     pagination_class = StandardResultsSetPagination
@@ -178,9 +187,9 @@ class ToolListView(ListAPIView):
             )
         if featured in ("1", "true", "True"):
             qs = qs.filter(is_featured=True)
-        return qs
+        return apply_keyword_filter(qs, self.request)
 
-class ToolDetailView(RetrieveAPIView):
+class ToolDetailView(DetailValidatorsMixin, CachedResponseMixin, RetrieveAPIView):
     permission_classes = [AllowAny]
     serializer_class = ToolDetailSerializer
     lookup_field = "pk"
@@ -190,10 +199,12 @@ class ToolDetailView(RetrieveAPIView):
 # =========================
 # Articles
 # =========================
-class ArticleListView(ListAPIView):
+class ArticleListView(ListValidatorsMixin, CachedResponseMixin, FastListMixin, ListAPIView):
     permission_classes = [AllowAny]
     serializer_class = ArticleListSerializer
     pagination_class = StandardResultsSetPagination
+    cursor_ordering = ("-published_at", "-created_at", "-id")
+    cursor_disallowed_params = ("q",)  # ترتيب الصلة (search_rank) لا يصلح keyset
 
     def get_queryset(self):
         qs = Article.objects.all().order_by("-published_at", "-created_at")
@@ -203,9 +214,15 @@ class ArticleListView(ListAPIView):
         if published in ("1", "true", "True", "yes"):
             qs = qs.filter(is_published=True)
 
-        # بحث
+        # كلمات مفتاحية: ?keyword=...&keyword_mode=all|any
+        qs = apply_keyword_filter(qs, self.request)
+
+        # بحث: فهرس FTS مرتّب حسب الصلة، وإلا icontains كما كان
         q = self.request.query_params.get("q")
         if q:
+            ranked = search_articles(qs, q)
+            if ranked is not None:
+                return ranked
             qs = qs.filter(
                 Q(title__icontains=q) |
                 Q(excerpt__icontains=q) |
@@ -214,8 +231,152 @@ class ArticleListView(ListAPIView):
         return qs
 
 
-class ArticleDetailView(RetrieveAPIView):
+class ArticleDetailView(MaterializedDetailMixin, DetailValidatorsMixin, CachedResponseMixin, RetrieveAPIView):
     permission_classes = [AllowAny]
     serializer_class = ArticleDetailSerializer
     lookup_field = "slug"
     queryset = Article.objects.filter(is_published=True).order_by("-published_at", "-created_at")
+
+
+# =========================
+# بطاقات القوائم
+# =========================
+def serialize_cards(serializer_class, queryset, request, limit=None):
+    """بطاقات serializer القائمة: خطة الحقول (values) إن أمكن، وإلا الـ serializer على أعمدته فقط."""
+    plan = get_field_plan(serializer_class)
+    if plan is not None:
+        rows = plan.values(queryset)
+        return plan.serialize(rows if limit is None else rows[:limit])
+    queryset = project_queryset(queryset, serializer_class)
+    if limit is not None:
+        queryset = queryset[:limit]
+    return serializer_class(queryset, many=True, context={"request": request}).data
+
+
+# =========================
+# Unified Search
+# =========================
+# النوع -> (الموديل، Serializer البطاقة، حقول icontains عند غياب الفهرس)
+SEARCH_TYPES = {
+    "course_recorded": (CourseRecorded, CourseRecordedListSerializer, ("title", "summary")),
+    "course_onsite":   (CourseOnsite,   CourseOnsiteListSerializer,   ("title", "summary")),
+    "book":            (Book,           BookListSerializer,           ("title", "author_name", "description")),
+    "tool":            (Tool,           ToolListSerializer,           ("name", "description")),
+    "article":         (Article,        ArticleListSerializer,        ("title", "excerpt", "content")),
+}
+assert set(SEARCH_TYPES) == set(SEARCH_KINDS)
+
+
+class SearchView(CachedResponseMixin, APIView):
+    """
+    بحث موحّد: ?q=...&type=book,tool (اختياري)
+    استعلام واحد على الفهرس الموحّد (مرتّب حسب الصلة) ثم جلب عناصر الصفحة فقط لكل نوع.
+    """
+    permission_classes = [AllowAny]
+    pagination_class = StandardResultsSetPagination
+    cache_models = tuple(model for model, _, _ in SEARCH_TYPES.values())
+
+    def get(self, request):
+        return self.cached_response(request, self.search)
+
+    def search(self, request):
+        q = (request.query_params.get("q") or "").strip()
+        types = [t.strip() for t in request.query_params.get("type", "").split(",")]
+        kinds = [t for t in types if t in SEARCH_TYPES] or list(SEARCH_TYPES)
+
+        hits = []
+        if q:
+            hits = search_catalog(q, kinds=kinds, using=read_alias())
+            if hits is None:
+                hits = self.fallback_hits(q, kinds)
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(hits, request, view=self)
+        return paginator.get_paginated_response(self.hydrate(page))
+
+    def fallback_hits(self, q, kinds):
+        """بدون فهرس: icontains لكل نوع (بدون ترتيب صلة)، نفس شكل النتائج."""
+        hits = []
+        for kind in kinds:
+            model, _, fields = SEARCH_TYPES[kind]
+            cond = Q()
+            for f in fields:
+                cond |= Q(**{f"{f}__icontains": q})
+            ids = model.objects.filter(cond, is_published=True).order_by("-created_at").values_list("pk", flat=True)
+            hits.extend((kind, pk, None) for pk in ids)
+        return hits
+
+    def hydrate(self, page):
+        ids_by_kind = {}
+        for kind, pk, _ in page:
+            ids_by_kind.setdefault(kind, []).append(pk)
+
+        items = {}
+        for kind, ids in ids_by_kind.items():
+            model, serializer_class, _ = SEARCH_TYPES[kind]
+            objs = model.objects.filter(pk__in=ids, is_published=True)
+            for item in serialize_cards(serializer_class, objs, self.request):
+                items[(kind, item["id"])] = item
+
+        results = []
+        for kind, pk, score in page:
+            item = items.get((kind, pk))
+            if item is None:  # فهرس متأخر عن الجدول
+                continue
+            results.append({
+                "type": kind,
+                "score": None if score is None else round(-score, 4),
+                "item": item,
+            })
+        return results
+
+
+# =========================
+# الصفحة الرئيسية
+# =========================
+# القسم -> (الموديل، Serializer البطاقة، المميّز فقط؟، الترتيب)
+HOME_SECTIONS = {
+    "courses_recorded": (CourseRecorded, CourseRecordedListSerializer, True,  ("-created_at",)),
+    "courses_onsite":   (CourseOnsite,   CourseOnsiteListSerializer,   True,  ("-created_at",)),
+    "books":            (Book,           BookListSerializer,           True,  ("-created_at",)),
+    "tools":            (Tool,           ToolListSerializer,           True,  ("-created_at",)),
+    "articles":         (Article,        ArticleListSerializer,        False, ("-published_at", "-created_at")),
+}
+
+
+class HomeView(CachedResponseMixin, APIView):
+    """
+    كل أقسام الصفحة الرئيسية في طلب واحد: المميّز من كل كتالوج + أحدث المقالات.
+    استعلام واحد لكل موديل (بدون COUNT)، والاستجابة من الكاش حتى يُبطلها حفظ أي محتوى.
+
+    الحجم: HOME_SECTION_SIZES (لكل قسم) أو HOME_SECTION_SIZE، و ?limit=N لكل الأقسام،
+    و ?<القسم>=N لقسم واحد (0 يحذفه)؛ الحد الأقصى HOME_MAX_SECTION_SIZE.
+    """
+    permission_classes = [AllowAny]
+    cache_models = tuple(model for model, _, _, _ in HOME_SECTIONS.values())
+
+    def get(self, request):
+        return self.cached_response(request, self.home)
+
+    def section_size(self, request, name):
+        sizes = getattr(settings, "HOME_SECTION_SIZES", {})
+        size = sizes.get(name, getattr(settings, "HOME_SECTION_SIZE", 6))
+        for param in ("limit", name):
+            try:
+                size = int(request.query_params[param])
+            except (KeyError, ValueError):
+                continue
+        return max(0, min(size, getattr(settings, "HOME_MAX_SECTION_SIZE", 24)))
+
+    def home(self, request):
+        data = {}
+        for name, (model, serializer_class, featured_only, ordering) in HOME_SECTIONS.items():
+            size = self.section_size(request, name)
+            if not size:
+                data[name] = []
+                continue
+            qs = model.objects.filter(is_published=True).order_by(*ordering)
+            if featured_only:
+                qs = qs.filter(is_featured=True)
+            data[name] = serialize_cards(serializer_class, qs, request, limit=size)
+        return Response(data)
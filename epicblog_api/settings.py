@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -52,7 +53,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # أولًا ليشمل الزمن الكلي كل ما بعده (Server-Timing + سطر سجل لكل طلب)
+    'api.instrumentation.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'api.routers.ReplicaPinningMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -63,6 +67,53 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# قياس الطلبات (api/instrumentation.py): مفعّل افتراضيًا مع DEBUG فقط؛ عند التعطيل لا كلفة إطلاقًا
+REQUEST_TIMING_ENABLED = os.environ.get("REQUEST_TIMING_ENABLED", "1" if DEBUG else "0") == "1"
+REQUEST_TIMING_HEADER = os.environ.get("REQUEST_TIMING_HEADER", "1") == "1"   # 0 = سجل فقط بدون ترويسة
+
+# مقاييس Prometheus على /api/metrics (api/metrics.py): ملف لقطة لكل عامل في METRICS_DIR (امسحه عند النشر)
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+METRICS_DIR = os.environ.get("METRICS_DIR", "/tmp/epicblog_api_metrics")
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 1.0))   # ثوانٍ
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")   # إن وُجد: Authorization: Bearer <token>
+# بدون METRICS_TOKEN: فقط طلبات مباشرة (بلا X-Forwarded-For) من هذه العناوين
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.environ.get("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",") if ip.strip()]
+
+# سجل الاستعلامات البطيئة (api/slowqueries.py): 0 يعطّله؛ التلخيص: python manage.py slow_queries
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", 100))
+SLOW_QUERY_LOG_FILE = os.environ.get("SLOW_QUERY_LOG_FILE", "/tmp/epicblog_api_slow_queries.log")
+SLOW_QUERY_EXPLAIN_TTL = int(os.environ.get("SLOW_QUERY_EXPLAIN_TTL", 300))   # ثوانٍ لكل بصمة
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+        # كل عمّال gunicorn يلحقون بالملف نفسه؛ التدوير خارجي (logrotate بلا copytruncate)،
+        # وWatchedFileHandler يعيد الفتح بعد إعادة التسمية. RotatingFileHandler يدوّر في كل عملية وحدها فيضيع سطور.
+        "slow_queries": {
+            "class": "logging.handlers.WatchedFileHandler",
+            "filename": SLOW_QUERY_LOG_FILE,
+            "delay": True,   # لا يُنشأ الملف قبل أول استعلام بطيء
+            "encoding": "utf-8",
+        },
+    },
+    "loggers": {
+        # سطر JSON لكل طلب من RequestTimingMiddleware
+        "api.requests": {
+            "handlers": ["console"],
+            "level": os.environ.get("REQUEST_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+        # سطر JSON لكل استعلام أبطأ من SLOW_QUERY_MS
+        "api.slow_queries": {
+            "handlers": ["slow_queries"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+    },
+}
+
 ROOT_URLCONF = 'epicblog_api.urls'
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
@@ -93,10 +144,75 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': SQLITE_PATH,
+        'OPTIONS': {
+            # الكاتب يأخذ القفل عند BEGIN، فلا يفشل ترقية القفل في منتصف المعاملة بـ "database is locked"
+            'transaction_mode': 'IMMEDIATE',
+        },
+    },
+    # اتصال قراءة فقط لنفس الملف: قراءات الكتالوج الطويلة لا تحجز قفل كتابة أبدًا
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f'file:{SQLITE_PATH}?mode=ro',
+        'PRAGMAS': {'journal_mode': None},   # لا يمكن تغييره من اتصال للقراءة فقط
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+# قاعدة خارجية (Postgres...) عبر DATABASE_URL، و DATABASE_REPLICA_URL لنسخة القراءة (الافتراضي: نفس الخادم)
+DATABASE_URL = os.environ.get("DATABASE_URL", "")
+if DATABASE_URL:
+    import dj_database_url
+
+    DATABASES = {
+        'default': dj_database_url.parse(DATABASE_URL, conn_max_age=600),
+        'replica': dj_database_url.parse(os.environ.get("DATABASE_REPLICA_URL", DATABASE_URL), conn_max_age=600),
     }
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+# القراءة من replica والكتابة (والقراءة بعدها في نفس الطلب) على default — api/routers.py
+DATABASE_ROUTERS = ["api.routers.PrimaryReplicaRouter"]
+
+# PRAGMAs تُطبَّق عند فتح كل اتصال SQLite (api/sqlite.py)؛ تحقّق منها: python manage.py sqlite_pragmas
+SQLITE_PRAGMAS = {
+    "journal_mode": os.environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+    "busy_timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT", 5000)),          # ms
+    "synchronous": os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),   # bytes
+    "cache_size": int(os.environ.get("SQLITE_CACHE_SIZE", -64000)),            # سالب = KiB
+    "temp_store": os.environ.get("SQLITE_TEMP_STORE", "MEMORY"),
 }
 
 
+# Cache
+# كاش مشترك بين عمّال gunicorn (عدّادات الأجيال يجب أن تُرى من كل العمّال):
+# Redis إن وُجد REDIS_URL، وإلا ملفات على القرص المحلي.
+REDIS_URL = os.environ.get("REDIS_URL", "")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ.get("CACHE_DIR", "/tmp/epicblog_api_cache"),
+            "OPTIONS": {"MAX_ENTRIES": 20000},
+        }
+    }
+
+# كاش استجابات الكتالوج (api/cache.py)
+API_CACHE_ENABLED = os.environ.get("API_CACHE_ENABLED", "1") == "1"
+API_CACHE_TIMEOUT = int(os.environ.get("API_CACHE_TIMEOUT", 60 * 60))
+
+# /api/home/ (HomeView): عناصر كل قسم افتراضيًا، وتخصيص لكل قسم، والحد الأقصى لـ ?limit= / ?<القسم>=
+HOME_SECTION_SIZE = int(os.environ.get("HOME_SECTION_SIZE", 6))
+HOME_SECTION_SIZES = {"articles": int(os.environ.get("HOME_ARTICLES_SIZE", 6))}
+HOME_MAX_SECTION_SIZE = 24
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -133,7 +249,8 @@ from datetime import timedelta
 # settings.py
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # JWT بدون استعلام للقراءة (المستخدم يُحمَّل عند الحاجة فقط)
+        "api.authentication.StatelessJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.AllowAny",   # يسمح بالوصول لأي مستخدم
@@ -147,7 +264,35 @@ SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": True,                       # تدوير للتأمين
     "BLACKLIST_AFTER_ROTATION": True,                    # يدعم تسجيل الخروج
     "UPDATE_LAST_LOGIN": True,
+    # يسأل فلتر Bloom داخل العملية قبل جدول القائمة السوداء (api/blacklist.py)
+    "TOKEN_REFRESH_SERIALIZER": "api.blacklist.FilteredTokenRefreshSerializer",
+}
+
+# فلتر القائمة السوداء (api/blacklist.py): الإضافات من العمّال الآخرين تُرى فورًا عبر جيل في الكاش المشترك؛
+# REFRESH تحديث احتياطي دوري، REBUILD إعادة بناء كاملة تدريجية بدفعات BUILD_CHUNK صف لكل طلب
+TOKEN_BLACKLIST_FILTER_REFRESH = float(os.environ.get("TOKEN_BLACKLIST_FILTER_REFRESH", 5))
+TOKEN_BLACKLIST_FILTER_REBUILD = float(os.environ.get("TOKEN_BLACKLIST_FILTER_REBUILD", 3600))
+TOKEN_BLACKLIST_FILTER_BUILD_CHUNK = int(os.environ.get("TOKEN_BLACKLIST_FILTER_BUILD_CHUNK", 2000))
+# نافذة blacklisted_at (ثوانٍ) يعيد التحديث قراءتها: صفوف بـ id أقدم تُرى حتى لو ظهرت متأخرة
+TOKEN_BLACKLIST_FILTER_OVERLAP = float(os.environ.get("TOKEN_BLACKLIST_FILTER_OVERLAP", 10))
+# احذف التوكنات المنتهية دوريًا (cron): python manage.py prune_token_blacklist
+
+# مسارات الكتالوج التي تُخدم بـ views غير متزامنة تحت ASGI (أسماء URL مفصولة بفواصل، أو "*") — api/async_views.py
+ASYNC_VIEWS = [name.strip() for name in os.environ.get("ASYNC_VIEWS", "").split(",") if name.strip()]
+
+# التحكم في القبول لتجزئة كلمات المرور (الدخول/التسجيل) — api/throttling.py
+HASHING_THROTTLE_RATES = {
+    "ip": os.environ.get("HASHING_RATE_IP", "20/min"),                  # سعة الدفعة/معدل التعبئة
+    "identifier": os.environ.get("HASHING_RATE_IDENTIFIER", "5/min"),
 }
+HASHING_WORKER_SHARE = float(os.environ.get("HASHING_WORKER_SHARE", 0.5))  # من WEB_CONCURRENCY
+HASHING_MAX_CONCURRENCY = int(os.environ.get("HASHING_MAX_CONCURRENCY", 0)) or None
+HASHING_SLOT_WAIT = float(os.environ.get("HASHING_SLOT_WAIT", 1.0))  # ثوانٍ انتظار خانة قبل 429
+HASHING_LOCK_DIR = os.environ.get("HASHING_LOCK_DIR", "/tmp/epicblog_api_hashing")
+
+# كاش المستخدمين داخل العملية لـ StatelessJWTAuthentication (الحد الأقصى للتقادم بين العمليات)
+AUTH_USER_CACHE_SIZE = int(os.environ.get("AUTH_USER_CACHE_SIZE", 1024))
+AUTH_USER_CACHE_TTL = int(os.environ.get("AUTH_USER_CACHE_TTL", 60))  # ثوانٍ
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.0/howto/static-files/